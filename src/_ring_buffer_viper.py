@@ -0,0 +1,21 @@
+# #! /bin/MicroPython
+import micropython
+
+
+@micropython.viper
+def store_frame(view, start: int, channels, n_channels: int, sequence: int, timestamp: int, status: int):
+    """Viper version of ring_buffer.store_frame(), see it for the arguments.
+    The buffer and the channels must be 'i' arrays (32-bit items).
+
+    """
+    dst = ptr32(view)  # noqa: F821
+    src = ptr32(channels)  # noqa: F821
+    dst[start] = sequence
+    dst[start + 1] = timestamp
+    dst[start + 2] = status
+
+    pos = start + 3
+    i = 0
+    while i < n_channels:
+        dst[pos + i] = src[i]
+        i += 1
@@ -0,0 +1,493 @@
+"""
+Behavioral model of the ADS1299 as seen from the SPI bus.
+
+It keeps the 24 register map, decodes the command set (WAKEUP, STANDBY, RESET,
+START, STOP, RDATAC, SDATAC, RDATA, RREG, WREG) byte by byte and produces
+27-byte frames (3 status bytes + 8 x 24-bit channels) at the data rate selected
+in CONFIG1, pulling DRDY low on every conversion. Samples are synthesized from
+the CHnSET/CONFIG2 settings so test signals, shorted inputs and gains look like
+they do on the real chip. Models can be daisy-chained with chain(), the next
+device shifts its frame out through DAISY_IN after the frame of this one, or
+share the master clock and START pin of another model with share_clock().
+"""
+import math
+import threading
+import time
+
+import machine
+
+# Commands
+_WAKEUP = 0x02
+_STANDBY = 0x04
+_RESET = 0x06
+_START = 0x08
+_STOP = 0x0A
+_RDATAC = 0x10
+_SDATAC = 0x11
+_RDATA = 0x12
+_RREG = 0x20
+_WREG = 0x40
+
+# Registers
+_ID = 0x00
+_CONFIG1 = 0x01
+_CONFIG2 = 0x02
+_CH1SET = 0x05
+_LOFF_STATP = 0x12
+_LOFF_STATN = 0x13
+_GPIO = 0x14
+_READ_ONLY = (_ID, _LOFF_STATP, _LOFF_STATN)
+
+NUM_REGISTERS = 24
+NUM_CHANNELS = 8
+FRAME_SIZE = 3 + 3 * NUM_CHANNELS
+
+RESET_REGISTERS = bytes([
+    0x3E,                                            # ID: ADS1299, 8 channels
+    0x96, 0xC0, 0x60, 0x00,                          # CONFIG1..3, LOFF
+    0x61, 0x61, 0x61, 0x61, 0x61, 0x61, 0x61, 0x61,  # CH1SET..CH8SET
+    0x00, 0x00, 0x00, 0x00, 0x00,                    # BIAS_SENSP/N, LOFF_SENSP/N, LOFF_FLIP
+    0x00, 0x00,                                      # LOFF_STATP/N
+    0x0F, 0x00, 0x00, 0x00,                          # GPIO, MISC1, MISC2, CONFIG4
+])
+
+F_CLK = 2048000
+V_REF = 4.5
+# 4 tCLK, minimum time between the starts of two bytes of a multi-byte command
+T_SDECODE_NS = 4 * 1_000_000_000 // F_CLK
+# 4 tCLK from the last SCLK to CS high, 2 tCLK of CS high between transactions
+T_SCCS_NS = 4 * 1_000_000_000 // F_CLK
+T_CSH_NS = 2 * 1_000_000_000 // F_CLK
+_FULL_SCALE = (1 << 23) - 1
+_GAINS = (1, 2, 4, 6, 8, 12, 24, 1)
+
+
+class ADS1299Model:
+    """Emulated ADS1299 attached to a ``machine.SPI`` bus.
+
+    :realtime: When True a background thread converts at the CONFIG1 data rate
+               after START, otherwise conversions only happen through step().
+    :frame_source: Optional callable(index) -> 27 bytes that replaces the
+                   synthetic signals, useful to replay captured frames.
+    :catch_up: When the host wakes the clock thread more than one period late,
+               True emits every due conversion back to back (exact data rate),
+               False skips them (counted in ``stalled``) so host scheduling
+               stalls do not show up as overruns of the code under test.
+
+    """
+
+    def __init__(self, realtime: bool = True, frame_source=None, catch_up: bool = True) -> None:
+        self.realtime = realtime
+        self.frame_source = frame_source
+        self.catch_up = catch_up
+        self.registers = bytearray(RESET_REGISTERS)
+
+        self._cs = None
+        self._drdy = None
+        self._spi_id = None
+
+        # Daisy chain: device whose DOUT is wired to DAISY_IN, channel numbering of the synthetic signals
+        self.daisy_in = None
+        self.channel_offset = 0
+        # Devices converting on the CLK of this one, see share_clock()
+        self._clock_followers = []
+
+        self._clock = None
+        self._clock_stop = threading.Event()
+        self._reset_state()
+
+    ####################################################################################################################
+    #                                                    WIRING                                                        #
+    ####################################################################################################################
+
+    def connect(self, spi_id: int, cs_pin, drdy_pin) -> None:
+        """Attach the model to an emulated SPI bus, chip select and DRDY line."""
+        self._spi_id = spi_id
+        self._cs = machine._line(cs_pin)
+        self._drdy = machine._line(drdy_pin)
+        self._cs.listeners.append(self._on_cs)
+        self._drdy.set_level(1)
+        machine._attach(spi_id, self)
+
+    def disconnect(self) -> None:
+        self._stop_clock()
+        if self._cs is not None and self._on_cs in self._cs.listeners:
+            self._cs.listeners.remove(self._on_cs)
+        if self._spi_id is not None:
+            machine._detach(self._spi_id, self)
+
+    def selected(self) -> bool:
+        return self._cs is not None and self._cs.level == 0
+
+    def connect_start(self, start_pin) -> None:
+        """Wire the START pin, a high level starts the conversions and a low
+        level stops them, like the START/STOP commands."""
+        machine._line(start_pin).listeners.append(self._on_start)
+
+    def share_clock(self, device: "ADS1299Model") -> "ADS1299Model":
+        """Drive the conversions of device from the clock of this model, as
+        when both share the CLK line. device converts together with this one
+        while both are started (START command or pin), each on its own bus,
+        CS and DRDY.
+
+        :device: Device following this clock.
+        :returns: device.
+
+        """
+        self._clock_followers.append(device)
+        device.realtime = False
+        device.channel_offset = self.channel_offset + NUM_CHANNELS * len(self._clock_followers)
+        return device
+
+    def _on_start(self, pin_id, level: int) -> None:
+        self._command(_START if level else _STOP)
+
+    def chain(self, device: "ADS1299Model") -> "ADS1299Model":
+        """Wire the DOUT of device to the DAISY_IN of this one. device shares
+        CS, SCLK, DIN and the conversion clock (START) of this model, so it is
+        not connected to a bus and does not run its own clock thread.
+
+        :device: Next device of the chain, it may have its own daisy_in.
+        :returns: device.
+
+        """
+        self.daisy_in = device
+        device.realtime = False
+        device.channel_offset = self.channel_offset + NUM_CHANNELS
+        return device
+
+    ####################################################################################################################
+    #                                                    STATE                                                         #
+    ####################################################################################################################
+
+    def _reset_state(self) -> None:
+        self.running = False
+        self.standby = False
+        self.rdatac = True  # The device powers up in RDATAC mode
+
+        # Statistics used by the benchmarks
+        self.conversions = 0
+        self.frames_read = 0
+        self.overruns = 0
+        self.stalled = 0
+        self.transfers = 0
+        self.decode_violations = 0  # Bytes of WREG/RREG clocked in less than tSDECODE after the previous one
+        self.sccs_violations = 0    # CS raised less than tSCCS after the last SCLK (checked with bus timing only)
+        self.csh_violations = 0     # CS lowered less than tCSH after it was raised
+        self._last_byte_ns = 0
+        self._last_sclk_ns = 0
+        self._cs_high_ns = 0
+
+        self._latest_index = -1
+        self._last_read_index = -1
+        self._daisy_out = bytearray()
+        self._out = bytearray()
+        self._out_pos = 0
+        self._pending_index = -1
+        self._pending_end = 0
+
+        self._arg_stage = 0
+        self._opcode = 0
+        self._address = 0
+        self._count = 0
+
+    def reset(self) -> None:
+        """Equivalent to a power cycle."""
+        self._stop_clock()
+        self.registers[:] = RESET_REGISTERS
+        self._reset_state()
+        if self._drdy is not None:
+            self._drdy.set_level(1)
+
+    def data_rate(self) -> int:
+        """Output data rate in SPS selected by CONFIG1.DR[2:0]."""
+        return F_CLK // (128 << (self.registers[_CONFIG1] & 0x07))
+
+    def sample_period_us(self) -> float:
+        return 1e6 / self.data_rate()
+
+    @property
+    def missed_frames(self) -> int:
+        """Conversions that were overwritten before the host read them."""
+        return self.overruns
+
+    ####################################################################################################################
+    #                                                  CONVERSIONS                                                     #
+    ####################################################################################################################
+
+    def step(self, conversions: int = 1) -> None:
+        """Run conversions synchronously, DRDY falls once per conversion."""
+        for _ in range(conversions):
+            self._convert()
+
+    def _convert(self) -> None:
+        if self._latest_index >= 0 and self._last_read_index != self._latest_index:
+            self.overruns += 1
+
+        self._latest_index += 1
+        self.conversions += 1
+        # Devices sharing the clock have their data ready by the time this DRDY falls
+        if self.daisy_in is not None:
+            self.daisy_in._convert()
+        for device in self._clock_followers:
+            if device.running and not device.standby:
+                device._convert()
+
+        drdy = self._drdy
+        if drdy is not None:
+            # DRDY pulses high for a few tCLK if the previous frame was not read
+            drdy.set_level(1)
+            drdy.set_level(0)
+
+    def _start_clock(self) -> None:
+        if not self.realtime or self._clock is not None:
+            return
+
+        self._clock_stop.clear()
+        self._clock = threading.Thread(target=self._clock_loop, name="ads1299-drdy", daemon=True)
+        self._clock.start()
+
+    def _stop_clock(self) -> None:
+        clock = self._clock
+        if clock is None:
+            return
+
+        self._clock_stop.set()
+        self._clock = None
+        if clock is not threading.current_thread():
+            clock.join()
+
+    def _restart_clock(self) -> None:
+        if self._clock is not None:
+            self._stop_clock()
+            self._start_clock()
+
+    def _clock_loop(self) -> None:
+        period = 1.0 / self.data_rate()
+        start = time.perf_counter()
+        produced = 0
+        stop = self._clock_stop
+
+        while not stop.is_set():
+            due = int((time.perf_counter() - start) / period)
+            if not self.catch_up and due - produced > 1:
+                self.stalled += due - produced - 1
+                produced = due - 1
+            while produced < due and not stop.is_set():
+                self._convert()
+                produced += 1
+            stop.wait(period / 2)
+
+    ####################################################################################################################
+    #                                                     FRAMES                                                       #
+    ####################################################################################################################
+
+    def frame(self, index: int) -> bytes:
+        """Build the 27-byte output frame of conversion ``index``."""
+        if self.frame_source is not None:
+            return bytes(self.frame_source(index))
+
+        regs = self.registers
+        statp = regs[_LOFF_STATP]
+        statn = regs[_LOFF_STATN]
+        gpio_data = regs[_GPIO] >> 4
+
+        frame = bytearray(FRAME_SIZE)
+        frame[0] = 0xC0 | (statp >> 4)
+        frame[1] = ((statp & 0x0F) << 4) | (statn >> 4)
+        frame[2] = ((statn & 0x0F) << 4) | gpio_data
+
+        t = max(index, 0) / self.data_rate()
+        for ch in range(NUM_CHANNELS):
+            code = self._channel_code(ch, t, index) & 0xFFFFFF
+            offset = 3 + 3 * ch
+            frame[offset] = code >> 16
+            frame[offset + 1] = (code >> 8) & 0xFF
+            frame[offset + 2] = code & 0xFF
+
+        return bytes(frame)
+
+    def _channel_code(self, ch: int, t: float, index: int) -> int:
+        chset = self.registers[_CH1SET + ch]
+        if chset & 0x80:
+            return 0  # Powered down
+
+        gain = _GAINS[(chset >> 4) & 0x07]
+        mux = chset & 0x07
+
+        if mux == 0b000:  # NORMAL: EEG-like rhythm plus a bit of mains
+            n = ch + self.channel_offset
+            volts = 20e-6 * (n % 8 + 1) * math.sin(2 * math.pi * (8 + n) * t) + 5e-6 * math.sin(2 * math.pi * 50 * t)
+        elif mux == 0b011:  # MVDD
+            volts = 2.5
+        elif mux == 0b100:  # TEMP, 145.3 mV at 25C
+            volts = 0.1453
+        elif mux == 0b101:  # TEST
+            volts = self._test_signal(t)
+        else:  # SHORTED, BIAS_MEAS, BIAS_DRP, BIAS_DRN
+            volts = 0.0
+
+        # Deterministic +/-2 LSB noise so shorted inputs are not perfectly flat
+        noise = ((index * 1103515245 + (ch + self.channel_offset) * 12345) >> 16) % 5 - 2
+        code = int(volts * gain / V_REF * _FULL_SCALE) + noise
+
+        return max(-_FULL_SCALE - 1, min(_FULL_SCALE, code))
+
+    def _test_signal(self, t: float) -> float:
+        config2 = self.registers[_CONFIG2]
+        if not config2 & 0x10:
+            return 0.0  # External test source, nothing connected
+
+        amplitude = (2 if config2 & 0x04 else 1) * V_REF / 2400
+        freq_bits = config2 & 0x03
+        if freq_bits == 0b11:
+            return amplitude
+
+        freq = F_CLK / (1 << 20 if freq_bits == 0b01 else 1 << 21)
+        return amplitude if (t * freq) % 1.0 < 0.5 else -amplitude
+
+    ####################################################################################################################
+    #                                                      SPI                                                         #
+    ####################################################################################################################
+
+    def _on_cs(self, pin_id, level: int) -> None:
+        if self.daisy_in is not None:
+            self.daisy_in._on_cs(pin_id, level)
+        self._daisy_out = bytearray()
+
+        now_ns = time.perf_counter_ns()
+        if level == 0:
+            if now_ns - self._cs_high_ns < T_CSH_NS:
+                self.csh_violations += 1
+        else:
+            if machine.EMULATE_BUS_TIME and now_ns - self._last_sclk_ns < T_SCCS_NS:
+                self.sccs_violations += 1
+            self._cs_high_ns = now_ns
+
+        if level == 0:
+            if self.rdatac and self._latest_index > self._last_read_index:
+                self._load_frame(self._latest_index)
+        else:
+            # Deselecting the device aborts any multi-byte command
+            self._out = bytearray()
+            self._out_pos = 0
+            self._pending_index = -1
+            self._arg_stage = 0
+
+    def _load_frame(self, index: int) -> None:
+        self._out += self.frame(index)
+        self._pending_index = index
+        self._pending_end = len(self._out)
+        if self._drdy is not None:
+            self._drdy.set_level(1)
+
+    def transfer(self, mosi, miso, ns_per_byte: int = 0, start_ns: int = 0) -> None:
+        """Clock ``len(mosi)`` bytes, MISO bytes are stored in ``miso`` if given.
+        ``ns_per_byte`` is the bus byte time and ``start_ns`` the perf_counter_ns()
+        of the first SCLK, used to check tSDECODE and tSCCS."""
+        self.transfers += 1
+        if self.daisy_in is not None:
+            # The next device is clocked at the same time, its DOUT queues up behind the frame of this one
+            shifted = bytearray(len(mosi))
+            self.daisy_in.transfer(mosi, shifted, ns_per_byte, start_ns)
+            self._daisy_out += shifted
+        if not start_ns:
+            start_ns = time.perf_counter_ns()
+        for i in range(len(mosi)):
+            byte_ns = start_ns + i * ns_per_byte
+            if self._arg_stage and byte_ns - self._last_byte_ns < T_SDECODE_NS:
+                self.decode_violations += 1
+            self._last_byte_ns = byte_ns
+
+            out = self._out
+            pos = self._out_pos
+            if pos < len(out):
+                byte_out = out[pos]
+                self._out_pos = pos + 1
+                if self._pending_index >= 0 and self._out_pos >= self._pending_end:
+                    self._last_read_index = self._pending_index
+                    self._pending_index = -1
+                    self.frames_read += 1
+            elif self._daisy_out:
+                byte_out = self._daisy_out.pop(0)
+            else:
+                byte_out = 0x00
+
+            if miso is not None:
+                miso[i] = byte_out
+
+            self._clock_in(mosi[i])
+
+        self._last_sclk_ns = start_ns + len(mosi) * ns_per_byte
+
+    def _clock_in(self, byte: int) -> None:
+        stage = self._arg_stage
+
+        if stage == 1:
+            self._count = (byte & 0x1F) + 1
+            if self._opcode == _WREG:
+                self._arg_stage = 2
+                return
+
+            self._arg_stage = 0
+            if self._opcode == _RREG:
+                start = self._address
+                end = min(start + self._count, NUM_REGISTERS)
+                self._out += self.registers[start:end]
+            return
+
+        if stage == 2:
+            if self._opcode == _WREG:
+                self._write_register(self._address, byte)
+            self._address += 1
+            self._count -= 1
+            if self._count == 0:
+                self._arg_stage = 0
+            return
+
+        opcode = byte & 0xE0
+        if opcode == _RREG or opcode == _WREG:
+            # RREG/WREG are ignored in RDATAC mode but their arguments are still consumed
+            self._opcode = 0 if self.rdatac else opcode
+            self._address = byte & 0x1F
+            self._arg_stage = 1
+            return
+
+        self._command(byte)
+
+    def _command(self, byte: int) -> None:
+        if byte == _WAKEUP:
+            self.standby = False
+            if self.running:
+                self._start_clock()
+        elif byte == _STANDBY:
+            self.standby = True
+            self._stop_clock()
+        elif byte == _RESET:
+            self._stop_clock()
+            self.registers[:] = RESET_REGISTERS
+            self.running = False
+            self.rdatac = True
+        elif byte == _START:
+            self.running = True
+            if not self.standby:
+                self._start_clock()
+        elif byte == _STOP:
+            self.running = False
+            self._stop_clock()
+        elif byte == _RDATAC:
+            self.rdatac = True
+        elif byte == _SDATAC:
+            self.rdatac = False
+        elif byte == _RDATA:
+            if self._latest_index >= 0:
+                self._load_frame(self._latest_index)
+
+    def _write_register(self, address: int, value: int) -> None:
+        if address >= NUM_REGISTERS or address in _READ_ONLY:
+            return
+
+        previous = self.registers[address]
+        self.registers[address] = value
+        if address == _CONFIG1 and (previous ^ value) & 0x07:
+            self._restart_clock()
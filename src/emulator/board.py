@@ -0,0 +1,70 @@
+"""
+Emulated ESP32 wiring.
+
+The default device sits on the same SPI bus, CS and DRDY pins used by
+``src/main.py`` and ``tests/1_slave_test.py`` so those scripts run unchanged.
+Benchmarks can ``import board`` to reach the model and its statistics.
+"""
+import machine
+from ads1299_model import ADS1299Model
+
+SPI_ID = 2
+CS_PIN = 5
+DRDY_PIN = 4
+
+
+def attach(model: ADS1299Model, spi_id: int = SPI_ID, cs_pin: int = CS_PIN, drdy_pin: int = DRDY_PIN) -> ADS1299Model:
+    """Wire an emulated ADS1299 to the given bus and pins.
+
+    :model: Device to be attached.
+    :spi_id: machine.SPI id of the bus.
+    :cs_pin: Chip select pin id.
+    :drdy_pin: DRDY pin id.
+    :returns: The attached model.
+
+    """
+    model.connect(spi_id, cs_pin, drdy_pin)
+    return model
+
+
+def daisy_chain(devices: int) -> list[ADS1299Model]:
+    """Extend the default device into a daisy chain of ``devices`` models,
+    they all answer on its CS and only its DRDY is wired.
+
+    :devices: Total number of devices in the chain.
+    :returns: The models, first device (board.ads) first.
+
+    """
+    models = [ads]
+    while models[-1].daisy_in is not None:
+        models.append(models[-1].daisy_in)
+    while len(models) < devices:
+        models.append(models[-1].chain(ADS1299Model(frame_source=ads.frame_source)))
+    return models
+
+
+def device_group(cs_pins: list[int], drdy_pins: list[int], start_pin: int) -> list[ADS1299Model]:
+    """Add devices with their own CS and DRDY on the default bus, converting on
+    the clock of the default device and started by a START pin shared by all.
+
+    :cs_pins: Chip select pin id of each added device.
+    :drdy_pins: DRDY pin id of each added device.
+    :start_pin: START pin id shared by the whole group.
+    :returns: The models, the default device (clock master) first.
+
+    """
+    models = [ads]
+    ads.connect_start(start_pin)
+    for cs_pin, drdy_pin in zip(cs_pins, drdy_pins):
+        model = ads.share_clock(attach(ADS1299Model(frame_source=ads.frame_source), cs_pin=cs_pin, drdy_pin=drdy_pin))
+        model.connect_start(start_pin)
+        models.append(model)
+    return models
+
+
+def set_bus_timing(enabled: bool) -> None:
+    """Enable or disable the emulation of SPI wire time."""
+    machine.EMULATE_BUS_TIME = enabled
+
+
+ads = attach(ADS1299Model())
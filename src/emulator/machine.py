@@ -0,0 +1,215 @@
+"""
+Host stand-in for the MicroPython ``machine`` module.
+
+Pins are shared by id like real GPIOs, so every ``Pin(5)`` refers to the same
+line and devices attached through ``board.py`` see chip select edges and can
+drive DRDY. SPI buses route every transfer to the device whose CS is low and,
+by default, take as long as the real bus would at the configured baudrate.
+"""
+import threading
+import time as _time
+
+# Emulate wire time of SPI transfers (bits / baudrate)
+EMULATE_BUS_TIME = True
+
+_cpu_freq = 160000000
+_irq_lock = threading.RLock()
+
+
+def freq(hz: int | None = None) -> int | None:
+    global _cpu_freq
+    if hz is None:
+        return _cpu_freq
+    _cpu_freq = hz
+    return None
+
+
+def idle() -> None:
+    _time.sleep(0)
+
+
+def disable_irq() -> bool:
+    _irq_lock.acquire()
+    return True
+
+
+def enable_irq(state: bool = True) -> None:
+    _irq_lock.release()
+
+
+def unique_id() -> bytes:
+    return b"\xad\x51\x29\x90\x00\x01"
+
+
+def reset() -> None:
+    raise SystemExit("machine.reset()")
+
+
+class _Line:
+    """Electrical state of a GPIO shared by every Pin object with the same id."""
+
+    def __init__(self, pin_id) -> None:
+        self.pin_id = pin_id
+        self.level = 1
+        self.irq_handler = None
+        self.irq_trigger = 0
+        self.irq_pin = None
+        self.listeners = []
+
+    def set_level(self, level: int) -> None:
+        level = 1 if level else 0
+        if level == self.level:
+            return
+
+        self.level = level
+        for listener in self.listeners:
+            listener(self.pin_id, level)
+
+        handler = self.irq_handler
+        if handler is None:
+            return
+
+        edge = Pin.IRQ_RISING if level else Pin.IRQ_FALLING
+        if self.irq_trigger & edge:
+            with _irq_lock:
+                handler(self.irq_pin)
+
+
+_lines = {}
+
+
+def _line(pin_id) -> _Line:
+    line = _lines.get(pin_id)
+    if line is None:
+        line = _lines[pin_id] = _Line(pin_id)
+    return line
+
+
+class Pin:
+    IN = 1
+    OUT = 3
+    OPEN_DRAIN = 7
+    PULL_UP = 2
+    PULL_DOWN = 1
+    IRQ_RISING = 1
+    IRQ_FALLING = 2
+
+    def __init__(self, pin_id, mode: int = -1, pull: int = -1, *, value: int | None = None) -> None:
+        self._id = pin_id
+        self._line = _line(pin_id)
+        self.init(mode, pull, value=value)
+
+    def init(self, mode: int = -1, pull: int = -1, *, value: int | None = None) -> None:
+        if mode != -1:
+            self._mode = mode
+        if value is not None:
+            self._line.set_level(value)
+
+    def value(self, level: int | None = None) -> int | None:
+        if level is None:
+            return self._line.level
+        self._line.set_level(level)
+        return None
+
+    def __call__(self, level: int | None = None) -> int | None:
+        return self.value(level)
+
+    def on(self) -> None:
+        self._line.set_level(1)
+
+    def off(self) -> None:
+        self._line.set_level(0)
+
+    def toggle(self) -> None:
+        self._line.set_level(not self._line.level)
+
+    def irq(self, handler=None, trigger: int = IRQ_FALLING | IRQ_RISING, **kwargs):
+        self._line.irq_handler = handler
+        self._line.irq_trigger = trigger
+        self._line.irq_pin = self
+        return None
+
+    def __repr__(self) -> str:
+        return f"Pin({self._id})"
+
+
+class SPI:
+    MSB = 0
+    LSB = 1
+
+    def __init__(self, spi_id: int, baudrate: int = 1000000, *, polarity: int = 0, phase: int = 0, bits: int = 8,
+                 firstbit: int = MSB, sck=None, mosi=None, miso=None) -> None:
+        self._id = spi_id
+        self.baudrate = baudrate
+        self.polarity = polarity
+        self.phase = phase
+        self.bits = bits
+        self.firstbit = firstbit
+        self.init(baudrate)
+
+    def init(self, baudrate: int | None = None, *, polarity: int | None = None, phase: int | None = None,
+             bits: int | None = None, firstbit: int | None = None, **kwargs) -> None:
+        # Like the ESP32 port, settings that are not given keep their current value
+        if baudrate is not None:
+            self.baudrate = baudrate
+        if polarity is not None:
+            self.polarity = polarity
+        if phase is not None:
+            self.phase = phase
+        if bits is not None:
+            self.bits = bits
+        if firstbit is not None:
+            self.firstbit = firstbit
+        self._ns_per_byte = 8_000_000_000 // self.baudrate
+
+    def deinit(self) -> None:
+        pass
+
+    def _transfer(self, mosi, miso) -> None:
+        start = _time.perf_counter_ns()
+        selected = False
+
+        for device in _devices.get(self._id, ()):
+            if device.selected():
+                device.transfer(mosi, miso, self._ns_per_byte, start)
+                selected = True
+                break
+
+        if not selected and miso is not None:
+            # Nobody drives MISO, the pull-up reads as 0xFF
+            for i in range(len(miso)):
+                miso[i] = 0xFF
+
+        if EMULATE_BUS_TIME:
+            deadline = start + len(mosi) * self._ns_per_byte
+            while _time.perf_counter_ns() < deadline:
+                pass
+
+    def write(self, buf) -> None:
+        self._transfer(memoryview(buf), None)
+
+    def read(self, nbytes: int, write: int = 0x00) -> bytes:
+        buf = bytearray(nbytes)
+        self.readinto(buf, write)
+        return bytes(buf)
+
+    def readinto(self, buf, write: int = 0x00) -> None:
+        self._transfer(bytes([write]) * len(buf), memoryview(buf))
+
+    def write_readinto(self, write_buf, read_buf) -> None:
+        self._transfer(memoryview(write_buf), memoryview(read_buf))
+
+
+SoftSPI = SPI
+
+# spi_id -> devices attached to that bus, see board.attach()
+_devices = {}
+
+
+def _attach(spi_id: int, device) -> None:
+    _devices.setdefault(spi_id, []).append(device)
+
+
+def _detach(spi_id: int, device) -> None:
+    if device in _devices.get(spi_id, ()):
+        _devices[spi_id].remove(device)
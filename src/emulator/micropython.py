@@ -0,0 +1,100 @@
+"""
+Host stand-in for the MicroPython ``micropython`` module.
+
+Like a port built without the native emitter it has no ``native``/``viper``
+decorators, so firmware modules fall back to their pure bytecode versions.
+enable_emitters() adds them: the decorated functions run as plain Python with
+the viper pointer builtins (ptr8, ptr16, ptr32) over memoryviews, so the viper
+sources can be checked against their fallbacks on the host.
+"""
+import builtins
+import sys
+import threading
+from collections import deque
+
+# Same depth as MICROPY_SCHEDULER_DEPTH on the ESP32 port
+SCHEDULER_DEPTH = 8
+
+_pending = deque()
+_pending_ready = threading.Condition()
+_scheduler = None
+
+
+def const(value):
+    return value
+
+
+def _run_scheduler() -> None:
+    while True:
+        with _pending_ready:
+            while not _pending:
+                _pending_ready.wait()
+            func, arg = _pending[0]
+
+        func(arg)
+
+        with _pending_ready:
+            _pending.popleft()
+
+
+def schedule(func, arg) -> None:
+    """Queue ``func(arg)`` to run outside of the caller. Callbacks run one at a
+    time, in order, on a dedicated thread that plays the role of the VM
+    between two bytecodes. Raises RuntimeError when the queue is full.
+
+    """
+    global _scheduler
+
+    with _pending_ready:
+        if len(_pending) >= SCHEDULER_DEPTH:
+            raise RuntimeError("schedule queue full")
+        _pending.append((func, arg))
+        _pending_ready.notify()
+
+        if _scheduler is None:
+            _scheduler = threading.Thread(target=_run_scheduler, name="micropython-schedule", daemon=True)
+            _scheduler.start()
+
+
+def alloc_emergency_exception_buf(size: int) -> None:
+    pass
+
+
+def opt_level(level: int | None = None) -> int:
+    return 0
+
+
+def mem_info(verbose: bool = False) -> None:
+    print("mem_info: not available on the host emulator")
+
+
+def heap_lock() -> int:
+    return 0
+
+
+def heap_unlock() -> int:
+    return 0
+
+
+def _ptr(typecode: str):
+    def ptr(obj):
+        view = memoryview(obj)
+        if view.format != typecode:
+            view = view.cast("B").cast(typecode)
+        return view
+    return ptr
+
+
+def _identity(func):
+    return func
+
+
+def enable_emitters() -> None:
+    """Provide the ``native`` and ``viper`` decorators, must be called before
+    the firmware modules are imported."""
+    module = sys.modules[__name__]
+    module.native = _identity
+    module.viper = _identity
+    builtins.ptr8 = _ptr("B")
+    builtins.ptr16 = _ptr("H")
+    builtins.ptr32 = _ptr("i")
@@ -0,0 +1,43 @@
+"""
+Host stand-in for the MicroPython ``network`` module.
+
+The station interface connects instantly and reports the loopback address, the
+firmware then talks to the real host TCP stack through CPython's ``socket``.
+"""
+STA_IF = 0
+AP_IF = 1
+
+
+class WLAN:
+    def __init__(self, interface_id: int = STA_IF) -> None:
+        self._interface_id = interface_id
+        self._active = False
+        self._connected = False
+
+    def active(self, is_active: bool | None = None) -> bool:
+        if is_active is not None:
+            self._active = bool(is_active)
+            if not self._active:
+                self._connected = False
+        return self._active
+
+    def connect(self, ssid: str | None = None, key: str | None = None, **kwargs) -> None:
+        self._connected = self._active
+
+    def disconnect(self) -> None:
+        self._connected = False
+
+    def isconnected(self) -> bool:
+        return self._connected
+
+    def ifconfig(self, config: tuple | None = None) -> tuple:
+        return ("127.0.0.1", "255.0.0.0", "127.0.0.1", "127.0.0.1")
+
+    def scan(self) -> list:
+        return [(b"ads1299-emulator", b"\x00\x00\x00\x00\x00\x00", 1, -40, 0, False)]
+
+    def config(self, *args, **kwargs):
+        return None
+
+    def status(self, *args) -> int:
+        return 1010 if self._connected else 1000
@@ -0,0 +1,106 @@
+"""
+Run firmware scripts on the host against the emulated ADS1299.
+
+Usage:
+    python src/emulator/run.py [--no-bus-time] [--emitters] SCRIPT [ARGS...]
+
+    --no-bus-time  SPI transfers return at once instead of taking the wire time.
+    --emitters     Provide @micropython.native/viper (run as plain Python) so the
+                   viper versions are loaded instead of the bytecode fallbacks.
+
+Example:
+    python src/emulator/run.py src/main.py
+    python src/emulator/run.py tests/1_slave_test.py
+"""
+import builtins
+import gc
+import os
+import runpy
+import sys
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.dirname(HERE)
+
+# MicroPython-only extensions of the time module used by the firmware
+_TIME_EXTENSIONS = ("sleep_ms", "sleep_us", "ticks_ms", "ticks_us", "ticks_cpu", "ticks_add", "ticks_diff")
+
+# Size of the emulated heap reported by gc.mem_free(), about what the ESP32 port has without SPIRAM
+HEAP_SIZE = 110000
+
+
+# Only the memory allocated by the firmware code counts, not the emulator's nor the interpreter's
+_FIRMWARE_TRACES = (tracemalloc.Filter(True, os.path.join(os.path.dirname(SRC), "*")),
+                    tracemalloc.Filter(False, os.path.join(HERE, "*")))
+
+
+def _mem_alloc() -> int:
+    # CPython frees garbage at once, so the traced memory only grows when the firmware keeps what it allocates:
+    # leaks show up on the host, allocation churn only on the board. Tracing starts on the first call.
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    snapshot = tracemalloc.take_snapshot().filter_traces(_FIRMWARE_TRACES)
+    return sum(stat.size for stat in snapshot.statistics("filename"))
+
+
+def _mem_free() -> int:
+    # Polled after every frame by the GC scheduler, so it skips the snapshot and counts every traced allocation
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    return max(0, HEAP_SIZE - tracemalloc.get_traced_memory()[0])
+
+
+def install(emitters: bool = False) -> None:
+    """Make the MicroPython stand-ins importable and patch the builtins the
+    firmware expects (const() without import, time.ticks_*, gc.mem_*).
+
+    """
+    for path in (SRC, HERE):
+        if path in sys.path:
+            sys.path.remove(path)
+        sys.path.insert(0, path)
+
+    import micropython
+    import utime
+
+    builtins.const = micropython.const
+    if emitters:
+        micropython.enable_emitters()
+    for name in _TIME_EXTENSIONS:
+        if not hasattr(time, name):
+            setattr(time, name, getattr(utime, name))
+    if not hasattr(gc, "mem_alloc"):
+        gc.mem_alloc = _mem_alloc
+        gc.mem_free = _mem_free
+
+    # The DRDY thread must be able to preempt a busy main loop within a sample period
+    sys.setswitchinterval(50e-6)
+
+
+def main(argv: list[str]) -> int:
+    bus_time = True
+    emitters = False
+    while argv and argv[0] in ("--no-bus-time", "--emitters"):
+        if argv[0] == "--no-bus-time":
+            bus_time = False
+        else:
+            emitters = True
+        argv = argv[1:]
+
+    if not argv:
+        print(__doc__)
+        return 2
+
+    install(emitters)
+    import board
+    board.set_bus_timing(bus_time)
+
+    script = argv[0]
+    sys.argv = argv
+    runpy.run_path(script, run_name="__main__")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
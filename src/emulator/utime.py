@@ -0,0 +1,71 @@
+"""
+Host stand-in for the MicroPython ``utime`` module.
+
+Ticks wrap at 2**30 like the ESP32 port, so code that forgets ``ticks_diff``
+breaks here exactly as it would on the board.
+"""
+import time as _time
+
+_TICKS_PERIOD = 1 << 30
+_TICKS_MAX = _TICKS_PERIOD - 1
+_TICKS_HALFPERIOD = _TICKS_PERIOD // 2
+
+# time.sleep() cannot wake up faster than the scheduler tick, below this we spin
+_BUSY_WAIT_NS = 2_000_000
+
+_EPOCH_NS = _time.perf_counter_ns()
+
+
+def _elapsed_ns() -> int:
+    return _time.perf_counter_ns() - _EPOCH_NS
+
+
+def ticks_ms() -> int:
+    return (_elapsed_ns() // 1_000_000) & _TICKS_MAX
+
+
+def ticks_us() -> int:
+    return (_elapsed_ns() // 1_000) & _TICKS_MAX
+
+
+def ticks_cpu() -> int:
+    return _elapsed_ns() & _TICKS_MAX
+
+
+def ticks_add(ticks: int, delta: int) -> int:
+    return (ticks + delta) & _TICKS_MAX
+
+
+def ticks_diff(ticks1: int, ticks2: int) -> int:
+    return ((ticks1 - ticks2 + _TICKS_HALFPERIOD) & _TICKS_MAX) - _TICKS_HALFPERIOD
+
+
+def _sleep_ns(duration_ns: int) -> None:
+    if duration_ns <= 0:
+        return
+
+    deadline = _time.perf_counter_ns() + duration_ns
+    if duration_ns > _BUSY_WAIT_NS:
+        _time.sleep((duration_ns - _BUSY_WAIT_NS) / 1e9)
+
+    while _time.perf_counter_ns() < deadline:
+        pass
+
+
+def sleep(seconds: float) -> None:
+    _sleep_ns(int(seconds * 1e9))
+
+
+def sleep_ms(ms: int) -> None:
+    _sleep_ns(ms * 1_000_000)
+
+
+def sleep_us(us: int) -> None:
+    _sleep_ns(us * 1_000)
+
+
+time = _time.time
+time_ns = _time.time_ns
+localtime = _time.localtime
+gmtime = _time.gmtime
+mktime = _time.mktime
@@ -0,0 +1,214 @@
+# #! /bin/MicroPython
+import gc
+
+from micropython import const
+from utime import ticks_diff, ticks_us
+
+# Frame counters wrap like ticks_us() so they always stay small ints
+_COUNTER_MASK = const(0x3FFFFFFF)
+
+
+class AllocationAudit:
+    """This class measures the heap allocated by the acquisition and send
+    loop. gc.mem_alloc() is sampled once every `window` frames and the
+    difference is the number of bytes allocated meanwhile, in the steady
+    state it must be 0 for every window. A window during which the GC ran
+    (the difference goes down) cannot be measured, it is counted apart in
+    skipped. Sampling does not allocate, but printing the results does, so
+    read them once the loop is over.
+    """
+
+    def __init__(self, window: int = 1000, tolerance: int = 0):
+        """Start measuring from now.
+
+        :window: Frames per measurement.
+        :tolerance: Bytes a window may move without counting as an
+                    allocation, 0 on the board (the emulator needs some).
+        :returns: None
+
+        """
+        self.window = window
+        self.tolerance = tolerance
+        self.reset()
+
+    def reset(self, frames: int = 0) -> None:
+        """Restart the measurement, e.g. once the loop is warmed up.
+
+        :frames: Current value of the frame counter passed to poll().
+        :returns: None
+
+        """
+        self.windows = 0   # Measured windows
+        self.dirty = 0     # Measured windows that allocated
+        self.skipped = 0   # Windows with a collection, not measured
+        self.last = 0      # Bytes allocated during the last measured window
+        self.worst = 0     # Most bytes allocated during a window
+        self._frames = frames
+        self._alloc = gc.mem_alloc()
+
+    def poll(self, frames: int) -> bool:
+        """Close the current window once `window` frames have been counted.
+
+        :frames: Frames processed so far, e.g. ADS1299.frames_read.
+        :returns: True if a window was closed by this call.
+
+        """
+        if (frames - self._frames) & _COUNTER_MASK < self.window:
+            return False
+
+        alloc = gc.mem_alloc()
+        delta = alloc - self._alloc
+        self._alloc = alloc
+        self._frames = frames
+
+        if delta < -self.tolerance:
+            self.skipped += 1
+            return True
+
+        self.windows += 1
+        self.last = delta
+        if delta > self.tolerance:
+            self.dirty += 1
+            if delta > self.worst:
+                self.worst = delta
+        return True
+
+    def clean(self) -> bool:
+        """Checks that no measured window allocated.
+
+        :returns: True if every measured window was allocation free.
+
+        """
+        return self.dirty == 0
+
+
+class GCScheduler:
+    """This class replaces the periodic gc.collect() of the main loop. A
+    collection only runs once gc.mem_free() drops below low_water, and only
+    right after a frame has been read: no other frame may be pending and the
+    longest collection measured so far must fit before the next DRDY. Below
+    critical it runs at the first frame read regardless of the slack, so the
+    allocator never has to collect on its own at a random point. Collection
+    durations and the worst latency from a DRDY edge to the end of its read
+    are recorded.
+
+    gc.mem_free() walks the whole allocation table (all of SPIRAM when there
+    is some), so the heap is only checked once every check_frames frames; the
+    slack check of a scheduled collection runs after every frame.
+    """
+
+    def __init__(self, period_us: int, low_water: int = 16384, critical: int = 4096, check_frames: int = 32):
+        """
+        :period_us: DRDY period, see ADS1299.sample_period_us().
+        :low_water: Free heap (bytes) below which a collection is scheduled.
+        :critical: Free heap below which it runs without waiting for slack.
+        :check_frames: Frames between two gc.mem_free() checks, low_water
+                       must cover what the loop may allocate meanwhile.
+        :returns: None
+
+        """
+        self.period_us = period_us
+        self.low_water = low_water
+        self.critical = critical
+        self.check_frames = check_frames
+        self._countdown = 0   # Frames until the next heap check
+        self._low = False     # Last check was below low_water, a collection is scheduled
+        self._urgent = False  # Last check was below critical
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        """Restarts the statistics.
+
+        :returns: None
+
+        """
+        self.collections = 0       # Collections run by the scheduler
+        self.forced = 0            # Collections run below critical without enough slack
+        self.last_us = 0           # Duration of the last collection
+        self.worst_us = 0          # Longest collection
+        self.total_ms = 0          # Time spent collecting
+        self._total_rest_us = 0    # Part of it below 1 ms, not in total_ms yet
+        self.worst_latency_us = 0  # Longest time from a DRDY edge to the end of the read of its frame
+
+    def frame(self, drdy_us: int) -> int:
+        """Records the latency of a frame just read, without collecting. The
+        acquisition thread calls it, the telemetry thread calls poll().
+
+        :drdy_us: ticks_us() of the DRDY edge of the frame (ADS1299.timestamp).
+        :returns: Latency of the frame in us.
+
+        """
+        latency = ticks_diff(ticks_us(), drdy_us)
+        if latency > self.worst_latency_us:
+            self.worst_latency_us = latency
+        return latency
+
+    def after_frame(self, drdy_us: int, pending: int) -> bool:
+        """Records the latency of a frame just read and collects if needed.
+
+        :drdy_us: ticks_us() of the DRDY edge of the frame (ADS1299.timestamp).
+        :pending: Frames waiting to be read (ADS1299.data_ready()).
+        :returns: True if a collection ran.
+
+        """
+        self.frame(drdy_us)
+        return self.poll(drdy_us, pending)
+
+    def poll(self, drdy_us: int, pending: int) -> bool:
+        """Collects if the heap is low and there is slack before the next DRDY.
+
+        :drdy_us: ticks_us() of the DRDY edge of the last frame read.
+        :pending: Frames waiting to be read (ADS1299.data_ready()).
+        :returns: True if a collection ran.
+
+        """
+        self._countdown -= 1
+        if self._countdown <= 0:
+            self._countdown = self.check_frames
+            free = gc.mem_free()
+            self._low = free < self.low_water
+            self._urgent = free < self.critical
+        if not self._low:
+            return False
+
+        forced = False
+        if pending or self.period_us - ticks_diff(ticks_us(), drdy_us) < self.worst_us:
+            if not self._urgent:
+                return False
+            forced = True
+
+        start = ticks_us()
+        gc.collect()
+        elapsed = ticks_diff(ticks_us(), start)
+
+        self._low = False
+        self._urgent = False
+        self._countdown = self.check_frames
+
+        self.collections += 1
+        if forced:
+            self.forced += 1
+        self.last_us = elapsed
+        if elapsed > self.worst_us:
+            self.worst_us = elapsed
+        # Accumulated in ms, a us total would wrap after 18 minutes of collections
+        rest = self._total_rest_us + elapsed
+        self.total_ms += rest // 1000
+        self._total_rest_us = rest % 1000
+        return True
+
+    def fill_stats(self, words) -> None:
+        """Writes the statistics in telemetry.STATS_FIELDS order, does not
+        allocate.
+
+        :words: Array of at least telemetry.STATS_WORDS items.
+        :returns: None
+
+        """
+        words[0] = self.collections
+        words[1] = self.forced
+        words[2] = self.last_us
+        words[3] = self.worst_us
+        words[4] = self.total_ms
+        words[5] = self.worst_latency_us
+        words[6] = gc.mem_free()
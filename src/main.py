@@ -1,11 +1,15 @@
 # #! /bin/MicroPython
+import _thread
+import array
 import gc
 import json
 import socket
 import network
-from machine import Pin, SPI, freq
-from utime import sleep_ms, ticks_us
-from ring_buffer import RingBuffer
+from machine import Pin, SPI, freq, idle
+from utime import sleep_ms, ticks_diff, ticks_ms, ticks_us
+from heap import AllocationAudit, GCScheduler
+from ring_buffer import DROP_NEWEST, FrameRingBuffer
+from telemetry import JSON_LINE_MAX, STATS_WORDS, TelemetrySender, format_json_line
 from wlan import do_connect
 from module.ads1299 import ADS1299, make_config1, make_config3
 
@@ -28,11 +32,35 @@ CS_PIN = const(5)
 DRDY_PIN = const(4)
 LED_PIN = const(2)
 
-# Pre-formatted JSON string for maximum speed (bypass json.dumps)
-_JSON_FMT = '{{"Ch0":{},"Ch1":{},"Ch2":{},"Ch3":{},"Ch4":{},"Ch5":{},"Ch6":{},"Ch7":{}}}\n'
+# Telemetry wire format: "binary" (telemetry.py packets) or "json" (legacy text lines)
+TELEMETRY_FORMAT = "binary"
+# Binary packets are flushed when they reach TX_MAX_BYTES or their oldest frame is TX_MAX_AGE_MS old
+TX_MAX_BYTES = 1400
+TX_MAX_AGE_MS = 20
+# What to do when the frame queue is full: DROP_NEWEST, DROP_OLDEST or DECIMATE (see ring_buffer.py)
+# DROP_OLDEST moves the queue tail from the producer, do not use it with the "thread" acquisition mode
+QUEUE_POLICY = DROP_NEWEST
+
+# Acquisition mode: "loop" (DRDY and telemetry serviced by one loop) or "thread" (the ADS1299 read loop runs on its
+# own thread, so a slow send or a GC pass on the telemetry side does not delay it)
+ACQUISITION_MODE = "loop"
+
+# Garbage collection runs right after a frame is read once the free heap drops below GC_LOW_WATER bytes, and even
+# without slack before the next DRDY below GC_CRITICAL. Its stats go out every STATS_PERIOD_MS (binary telemetry)
+GC_LOW_WATER = 16384
+GC_CRITICAL = 4096
+GC_CHECK_FRAMES = 32  # Frames between two gc.mem_free() checks, it walks the whole heap
+STATS_PERIOD_MS = 1000
+
+# Allocation audit: gc.mem_alloc() is sampled every ALLOC_AUDIT_FRAMES frames and the bytes allocated by the
+# acquisition and send loop are reported on exit, every window must be 0
+ALLOC_AUDIT = False
+ALLOC_AUDIT_FRAMES = 1000
 
 # Global flags and objects
-data_ready = False
+acquiring = False
+_drdy_wait = _thread.allocate_lock() # Released by the DRDY callback to wake up the acquisition thread
+_acq_done = _thread.allocate_lock()  # Held while the acquisition thread runs
 cs = Pin(CS_PIN, Pin.OUT, value=True)
 drdy = Pin(DRDY_PIN, Pin.IN, Pin.PULL_UP)
 board_led = Pin(LED_PIN, Pin.OUT)
@@ -41,57 +69,116 @@ board_led = Pin(LED_PIN, Pin.OUT)
 spi = SPI(2, baudrate=16000000, polarity=0, phase=1, bits=8, firstbit=SPI.MSB,
           sck=Pin(18), mosi=Pin(23), miso=Pin(19))
 
-channel_queues = tuple(RingBuffer(256) for _ in range(8))
+frame_queue = FrameRingBuffer(256, policy=QUEUE_POLICY)
+# The period is set from CONFIG1 once the ADS1299 is up
+gc_scheduler = GCScheduler(4000, GC_LOW_WATER, GC_CRITICAL, GC_CHECK_FRAMES)
+_stats = array.array('i', [0] * STATS_WORDS)
 data_payload = {f'Ch{i}': 0 for i in range(8)}
+_tx_frame = array.array('i', [0] * frame_queue.width) # [sequence, timestamp, status, Ch0..Ch7]
+# Legacy JSON lines are formatted in place, one view per line length so sending a whole line does not allocate
+_tx_line = bytearray(JSON_LINE_MAX)
+_tx_lines = [memoryview(_tx_line)[0:n] for n in range(JSON_LINE_MAX + 1)]
+# Legacy JSON line being sent, kept across calls when the socket only takes part of it
+_tx_pending = None
+_tx_offset = 0
+tx_errors = 0
 
 ########################################################################################################################
 #                                                      FUNCTIONS                                                       #
 ########################################################################################################################
 
-def irq_handler(pin: Pin) -> None:
+def wake_acquisition(pin: Pin) -> None:
     """
-    Minimal ISR for DRDY pin.
+    DRDY callback of the "thread" mode, the edge is already counted by the ADS1299 driver.
     """
-    global data_ready
-    data_ready = True
+    if acquiring and _drdy_wait.locked():
+        _drdy_wait.release()
 
 def read_data(ads: ADS1299) -> None:
     """
-    Reads continuous data from ADS1299 and pushes raw integers to queues.
+    Reads continuous data from ADS1299 and pushes the whole frame to the queue, stamped with
+    the DRDY sequence number and time so frames overwritten before being read show up as gaps.
+    """
+    status, channels_data = ads.read_channels_continuous()
+    frame_queue.write_frame(channels_data, (status[0] << 16) | (status[1] << 8) | status[2], ads.timestamp,
+                            ads.sequence)
+
+def acquisition_loop(ads: ADS1299) -> None:
+    """
+    Body of the acquisition thread: sleeps until DRDY and reads the frame, so it does not
+    steal interpreter time from the telemetry thread while waiting.
+    It is the only producer of frame_queue, the telemetry side is the only consumer,
+    so the handoff needs no lock.
+    """
+    try:
+        while True:
+            _drdy_wait.acquire()
+            if not acquiring:
+                break
+            read_data(ads)
+            gc_scheduler.frame(ads.timestamp)
+    finally:
+        _acq_done.release()
+
+def start_acquisition_thread(ads: ADS1299) -> None:
+    """
+    Starts the acquisition thread, DRDY must be already attached with wake_acquisition as callback.
     """
-    _, channels_data = ads.read_channels_continuous()
-    for i in range(8):
-        channel_queues[i].write(channels_data[i])
+    global acquiring
+    _drdy_wait.acquire(0)
+    _acq_done.acquire()
+    acquiring = True
+    _thread.start_new_thread(acquisition_loop, (ads,))
+
+def stop_acquisition_thread() -> None:
+    """
+    Stops the acquisition thread and waits until it leaves the read loop.
+    """
+    global acquiring
+    if not acquiring:
+        return
+    acquiring = False
+    if _drdy_wait.locked():
+        _drdy_wait.release()
+    _acq_done.acquire()
+    _acq_done.release()
 
 def send_data(sock: socket.socket) -> None:
     """
-    Extracts raw samples and sends them via TCP instantly using pre-formatted string.
+    Extracts raw samples and sends them via TCP instantly as a JSON line formatted in place
+    (legacy JSON telemetry, binary telemetry goes through TelemetrySender).
+    Unsent bytes are kept and sent first on the next call, so a line is never cut.
     """
-    while not channel_queues[0].is_empty():
-        try:
-            msg = _JSON_FMT.format(
-                channel_queues[0].read(), channel_queues[1].read(),
-                channel_queues[2].read(), channel_queues[3].read(),
-                channel_queues[4].read(), channel_queues[5].read(),
-                channel_queues[6].read(), channel_queues[7].read()
-            )
-            sock.send(msg.encode('utf-8'))
+    global _tx_pending, _tx_offset, tx_errors
+    frame = _tx_frame
+    while True:
+        if _tx_pending is None:
+            if not frame_queue.read_frames_into(frame, 1):
+                return
+            _tx_pending = _tx_lines[format_json_line(_tx_line, frame)]
+            _tx_offset = 0
 
+        try:
+            # Only the remainder of a partial send is sliced
+            _tx_offset += sock.send(_tx_pending[_tx_offset:] if _tx_offset else _tx_pending) or 0
         except OSError as e:
-            # Handle EAGAIN (WiFi buffer full) without blocking
+            # Handle EAGAIN (WiFi buffer full) without blocking, the line is retried later
             if e.args[0] == 11:
-                break
-            pass
-        except Exception:
-            pass
+                return
+            # Connection error, the line is discarded and the host sees the sequence gap
+            tx_errors += 1
+            _tx_pending = None
+            return
+
+        if _tx_offset < len(_tx_pending):
+            return
+        _tx_pending = None
 
 ########################################################################################################################
 #                                                        MAIN                                                          #
 ########################################################################################################################
 
 def main() -> None:
-    global data_ready
-
     if not do_connect(SSID, PASSWORD, board_led):
         return
 
@@ -113,36 +200,79 @@ def main() -> None:
     except Exception:
         print("Telemetry server unreachable.")
 
+    sender = TelemetrySender(client_sock, max_bytes=TX_MAX_BYTES, max_age_ms=TX_MAX_AGE_MS)
+    binary = TELEMETRY_FORMAT == "binary"
+    threaded = ACQUISITION_MODE == "thread"
+
     # Acquisition Pipeline
     ads.enable_read_continuous()
-    drdy.irq(trigger=Pin.IRQ_FALLING, handler=irq_handler)
+    ads.attach_drdy(drdy, wake_acquisition if threaded else None)
+    if threaded:
+        start_acquisition_thread(ads)
 
     gc.collect()
-    last_gc = ticks_us()
+    gc_scheduler.period_us = ads.sample_period_us()
+    gc_scheduler.reset_stats()
+    last_frames = ads.frames_read
+    last_stats = ticks_ms()
+    audit = AllocationAudit(ALLOC_AUDIT_FRAMES) if ALLOC_AUDIT else None
     ###################################################################################################################
     #                                                       APP                                                       #
     ###################################################################################################################
     try:
         while True:
-            # PRIORITY 1: Fetch hardware data
-            if data_ready:
-                data_ready = False
+            # PRIORITY 1: Fetch hardware data (done by the acquisition thread in "thread" mode)
+            if not threaded and ads.data_ready():
                 read_data(ads)
+                # The next DRDY is furthest away right after a read, that is the only time the GC may run
+                gc_scheduler.after_frame(ads.timestamp, ads.data_ready())
+            elif threaded and ads.frames_read != last_frames:
+                last_frames = ads.frames_read
+                gc_scheduler.poll(ads.timestamp, ads.data_ready())
 
             # PRIORITY 2: Dispatch telemetry
-            send_data(client_sock)
+            if binary:
+                sender.poll(frame_queue)
+            else:
+                send_data(client_sock)
+
+            # Hand the CPU to the acquisition thread while there is nothing to send
+            if threaded and frame_queue.is_empty():
+                idle()
+
+            if audit is not None:
+                audit.poll(ads.frames_read)
 
-            # Maintenance: Periodic GC every 2s
-            now = ticks_us()
-            if ticks_us() - last_gc > 2000000:
-                gc.collect()
-                last_gc = now
+            # Maintenance: GC and latency stats through the telemetry channel
+            if binary and ticks_diff(ticks_ms(), last_stats) >= STATS_PERIOD_MS:
+                last_stats = ticks_ms()
+                gc_scheduler.fill_stats(_stats)
+                sender.send_stats(_stats, frame_queue.sequence, ticks_us())
 
     except KeyboardInterrupt:
         print("Stopping high-speed telemetry...")
+        if binary:
+            bytes_per_s, packets_per_s, frames_per_packet = sender.stats()
+            print("TX: {} B/s, {} packets/s, {}.{:02d} frames/packet".format(
+                bytes_per_s, packets_per_s, frames_per_packet // 100, frames_per_packet % 100))
+            print("TX: {} EAGAIN, {} errors, {} frames lost".format(
+                sender.eagain_count, sender.send_errors, sender.frames_lost))
+        else:
+            print("TX: {} errors".format(tx_errors))
+        print("DRDY: {} edges, {} frames read, {} overruns, worst latency {} us".format(
+            ads.drdy_count, ads.frames_read, ads.overruns, gc_scheduler.worst_latency_us))
+        print("GC: {} collections ({} without slack), last {} us, worst {} us, {} free".format(
+            gc_scheduler.collections, gc_scheduler.forced, gc_scheduler.last_us, gc_scheduler.worst_us,
+            gc.mem_free()))
+        print("Queue: {} frames dropped ({} full, {} decimated), next sequence {}".format(
+            frame_queue.dropped(), frame_queue.overflows, frame_queue.decimated, frame_queue.sequence))
+        if audit is not None:
+            print("Heap: {} windows of {} frames, {} allocated (worst {} B), {} skipped by a collection".format(
+                audit.windows, audit.window, audit.dirty, audit.worst, audit.skipped))
     finally:
+        stop_acquisition_thread()
         ads.disable_read_continuous()
-        drdy.irq(handler=None)
+        ads.detach_drdy(drdy)
         client_sock.close()
 
 if __name__ == "__main__":
@@ -0,0 +1,40 @@
+# #! /bin/MicroPython
+import micropython
+
+
+@micropython.viper
+def uint_to_int(value: int) -> int:
+    """Viper version of ads1299.uint_to_int(), see it for the arguments."""
+    value = value & 0xFFFFFF
+    return (value ^ 0x800000) - 0x800000
+
+
+@micropython.viper
+def decode_frames(raw, n_frames: int, channels, status) -> int:
+    """Viper version of ads1299.decode_frames(), see it for the arguments.
+
+    Sign extension uses (v ^ 0x800000) - 0x800000 instead of shifts so the
+    result does not depend on the machine word size.
+
+    """
+    src = ptr8(raw)  # noqa: F821
+    dst = ptr32(channels)  # noqa: F821
+    st = ptr32(status)  # noqa: F821
+    pos = 0
+    out = 0
+    frame = 0
+
+    while frame < n_frames:
+        st[frame] = (src[pos] << 16) | (src[pos + 1] << 8) | src[pos + 2]
+        pos += 3
+
+        end = out + 8
+        while out < end:
+            value = (src[pos] << 16) | (src[pos + 1] << 8) | src[pos + 2]
+            dst[out] = (value ^ 0x800000) - 0x800000
+            pos += 3
+            out += 1
+
+        frame += 1
+
+    return n_frames
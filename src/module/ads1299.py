@@ -2,16 +2,38 @@
 import array
 
 from machine import SPI, Pin
-from micropython import const
-from utime import sleep_ms, sleep_us
+from micropython import const, schedule
+from utime import sleep_ms, sleep_us, ticks_us
 
 _LIMIT = const(1 << 24)
 _SIGN_BIT = const(1 << 23)
 _24B_MASK = const(0xFFFFFF)
 
-def uint_to_int(value: int ) -> int:
+# 3 status bytes + 8 channels * 3 bytes
+FRAME_SIZE = const(27)
+NUM_CHANNELS = const(8)
+
+# DRDY and frame counters wrap like ticks_us() so the hard ISR never allocates a long int
+COUNTER_MASK = const(0x3FFFFFFF)
+
+NUM_REGISTERS = const(24)
+
+# Interface timing in master clock periods (tCLK = 1 / fCLK), the internal oscillator runs at 2.048 MHz
+F_CLK = const(2048000)
+_SDECODE_TCLK = const(4)  # tSDECODE, between the starts of two bytes of a multi-byte command
+_SCCS_TCLK = const(4)     # tSCCS, from the last SCLK to CS high, it also covers the decode of the last byte
+_CSH_TCLK = const(2)      # tCSH, CS high between transactions
+_RESET_TCLK = const(18)   # From the RESET command to the next command
+
+# Register cache: ID, LOFF_STATP and LOFF_STATN are read-only, the lead-off status and the GPIO input bits change
+# on their own
+_READ_ONLY_MASK = const((1 << 0x00) | (1 << 0x12) | (1 << 0x13))
+_VOLATILE_MASK = const((1 << 0x12) | (1 << 0x13) | (1 << 0x14))
+_WRITABLE_MASK = const(((1 << NUM_REGISTERS) - 1) & ~_READ_ONLY_MASK)
+
+def _uint_to_int_py(value: int ) -> int:
     """This funciton converts an unsigned integer to a signed integer default it uses 24 bits refer to ads1299
-       datasheet for more info.
+       datasheet for more info. Pure bytecode version, see _frames_viper.py.
 
     :value: Number to is going to be converted.
     :returns: Number converted to signed integer.
@@ -27,6 +49,47 @@ def uint_to_int(value: int ) -> int:
     return value
 
 
+def _decode_frames_py(raw, n_frames: int, channels: array.array, status: array.array) -> int:
+    """This function decodes a block of concatenated 27-byte frames in one call,
+       it is the pure bytecode version used when the viper emitter is not
+       available, see _frames_viper.py.
+
+    :raw: bytearray/memoryview holding at least n_frames * FRAME_SIZE bytes.
+    :n_frames: Number of frames to be decoded.
+    :channels: Preallocated array('i') of at least n_frames * 8 items, samples
+               are stored interleaved (frame 0 ch 0..7, frame 1 ch 0..7, ...).
+    :status: Preallocated array('i') of at least n_frames items, it receives
+             the 24-bit status word of each frame.
+    :returns: Number of decoded frames.
+
+    """
+    # raw is indexed directly, wrapping it in a memoryview would allocate on every call
+    pos = 0
+    out = 0
+
+    for frame in range(n_frames):
+        status[frame] = (raw[pos] << 16) | (raw[pos + 1] << 8) | raw[pos + 2]
+        pos += 3
+
+        for _ in range(NUM_CHANNELS):
+            value = (raw[pos] << 16) | (raw[pos + 1] << 8) | raw[pos + 2]
+            channels[out] = value - _LIMIT if value & _SIGN_BIT else value
+            pos += 3
+            out += 1
+
+    return n_frames
+
+
+# The viper versions are used when the port has the native emitter, ACCELERATED tells which ones were loaded
+try:
+    from ._frames_viper import decode_frames, uint_to_int
+    ACCELERATED = True
+except (ImportError, SyntaxError, AttributeError):
+    decode_frames = _decode_frames_py
+    uint_to_int = _uint_to_int_py
+    ACCELERATED = False
+
+
 class ADS1299:
     """ This class is used to control the ADS1299, the parame that need is the
     spi channel and chip select pin.
@@ -151,14 +214,74 @@ class ADS1299:
     BIAS_DRN = const(0b111)  # Negative electrode is the driver
     """"""
 
-    def __init__(self, cs: Pin, spi_channel: SPI) -> None:
+    def __init__(self, cs: Pin, spi_channel: SPI, baudrate: int = 16000000, register_baudrate: int = 4000000,
+                 byte_by_byte: bool = False, f_clk: int = F_CLK) -> None:
+        """
+        :cs: Chip select pin of the device.
+        :spi_channel: SPI bus configured with CPOL = 0 and CPHA = 1.
+        :baudrate: SCLK frequency spi_channel was configured with, the
+                   interface timing is derived from it and from f_clk.
+        :register_baudrate: When baudrate is too fast to meet tSDECODE between
+                            the bytes of WREG/RREG, the bus is switched to this
+                            frequency during register transactions so each one
+                            is clocked in a single transfer. With 0 the bus
+                            speed is kept and the bytes are spaced instead.
+        :byte_by_byte: Compatibility flag, use the original register path
+                       (one transfer and one bytearray per byte).
+        :f_clk: Master clock frequency (Hz), 2.048 MHz for the internal
+                oscillator or the frequency of the external CLK.
+
+        """
         self.cs = cs
         self.spi_channel = spi_channel
+        self.byte_by_byte = byte_by_byte
+        self._set_timing(baudrate, register_baudrate, f_clk)
+        self._cmd = bytearray(1)
+
+        # WREG/RREG transactions [opcode, n - 1, data...] are built and clocked from these buffers
+        self._reg_tx = bytearray(2 + NUM_REGISTERS)
+        self._reg_rx = bytearray(2 + NUM_REGISTERS)
+        # Slicing a memoryview allocates, so every transaction length and byte slot is created once here
+        tx_view = memoryview(self._reg_tx)
+        rx_view = memoryview(self._reg_rx)
+        self._reg_tx_slices = [tx_view[:n] for n in range(len(self._reg_tx) + 1)]
+        self._reg_rx_slices = [rx_view[:n] for n in range(len(self._reg_rx) + 1)]
+        self._reg_tx_bytes = [tx_view[i:i + 1] for i in range(len(self._reg_tx))]
+        self._reg_rx_bytes = [rx_view[i:i + 1] for i in range(len(self._reg_rx))]
+
+        # Shadow copy of the register map, bit n of _dirty set = register n staged but not written yet
+        self._shadow = bytearray(NUM_REGISTERS)
+        self._shadow_valid = False
+        self._dirty = 0
+
         # @HACK: This avoid create multiple bytearrays from repeated bytearray allocations during data rx
-        self._data_rx = bytearray(27)
+        self.frame_size = FRAME_SIZE
+        self._data_rx = bytearray(FRAME_SIZE)
         self._status_arr = array.array('B', [0] * 3)
         self._channels_arr = array.array('i', [0] * 8)
+        self._status_word = array.array('i', [0])
+        # Returned by every read, the arrays are refilled in place so no tuple is built per frame
+        self._frame = (self._status_arr, self._channels_arr)
+
+        self._drdy_callback = None
+        self.reset_counters()
+
+    def _decode_rx(self) -> tuple[array.array, array.array]:
+        """Decodes the frame held in self._data_rx into the preallocated status
+        and channel arrays.
 
+        :returns: A tuple containing a list of 3 status bytes and a list of 8 channel samples.
+
+        """
+        decode_frames(self._data_rx, 1, self._channels_arr, self._status_word)
+
+        # Status (bytes 0, 1, 2)
+        status_arr = self._status_arr
+        status_arr[0] = self._data_rx[0]
+        status_arr[1] = self._data_rx[1]
+        status_arr[2] = self._data_rx[2]
+
+        return self._frame
 
     def init(self, config1: int = 0x96, config2: int = 0xC0, config3: int = 0x60) -> None:
         """This method initializes the ADS1299, with 250 S/s, use internal
@@ -181,29 +304,39 @@ class ADS1299:
         self.send_command(ADS1299.SDATAC)
         self.send_command(ADS1299.SDATAC)
         self.send_command(ADS1299.STOP)
+        # The reset restored the whole map, read it once so the register cache starts in sync
+        self.sync()
         # Set reference
-        self.write_reg(ADS1299.CONFIG3, config3)
+        self.stage_reg(ADS1299.CONFIG3, config3)
+        self.commit()
         # Wait for reference stabilization if internal buffer is enabled (bit 7)
         if config3 & 0x80:
             sleep_ms(150)
         # Set other cofing registers, sample rate & test signals
-        self.write_registers(ADS1299.CONFIG1, [config1, config2])
+        self.stage_registers(ADS1299.CONFIG1, [config1, config2])
+        self.commit()
         sleep_ms(4)
         pass
 
     def send_command(self, command: int) -> None:
-        """Send a unique command trowgh SPI channel.
+        """Send a unique command trowgh SPI channel. RESET restores the
+        default register map, so the register cache has to be synced again.
 
         :command: Command extractd from the data sheet to control ADS1299.
         :returns: None
 
         """
+        if command == ADS1299.RESET:
+            self._shadow_valid = False
+            self._dirty = 0
+        cmd = self._cmd
+        cmd[0] = command
         self.cs.off()
-        self.spi_channel.write(bytearray([command]))
-        sleep_us(4)  # Wait to execute command (tSCCS )
+        self.spi_channel.write(cmd)
+        sleep_us(self._sccs_us)  # tSCCS, the command is decoded meanwhile
         self.cs.on()
-        sleep_us(4)  # Wait to next command (tSDECODE)
-        pass
+        # tCSH before the next transaction, RESET needs 18 tCLK before the next command
+        sleep_us(self._reset_us if command == ADS1299.RESET else self._csh_us)
 
     def write_reg(self, register: int, data_to_write: int) -> None:
         """This method write data to a single register.
@@ -218,7 +351,9 @@ class ADS1299:
         pass
 
     def write_registers(self, starting_register: int, data_to_write: list[int] = []) -> None:
-        """This method write data to multiple registers one by one.
+        """This method write data to multiple registers in a single WREG
+        transaction, the values are always sent (see stage_registers() and
+        commit() to send only the changes) and the register cache is updated.
 
         :starting_register: Register to be reading from.
         :data_to_write: A list that contains the data to be written.
@@ -230,25 +365,11 @@ class ADS1299:
         if nregs == 0:
             return  # Do nothing
 
-        self.cs.off()
-        # Send first byte [ WREG + Addr ]
-        self.spi_channel.write(bytearray([ADS1299.WREG | starting_register]))
-        sleep_us(4)  # Wait to next command (tSDECODE)
-
-        # Send second byte number of registers [ n - 1 ]
-        self.spi_channel.write(bytearray([nregs - 1]))
-        sleep_us(4)  # Wait to next command (tSDECODE)
-
-        # Send data one by one
-        for value in data_to_write:
-            self.spi_channel.write(bytearray([value]))
-            sleep_us(2)  # Gap between data bytes
-
-        sleep_us(4)  # Wait to execute command (tSCCS )
-        self.cs.on()
-        sleep_us(4)
-
-        pass
+        shadow = self._shadow
+        for i in range(nregs):
+            if not (_READ_ONLY_MASK >> (starting_register + i)) & 1:
+                shadow[starting_register + i] = data_to_write[i]
+        self._write_shadow(starting_register, nregs)
 
     def read_reg(self, register: int) -> int | None:
         """This method read a single register.
@@ -265,13 +386,274 @@ class ADS1299:
         return reg_data[0]
 
     def read_registers(self, starting_register: int, number_of_registers: int) -> list[int]:
-        """This method read data from multiple registers one by one.
+        """This method read data from multiple registers. Once the register
+        cache is in sync (after init() or sync()) configuration registers are
+        served from it, ranges including LOFF_STATP/N are read over SPI in a
+        single RREG transaction.
 
         :starting_register: Register to be reading from.
         :number_of_registers: Number of registers to be read.
         :returns: A list with the value of each register.
 
         """
+        mask = ((1 << number_of_registers) - 1) << starting_register
+        if self._shadow_valid and not mask & _VOLATILE_MASK:
+            return list(self._shadow[starting_register:starting_register + number_of_registers])
+
+        registers_list = self._read_registers_spi(starting_register, number_of_registers)
+
+        # Refresh the cache with what the device holds, staged values are kept until commit()
+        if self._shadow_valid:
+            shadow = self._shadow
+            for i in range(number_of_registers):
+                if not (self._dirty >> (starting_register + i)) & 1:
+                    shadow[starting_register + i] = registers_list[i]
+        return registers_list
+
+    def _read_registers_spi(self, starting_register: int, number_of_registers: int) -> list[int]:
+        if self.byte_by_byte:
+            return self._read_registers_byte_by_byte(starting_register, number_of_registers)
+
+        tx = self._reg_tx
+        tx[0] = ADS1299.RREG | starting_register
+        tx[1] = number_of_registers - 1
+        for i in range(number_of_registers):
+            tx[2 + i] = 0x00
+
+        self._register_transaction(2 + number_of_registers, True)
+
+        return list(self._reg_rx_slices[2 + number_of_registers][2:])
+
+    def _write_shadow(self, starting_register: int, number_of_registers: int) -> None:
+        # Sends the cached value of number_of_registers registers in one WREG transaction
+        shadow = self._shadow
+        if self.byte_by_byte:
+            self._write_registers_byte_by_byte(starting_register,
+                                               shadow[starting_register:starting_register + number_of_registers])
+        else:
+            tx = self._reg_tx
+            tx[0] = ADS1299.WREG | starting_register
+            tx[1] = number_of_registers - 1
+            for i in range(number_of_registers):
+                tx[2 + i] = shadow[starting_register + i]
+
+            self._register_transaction(2 + number_of_registers, False)
+
+        self._dirty &= ~(((1 << number_of_registers) - 1) << starting_register)
+
+    def sync(self) -> None:
+        """Reads the whole register map from the device into the register
+        cache and drops the staged changes.
+
+        :returns: None
+
+        """
+        self._shadow[:] = bytes(self._read_registers_spi(0, NUM_REGISTERS))
+        self._shadow_valid = True
+        self._dirty = 0
+
+    def stage_reg(self, register: int, value: int) -> None:
+        """Stores the value of a register in the cache, it is written by the
+        next commit() only if it differs from the current one.
+
+        :register: Register to be staged.
+        :value: New value of the register.
+        :returns: None
+
+        """
+        if not self._shadow_valid:
+            self.sync()
+        if (_READ_ONLY_MASK >> register) & 1 or self._shadow[register] == value:
+            return
+        self._shadow[register] = value
+        self._dirty |= 1 << register
+
+    def stage_registers(self, starting_register: int, values: list[int]) -> None:
+        """Stages several consecutive registers, see stage_reg().
+
+        :starting_register: First register to be staged.
+        :values: A list with the new value of each register.
+        :returns: None
+
+        """
+        for i in range(len(values)):
+            self.stage_reg(starting_register + i, values[i])
+
+    def commit(self) -> int:
+        """Writes the staged registers that changed, one WREG transaction per
+        contiguous run. Continuous read mode must be disabled.
+
+        :returns: Number of registers written.
+
+        """
+        dirty = self._dirty & ~_READ_ONLY_MASK
+        written = 0
+        register = 0
+        while dirty >> register:
+            if not (dirty >> register) & 1:
+                register += 1
+                continue
+
+            start = register
+            while (dirty >> register) & 1:
+                register += 1
+            self._write_shadow(start, register - start)
+            written += register - start
+
+        self._dirty = 0
+        return written
+
+    def verify(self) -> list[tuple[int, int, int]]:
+        """Re-reads the whole register map over SPI and compares it with the
+        cache. Divergent configuration registers are marked as staged, so a
+        following commit() writes the cached values again. If the cache was
+        never synced there is nothing to compare, it is synced instead.
+
+        :returns: A list of (register, cached value, device value) for every
+                  register that diverges, empty if the device is in sync.
+
+        """
+        if not self._shadow_valid:
+            self.sync()
+            return []
+
+        actual = self._read_registers_spi(0, NUM_REGISTERS)
+        shadow = self._shadow
+        divergent = []
+
+        for register in range(NUM_REGISTERS):
+            if (_VOLATILE_MASK >> register) & 1:
+                shadow[register] = actual[register]
+            elif (self._dirty >> register) & 1:
+                continue  # Not written yet
+            elif actual[register] != shadow[register]:
+                divergent.append((register, shadow[register], actual[register]))
+                if (_READ_ONLY_MASK >> register) & 1:
+                    shadow[register] = actual[register]
+                else:
+                    self._dirty |= 1 << register
+
+        return divergent
+
+    def set_channel_gain(self, channel: int, gain: int) -> None:
+        """Changes the PGA gain of a single channel, only its CHnSET register
+        is written and only if the gain is different.
+
+        :channel: Channel index, 0 (CH1SET) to 7 (CH8SET).
+        :gain: GAIN_1 to GAIN_24, see config_all_channels().
+        :returns: None
+
+        """
+        register = ADS1299.CH1SET + channel
+        if not self._shadow_valid:
+            self.sync()
+        self.stage_reg(register, (self._shadow[register] & 0x8F) | (gain << 4))
+        self.commit()
+
+    def apply_profile(self, image: bytes, diff: bool = True) -> int:
+        """Configures the whole device from a register image, see
+        module/profiles.py. Continuous read mode must be disabled.
+
+        :image: NUM_REGISTERS bytes indexed by register address, the read-only
+                registers (ID, LOFF_STATP/N) are ignored.
+        :diff: True writes only the registers that differ from the cache, for
+               switching profiles at runtime. False writes every configuration
+               register, two WREG transactions around LOFF_STATP/N.
+        :returns: Number of registers written.
+
+        """
+        refbuf_was_on = self._shadow_valid and self._shadow[ADS1299.CONFIG3] & 0x80
+        config1_changed = not self._shadow_valid or self._shadow[ADS1299.CONFIG1] != image[ADS1299.CONFIG1]
+        self.stage_registers(0, image)
+        if not diff:
+            self._dirty = _WRITABLE_MASK
+        written = self.commit()
+
+        # Same settling waits as init(), after a new CONFIG1 and for the reference
+        if config1_changed:
+            sleep_ms(4)
+        if image[ADS1299.CONFIG3] & 0x80 and not refbuf_was_on:
+            sleep_ms(150)
+        return written
+
+    def _set_timing(self, baudrate: int, register_baudrate: int, f_clk: int) -> None:
+        # Minimum waits of the datasheet for this fCLK, rounded up to whole us as sleep_us() needs
+        self.baudrate = baudrate
+        self.f_clk = f_clk
+        khz = f_clk // 1000
+        self._sccs_us = (_SCCS_TCLK * 1000 + khz - 1) // khz
+        self._csh_us = (_CSH_TCLK * 1000 + khz - 1) // khz
+        self._reset_us = (_RESET_TCLK * 1000 + khz - 1) // khz
+
+        # Every byte of a multi-byte command must start at least tSDECODE after the previous one,
+        # there is nothing to wait when the byte time already covers it
+        t_sdecode_ns = (_SDECODE_TCLK * 1000000 + khz - 1) // khz
+        gap_ns = t_sdecode_ns - 8000000 // (baudrate // 1000)
+        self._decode_gap_us = (gap_ns + 999) // 1000 if gap_ns > 0 else 0
+
+        self._reg_baudrate = 0
+        self._reg_gap_us = 0
+        if not self._decode_gap_us:
+            return
+
+        if register_baudrate:
+            if 8000000 // (register_baudrate // 1000) < t_sdecode_ns:
+                raise ValueError("register_baudrate too fast for tSDECODE")
+            self._reg_baudrate = register_baudrate
+        else:
+            self._reg_gap_us = self._decode_gap_us
+
+    def _register_transaction(self, n_bytes: int, read: bool) -> None:
+        # Clocks the first n_bytes of self._reg_tx, MISO goes to self._reg_rx when read is True
+        spi = self.spi_channel
+        reg_baudrate = self._reg_baudrate
+        if reg_baudrate:
+            spi.init(baudrate=reg_baudrate)
+
+        self.cs.off()
+        gap_us = self._reg_gap_us
+        if gap_us:
+            tx_bytes = self._reg_tx_bytes
+            rx_bytes = self._reg_rx_bytes
+            for i in range(n_bytes):
+                if read:
+                    spi.write_readinto(tx_bytes[i], rx_bytes[i])
+                else:
+                    spi.write(tx_bytes[i])
+                sleep_us(gap_us)
+        elif read:
+            spi.write_readinto(self._reg_tx_slices[n_bytes], self._reg_rx_slices[n_bytes])
+        else:
+            spi.write(self._reg_tx_slices[n_bytes])
+        sleep_us(self._sccs_us)
+        self.cs.on()
+
+        if reg_baudrate:
+            spi.init(baudrate=self.baudrate)
+        sleep_us(self._csh_us)
+
+    def _write_registers_byte_by_byte(self, starting_register: int, data_to_write: list[int]) -> None:
+        nregs = len(data_to_write)
+
+        self.cs.off()
+        # Send first byte [ WREG + Addr ]
+        self.spi_channel.write(bytearray([ADS1299.WREG | starting_register]))
+        sleep_us(4)  # Wait to next command (tSDECODE)
+
+        # Send second byte number of registers [ n - 1 ]
+        self.spi_channel.write(bytearray([nregs - 1]))
+        sleep_us(4)  # Wait to next command (tSDECODE)
+
+        # Send data one by one
+        for value in data_to_write:
+            self.spi_channel.write(bytearray([value]))
+            sleep_us(2)  # Gap between data bytes
+
+        sleep_us(4)  # Wait to execute command (tSCCS )
+        self.cs.on()
+        sleep_us(4)
+
+    def _read_registers_byte_by_byte(self, starting_register: int, number_of_registers: int) -> list[int]:
         registers_list = []
 
         self.cs.off()
@@ -295,15 +677,20 @@ class ADS1299:
 
     def read_all_registers(self) -> list[int]:
         """This method read all the register values from the starting of the
-        ADS1299
+        ADS1299. Only LOFF_STATP/N are read over SPI, the rest comes from the
+        register cache (staged values included), use verify() to check it
+        against the device.
 
         :returns: A list with the value of all registers of ADS1299.
 
         """
+        if not self._shadow_valid:
+            self.sync()
+        else:
+            # The lead-off status and the GPIO inputs are the only part of the map that changes on its own
+            self.read_registers(ADS1299.LOFF_STATP, 3)
 
-        registers_list = self.read_registers(0, 24)
-
-        return registers_list
+        return list(self._shadow)
 
     def config_all_channels(self, channels_active: int = 8, gain: int = GAIN_24, srb2_connection: bool = False,
                             channel_input: int = SHORTED) -> None:
@@ -348,7 +735,9 @@ class ADS1299:
 
         # 3. Create a list with both configs and send it
         config_buffer = ([chnset_active] * channels_active) + ([chnset_inactive] * (8 - channels_active))
-        self.write_registers(ADS1299.CH1SET, config_buffer)
+        # Only the CHnSET registers that change are written
+        self.stage_registers(ADS1299.CH1SET, config_buffer)
+        self.commit()
 
         pass
 
@@ -358,29 +747,22 @@ class ADS1299:
         :return: A tuple containing a list of 3 status bytes and a list of 8 channel samples.
 
         """
+        drdy_us = self.drdy_us
+        drdy_count = self.drdy_count
+        cmd = self._cmd
+        cmd[0] = ADS1299.RDATA
         self.cs.off()
-        self.spi_channel.write(bytearray([ADS1299.RDATA]))
-
-        sleep_us(4)  # Wait to next command (tSDECODE)
+        self.spi_channel.write(cmd)
+        if self._decode_gap_us:
+            sleep_us(self._decode_gap_us)  # Rest of tSDECODE not covered by the opcode byte time
 
         # Write on self.data_rx pre-assigned to avoid create multiple objects
         self.spi_channel.readinto(self._data_rx, 0x00)
-        sleep_us(4)  # Wait to execute command (tSCCS)
+        sleep_us(self._sccs_us)
         self.cs.on()
 
-        mem_view = memoryview(self._data_rx)
-
-        # Status (bytes 0, 1, 2)
-        for i in range(3):
-            self._status_arr[i] = mem_view[i]
-
-        # Channesl data (bytes 3-26)
-        for i in range(8):
-            start = 3 + i * 3
-            raw_value = (mem_view[start] << 16) | (mem_view[start + 1] << 8) | mem_view[start + 2]
-            self._channels_arr[i] = uint_to_int(raw_value)
-
-        return self._status_arr, self._channels_arr
+        self._count_frame(drdy_count, drdy_us)
+        return self._decode_rx()
 
 
     def enable_read_continuous(self) -> None:
@@ -389,13 +771,9 @@ class ADS1299:
         :returns: None
 
         """
+        # send_command() already waits tSCCS + tCSH, RDATAC is decoded before the next transaction
         self.send_command(ADS1299.START)
         self.send_command(ADS1299.RDATAC)
-        # This delay is calculated from the datasheet correponding to
-        # 4 t CLK cycles this is 1.96us, but looks like does not work with 2us
-        sleep_us(2)
-
-        pass
 
     def read_channels_continuous(self) -> tuple[array.array, array.array]:
         """This method continuously reads the data from all channels affter enable continuous read.
@@ -403,23 +781,16 @@ class ADS1299:
         in continuous mode.
 
         """
+        # Snapshot before the transfer, an edge arriving meanwhile belongs to the next frame
+        drdy_us = self.drdy_us
+        drdy_count = self.drdy_count
         self.cs.off()
         self.spi_channel.readinto(self._data_rx, 0x00)
-        sleep_us(4)  # Wait to execute command (tSCCS)
+        sleep_us(self._sccs_us)
         self.cs.on()
 
-        mem_view = memoryview(self._data_rx)
-        # Status (bytes 0, 1, 2)
-        for i in range(3):
-            self._status_arr[i] = mem_view[i]
-
-        # Canales (bytes 3-26)
-        for i in range(8):
-            start = 3 + i * 3
-            raw_value = (mem_view[start] << 16) | (mem_view[start + 1] << 8) | mem_view[start + 2]
-            self._channels_arr[i] = uint_to_int(raw_value)
-
-        return self._status_arr, self._channels_arr
+        self._count_frame(drdy_count, drdy_us)
+        return self._decode_rx()
 
 
     def disable_read_continuous(self) -> None:
@@ -431,6 +802,479 @@ class ADS1299:
         self.send_command(ADS1299.STOP)
         pass
 
+    def reset_counters(self) -> None:
+        """Restarts the DRDY and frame counters.
+
+        :returns: None
+
+        """
+        self.drdy_count = 0   # DRDY edges counted by the ISR
+        self.drdy_us = 0      # ticks_us() of the last DRDY edge
+        self.frames_read = 0  # Frames read with read_channels_continuous() or read_channels_once()
+        self.overruns = 0     # Frames overwritten by the next conversion before being read
+        self.sequence = -1    # Sequence number of the last frame read
+        self.timestamp = 0    # ticks_us() of the DRDY edge of the last frame read
+        self._serviced = 0    # drdy_count when the last frame was read
+
+    def attach_drdy(self, drdy: Pin, callback=None) -> None:
+        """Counts every DRDY falling edge and timestamps it, so each frame read
+        afterwards gets the sequence number of its conversion and the edges
+        that were never followed by a read are reported as overruns.
+
+        :drdy: DRDY pin of the device.
+        :callback: Optional callable(pin) run by the ISR after counting the
+                   edge. Without it the ISR is hard (no allocation, lowest
+                   latency), with it the ISR is soft so the callback may use
+                   locks or allocate.
+        :returns: None
+
+        """
+        self.reset_counters()
+        self._drdy_callback = callback
+        drdy.irq(trigger=Pin.IRQ_FALLING, handler=self._drdy_irq, hard=callback is None)
+
+    def detach_drdy(self, drdy: Pin) -> None:
+        """Stops counting DRDY edges, the counters keep their values.
+
+        :drdy: DRDY pin of the device.
+        :returns: None
+
+        """
+        drdy.irq(handler=None)
+        self._drdy_callback = None
+
+    def sample_period_us(self) -> int:
+        """Time between two conversions for the data rate of CONFIG1 in the
+        register cache (call it after init()) and the master clock.
+
+        :returns: DRDY period in us, rounded down.
+
+        """
+        data_rate = self._shadow[ADS1299.CONFIG1] & 0x07
+        return (128 << data_rate) * 1000 // (self.f_clk // 1000)
+
+    def data_ready(self) -> int:
+        """Number of DRDY edges since the last read, replaces the data_ready
+        flag of the DRDY callbacks. More than 1 means that frames were
+        overwritten and will be counted as overruns by the next read.
+
+        :returns: Pending DRDY edges, 0 if there is no new frame.
+
+        """
+        return (self.drdy_count - self._serviced) & COUNTER_MASK
+
+    def _drdy_irq(self, pin: Pin) -> None:
+        # Hard ISR: small int arithmetic only
+        self.drdy_count = (self.drdy_count + 1) & COUNTER_MASK
+        self.drdy_us = ticks_us()
+        callback = self._drdy_callback
+        if callback is not None:
+            callback(pin)
+
+    def _count_frame(self, drdy_count: int, drdy_us: int) -> None:
+        new_edges = (drdy_count - self._serviced) & COUNTER_MASK
+        if new_edges:
+            self.overruns += new_edges - 1
+            self._serviced = drdy_count
+            self.sequence = (drdy_count - 1) & COUNTER_MASK
+            self.timestamp = drdy_us
+        else:
+            # DRDY is not being counted (polled or no ISR attached), frames are numbered as they are read
+            self.sequence = (self.sequence + 1) & COUNTER_MASK
+            self.timestamp = ticks_us()
+        self.frames_read = (self.frames_read + 1) & COUNTER_MASK
+
+    def read_frame_into(self, frame_buf) -> None:
+        """Reads one raw frame in continuous mode without decoding it.
+
+        :frame_buf: bytearray or memoryview of frame_size bytes where the
+                    status word and channel data are written as received.
+        :returns: None
+
+        """
+        self.cs.off()
+        self.spi_channel.readinto(frame_buf, 0x00)
+        sleep_us(self._sccs_us)
+        self.cs.on()
+
+    def init_burst(self, frames_per_block: int, blocks: int = 2) -> None:
+        """Preallocates the blocks used by the burst acquisition mode. Each
+        block holds frames_per_block raw frames back to back, with more than
+        one block the next one is filled while the consumer handles the last.
+
+        :frames_per_block: Number of frames (K) captured before a block is
+                           handed to the consumer.
+        :blocks: Number of blocks in rotation.
+        :returns: None
+
+        """
+        frame_size = self.frame_size
+        self._burst_frames = frames_per_block
+        self._burst_blocks = [bytearray(frames_per_block * frame_size) for _ in range(blocks)]
+        # Slicing a memoryview allocates, so every frame slot is created once here
+        self._burst_slots = [
+            [memoryview(block)[i * frame_size:(i + 1) * frame_size] for i in range(frames_per_block)]
+            for block in self._burst_blocks
+        ]
+        self._burst_block = 0
+        self._burst_index = 0
+        self._burst_consumer = None
+        self._burst_running = False
+        self._burst_service_ref = self._burst_service
+        self.burst_drdy_count = 0
+        self.burst_frames_read = 0
+        self.burst_overruns = 0
+
+    def read_block(self, drdy: Pin, block: int = 0) -> bytearray:
+        """Captures a whole block in a tight loop, polling DRDY and reading
+        each frame straight into its slot. Nothing is decoded.
+
+        :drdy: DRDY pin of the device, continuous mode must be enabled.
+        :block: Index of the preallocated block to be filled.
+        :returns: The filled block of frames_per_block * frame_size bytes.
+
+        """
+        slots = self._burst_slots[block]
+        drdy_value = drdy.value
+        read_frame_into = self.read_frame_into
+
+        for slot in slots:
+            while drdy_value():
+                pass
+            read_frame_into(slot)
+
+        self.burst_frames_read += self._burst_frames
+        return self._burst_blocks[block]
+
+    def start_burst(self, drdy: Pin, consumer) -> None:
+        """Starts the interrupt driven burst mode. The DRDY ISR only counts the
+        edge and schedules the read, frames are accumulated in the current
+        block and consumer(block) is called once it is full.
+
+        The ESP32 SPI driver cannot run in a hard ISR, so every frame still
+        costs one scheduled Python callback, only the decode and the consumer
+        are deferred to the full block. That callback bounds the rate: on the
+        host emulator this mode sustains 1 kSPS without drops (2 kSPS drops a
+        few frames), run bench_burst for the board. Above it use read_block(),
+        which keeps the CPU in a polling loop for the whole block.
+
+        :drdy: DRDY pin of the device, continuous mode must be enabled.
+        :consumer: Callable receiving each full block (bytearray).
+        :returns: None
+
+        """
+        self._burst_block = 0
+        self._burst_index = 0
+        self._burst_consumer = consumer
+        self._burst_running = True
+        drdy.irq(trigger=Pin.IRQ_FALLING, handler=self._burst_irq, hard=True)
+
+    def stop_burst(self, drdy: Pin) -> int:
+        """Stops the interrupt driven burst mode. Reads already scheduled by
+        the ISR are discarded, the bus is free for SDATAC or register access
+        as soon as this returns.
+
+        :drdy: DRDY pin of the device.
+        :returns: Number of frames of the partially filled block, they are
+                  kept in the current block and are not handed to the consumer.
+
+        """
+        drdy.irq(handler=None)
+        self._burst_running = False
+        self._burst_consumer = None
+        return self._burst_index
+
+    def _burst_irq(self, pin: Pin) -> None:
+        # Hard ISR: no allocation allowed, the SPI read runs in the scheduler
+        self.burst_drdy_count += 1
+        try:
+            schedule(self._burst_service_ref, 0)
+        except RuntimeError:
+            self.burst_overruns += 1  # Schedule queue full, this frame is lost
+
+    def _burst_service(self, _) -> None:
+        if not self._burst_running:
+            return  # Scheduled before stop_burst(), the bus may be in use
+        block = self._burst_block
+        index = self._burst_index
+
+        self.read_frame_into(self._burst_slots[block][index])
+        self.burst_frames_read += 1
+        index += 1
+
+        if index < self._burst_frames:
+            self._burst_index = index
+            return
+
+        self._burst_index = 0
+        self._burst_block = (block + 1) % len(self._burst_blocks)
+        consumer = self._burst_consumer
+        if consumer is not None:
+            consumer(self._burst_blocks[block])
+
+
+class ADS1299Chain(ADS1299):
+    """ This class controls several ADS1299 in daisy-chain mode as a single
+    device of 8 x devices channels. The devices share CS, SCLK, DIN, START and
+    the master clock, DOUT of each device is wired to DAISY_IN of the previous
+    one and only the DRDY of the first device is used.
+
+    Commands and register writes reach every device at once, so the chain is
+    configured like a single ADS1299 and all the devices get the same
+    registers. Register reads return the registers of the first device.
+
+    """
+
+    def __init__(self, cs: Pin, spi_channel: SPI, devices: int = 2, baudrate: int = 16000000,
+                 register_baudrate: int = 4000000, byte_by_byte: bool = False, f_clk: int = F_CLK) -> None:
+        """
+        :cs: Chip select pin shared by all the devices.
+        :spi_channel: SPI bus configured with CPOL = 0 and CPHA = 1, MISO is
+                      the DOUT of the first device.
+        :devices: Number of devices in the chain.
+        :baudrate: See ADS1299.
+        :register_baudrate: See ADS1299.
+        :byte_by_byte: See ADS1299.
+        :f_clk: See ADS1299.
+
+        """
+        super().__init__(cs, spi_channel, baudrate, register_baudrate, byte_by_byte, f_clk)
+        self.devices = devices
+
+        # The frames of the whole chain are clocked out back to back in one CS-low transaction, first device first
+        self.frame_size = devices * FRAME_SIZE
+        self._data_rx = bytearray(self.frame_size)
+        self._status_arr = array.array('B', [0] * (3 * devices))
+        self._channels_arr = array.array('i', [0] * (NUM_CHANNELS * devices))
+        self._status_word = array.array('i', [0] * devices)
+        self._frame = (self._status_arr, self._channels_arr)
+
+    def _decode_rx(self) -> tuple[array.array, array.array]:
+        """Decodes the frames of every device held in self._data_rx in one
+        pass, the channels of device d are the items 8*d to 8*d + 7.
+
+        :returns: A tuple containing the 3 status bytes of each device and the
+                  8 x devices channel samples.
+
+        """
+        data_rx = self._data_rx
+        decode_frames(data_rx, self.devices, self._channels_arr, self._status_word)
+
+        status_arr = self._status_arr
+        pos = 0
+        for device in range(self.devices):
+            base = device * FRAME_SIZE
+            status_arr[pos] = data_rx[base]
+            status_arr[pos + 1] = data_rx[base + 1]
+            status_arr[pos + 2] = data_rx[base + 2]
+            pos += 3
+
+        return self._frame
+
+    def init(self, config1: int = 0x96, config2: int = 0xC0, config3: int = 0x60) -> None:
+        """Initializes every device of the chain with the same configuration,
+        see ADS1299.init(). The DAISY_EN bit of config1 is cleared, 0 selects
+        the daisy-chain mode. When the first device clocks the others set
+        clock_en in make_config1(), the devices running from the external
+        clock ignore it.
+
+        :config1: CONFIG1 of every device, by default 0x96.
+        :config2: CONFIG2 of every device, by default 0xC0.
+        :config3: CONFIG3 of every device, by default 0x60.
+        :returns: None
+
+        """
+        super().init(config1 & ~0x40, config2, config3)
+
+    def status_word(self, device: int) -> int:
+        """24-bit status word of a device from the last decoded read.
+
+        :device: Device index in the chain, 0 is the one wired to MISO.
+        :returns: The status word (1100 + LOFF_STATP + LOFF_STATN + GPIO).
+
+        """
+        return self._status_word[device]
+
+
+class DeviceGroup:
+    """ This class acquires several ADS1299 with their own CS on one SPI bus
+    as a single device of 8 x N channels. The devices share the START pin and
+    the master clock: the first device (master) runs from its oscillator and
+    outputs it on CLK, the others take CLK from it (CLKSEL pin low), so all of
+    them convert on the same edge and only the DRDY of the master is waited
+    on. Each DRDY reads every device back to back and all the channels get the
+    sequence number of the master.
+
+    """
+
+    def __init__(self, devices: list, drdy: Pin, start: Pin = None, drdy_pins: list = None) -> None:
+        """
+        :devices: ADS1299 instances on the same SPI bus, the master first.
+        :drdy: DRDY pin of the master.
+        :start: Output pin wired to START of every device. With None the
+                devices are started with START commands, one after the other.
+        :drdy_pins: Optional DRDY pins of devices[1:], used to detect a device
+                    that has no new data when the master has.
+
+        """
+        n_devices = len(devices)
+        self.devices = devices
+        self.master = devices[0]
+        self.drdy = drdy
+        self.start_pin = start
+        self.drdy_pins = drdy_pins or []
+        self.channels = NUM_CHANNELS * n_devices
+
+        # The frames are read back to back into one block, the 8 x N channels are decoded in one pass
+        self._data_rx = bytearray(n_devices * FRAME_SIZE)
+        view = memoryview(self._data_rx)
+        self._slots = [view[i * FRAME_SIZE:(i + 1) * FRAME_SIZE] for i in range(n_devices)]
+        self._channels_arr = array.array('i', [0] * self.channels)
+        self._status_word = array.array('i', [0] * n_devices)
+        self._frame = (self._status_word, self._channels_arr)
+
+        self.lockstep_errors = array.array('i', [0] * n_devices)  # Frames read with each device out of lockstep
+        self.out_of_lockstep = 0  # Bit n set = device n was out of lockstep in the last frame
+
+        if start is not None:
+            start.off()  # The START pin must be low while the START/STOP commands are used
+
+    @property
+    def sequence(self) -> int:
+        """Sequence number of the last frame, counted on the DRDY of the master."""
+        return self.master.sequence
+
+    @property
+    def timestamp(self) -> int:
+        """ticks_us() of the DRDY edge of the last frame."""
+        return self.master.timestamp
+
+    def init(self, config1: int = 0x96, config2: int = 0xC0, config3: int = 0x60) -> None:
+        """Initializes the devices one after the other, master first so its
+        clock output is running when the others are configured. CLK_EN is set
+        in the CONFIG1 of the master and cleared in the others, see
+        ADS1299.init() for the parameters.
+
+        :returns: None
+
+        """
+        for i in range(len(self.devices)):
+            self.devices[i].init(config1 | 0x20 if i == 0 else config1 & ~0x20, config2, config3)
+
+    def config_all_channels(self, channels_active: int = 8, gain: int = ADS1299.GAIN_24,
+                            srb2_connection: bool = False, channel_input: int = ADS1299.SHORTED) -> None:
+        """Configures the channels of every device the same way, see
+        ADS1299.config_all_channels().
+
+        :returns: None
+
+        """
+        for device in self.devices:
+            device.config_all_channels(channels_active, gain, srb2_connection, channel_input)
+
+    def apply_profile(self, image: bytes, diff: bool = True) -> int:
+        """Applies a register image to every device, see
+        ADS1299.apply_profile(). CLK_EN is adjusted as in init().
+
+        :returns: Number of registers written in all the devices.
+
+        """
+        written = 0
+        for i in range(len(self.devices)):
+            device_image = bytearray(image)
+            if i == 0:
+                device_image[ADS1299.CONFIG1] |= 0x20
+            else:
+                device_image[ADS1299.CONFIG1] &= ~0x20
+            written += self.devices[i].apply_profile(device_image, diff)
+        return written
+
+    def start(self, callback=None) -> None:
+        """Enables continuous read on every device and starts the conversions
+        of all of them on the same clock edge.
+
+        :callback: See ADS1299.attach_drdy(), attached to the DRDY of the master.
+        :returns: None
+
+        """
+        for device in self.devices:
+            device.send_command(ADS1299.RDATAC)
+        self.master.attach_drdy(self.drdy, callback)
+        for i in range(len(self.devices)):
+            self.lockstep_errors[i] = 0
+        self.out_of_lockstep = 0
+
+        if self.start_pin is not None:
+            self.start_pin.on()
+        else:
+            for device in self.devices:
+                device.send_command(ADS1299.START)
+
+    def stop(self) -> None:
+        """Stops the conversions and the continuous read of every device.
+
+        :returns: None
+
+        """
+        if self.start_pin is not None:
+            self.start_pin.off()
+        for device in self.devices:
+            device.send_command(ADS1299.SDATAC)
+            if self.start_pin is None:
+                device.send_command(ADS1299.STOP)
+        self.master.detach_drdy(self.drdy)
+
+    def data_ready(self) -> int:
+        """Pending DRDY edges of the master, see ADS1299.data_ready().
+
+        :returns: Pending DRDY edges, 0 if there is no new frame.
+
+        """
+        return self.master.data_ready()
+
+    def read(self) -> tuple[array.array, array.array]:
+        """Reads the frame of every device back to back and decodes them as
+        one frame of 8 x N channels. A device whose DRDY is still high (no new
+        conversion) or whose status word does not start with 1100 (not
+        answering) is out of lockstep, its samples are kept but the frame is
+        flagged in out_of_lockstep and counted in lockstep_errors.
+
+        :returns: A tuple containing the 24-bit status word of each device and
+                  the 8 x N channel samples, device n in items 8*n to 8*n + 7.
+
+        """
+        master = self.master
+        # Snapshot before the transfers, an edge arriving meanwhile belongs to the next frame
+        drdy_us = master.drdy_us
+        drdy_count = master.drdy_count
+
+        out_of_lockstep = 0
+        drdy_pins = self.drdy_pins
+        for i in range(len(drdy_pins)):
+            if drdy_pins[i].value():
+                out_of_lockstep |= 2 << i
+
+        devices = self.devices
+        slots = self._slots
+        n_devices = len(devices)
+        for i in range(n_devices):
+            devices[i].read_frame_into(slots[i])
+        master._count_frame(drdy_count, drdy_us)
+
+        status_word = self._status_word
+        decode_frames(self._data_rx, n_devices, self._channels_arr, status_word)
+        for i in range(n_devices):
+            if status_word[i] & 0xF00000 != 0xC00000:
+                out_of_lockstep |= 1 << i
+
+        if out_of_lockstep:
+            for i in range(n_devices):
+                if (out_of_lockstep >> i) & 1:
+                    self.lockstep_errors[i] += 1
+        self.out_of_lockstep = out_of_lockstep
+
+        return self._frame
+
 
 def make_config1(daisy_en: bool = False, clock_en: bool = False, data_rate: int = ADS1299.SAMPLE_RATE_250) -> int:
     """This register configures the DAISY_EN bit, clock, and data rate.
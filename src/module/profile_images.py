@@ -0,0 +1,22 @@
+# #! /bin/MicroPython
+# Generated by tools/compile_profiles.py from module/profiles.py, do not edit.
+# Register images indexed by register address, apply them with ADS1299.apply_profile().
+
+EEG_8CH_250_GAIN24 = (
+    b'\x00\x96\xc0\xec\x00\x68\x68\x68\x68\x68\x68\x68'
+    b'\x68\xff\xff\x00\x00\x00\x00\x00\x0f\x00\x00\x00'
+)
+TEST_SIGNAL = (
+    b'\x00\x95\xd0\xe8\x00\x05\x05\x05\x05\x05\x05\x05'
+    b'\x05\x00\x00\x00\x00\x00\x00\x00\x0f\x00\x00\x00'
+)
+IMPEDANCE_CHECK = (
+    b'\x00\x96\xc0\xe0\x03\x00\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\xff\xff\x00\x00\x00\x0f\x00\x00\x02'
+)
+
+IMAGES = {
+    'EEG-8ch-250-gain24': EEG_8CH_250_GAIN24,
+    'test-signal': TEST_SIGNAL,
+    'impedance-check': IMPEDANCE_CHECK,
+}
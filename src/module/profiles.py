@@ -0,0 +1,145 @@
+# #! /bin/MicroPython
+from .ads1299 import (
+    ADS1299,
+    NUM_REGISTERS,
+    make_bias_sensn,
+    make_bias_sensp,
+    make_chnset,
+    make_config1,
+    make_config2,
+    make_config3,
+    make_config4,
+    make_gpio,
+    make_loff,
+    make_loff_flip,
+    make_loff_sensn,
+    make_loff_sensp,
+    make_misc1,
+)
+
+########################################################################################################################
+#                                                      PROFILES                                                        #
+########################################################################################################################
+# A profile names the registers that differ from the power-up defaults. Each entry is either the raw register value
+# or the keyword arguments of its make_* helper. "CHnSET" configures the 8 channels at once, "CH1SET".."CH8SET"
+# override a single channel. compile_profile() turns a profile into a 24-byte register image, tools/compile_profiles.py
+# stores those images in module/profile_images.py so the firmware does not have to import this module at all.
+
+PROFILES = {
+    # Electrode inputs, 250 SPS, PGA gain 24, internal reference and BIAS drive from every channel
+    "EEG-8ch-250-gain24": {
+        "CONFIG1": {"data_rate": ADS1299.SAMPLE_RATE_250},
+        "CONFIG3": {"pwr_down_refbuf": True, "biasref_signal": True, "bias_buf_pwr": True},
+        "CHnSET": {"gain": ADS1299.GAIN_24, "srb2_connection": True, "channel_input": ADS1299.NORMAL},
+        "BIAS_SENSP": 0xFF,
+        "BIAS_SENSN": 0xFF,
+    },
+    # Internal 1x test signal (~1 Hz square wave) on every channel, 500 SPS, same as tests/internal_signals.py
+    "test-signal": {
+        "CONFIG1": {"data_rate": ADS1299.SAMPLE_RATE_500},
+        "CONFIG2": {"test_source": True, "signal_amp": 1, "signal_freq": ADS1299.PULSED_1},
+        "CONFIG3": {"pwr_down_refbuf": True, "biasref_signal": True},
+        "CHnSET": {"gain": ADS1299.GAIN_1, "channel_input": ADS1299.TEST},
+    },
+    # AC lead-off excitation at fDR/4 (6 nA) on both sides of every channel, comparators on at 95 %
+    "impedance-check": {
+        "CONFIG1": {"data_rate": ADS1299.SAMPLE_RATE_250},
+        "CONFIG3": {"pwr_down_refbuf": True},
+        "LOFF": {"comp_th": ADS1299.COMP_95P_5N, "ilead_off": ADS1299.I_6NA,
+                 "flead_off": ADS1299.AC_LOFF_FDR_BY_4},
+        "CHnSET": {"gain": ADS1299.GAIN_1, "channel_input": ADS1299.NORMAL},
+        "LOFF_SENSP": 0xFF,
+        "LOFF_SENSN": 0xFF,
+        "CONFIG4": {"pd_loff_comp": True},
+    },
+}
+
+# Register values after a RESET command (9.6 Register Maps of the datasheet), ID depends on the device
+RESET_IMAGE = bytes((
+    0x00,                                           # ID
+    0x96, 0xC0, 0x60, 0x00,                         # CONFIG1, CONFIG2, CONFIG3, LOFF
+    0x61, 0x61, 0x61, 0x61, 0x61, 0x61, 0x61, 0x61, # CH1SET .. CH8SET
+    0x00, 0x00, 0x00, 0x00, 0x00,                   # BIAS_SENSP, BIAS_SENSN, LOFF_SENSP, LOFF_SENSN, LOFF_FLIP
+    0x00, 0x00,                                     # LOFF_STATP, LOFF_STATN
+    0x0F, 0x00, 0x00, 0x00,                         # GPIO, MISC1, MISC2, CONFIG4
+))
+
+_FIELDS = {
+    "CONFIG1": (ADS1299.CONFIG1, make_config1),
+    "CONFIG2": (ADS1299.CONFIG2, make_config2),
+    "CONFIG3": (ADS1299.CONFIG3, make_config3),
+    "LOFF": (ADS1299.LOFF, make_loff),
+    "BIAS_SENSP": (ADS1299.BIAS_SENSP, make_bias_sensp),
+    "BIAS_SENSN": (ADS1299.BIAS_SENSN, make_bias_sensn),
+    "LOFF_SENSP": (ADS1299.LOFF_SENSP, make_loff_sensp),
+    "LOFF_SENSN": (ADS1299.LOFF_SENSN, make_loff_sensn),
+    "LOFF_FLIP": (ADS1299.LOFF_FLIP, make_loff_flip),
+    "GPIO": (ADS1299.GPIO, make_gpio),
+    "MISC1": (ADS1299.MISC1, make_misc1),
+    "MISC2": (ADS1299.MISC2, None),
+    "CONFIG4": (ADS1299.CONFIG4, make_config4),
+}
+
+########################################################################################################################
+#                                                      FUNCTIONS                                                       #
+########################################################################################################################
+
+def _field_value(helper, value) -> int:
+    if isinstance(value, dict):
+        if helper is None:
+            raise ValueError("register has no make_* helper, use a raw value")
+        return helper(**value)
+    if not 0 <= value <= 0xFF:
+        raise ValueError("register value out of range: {}".format(value))
+    return value
+
+def compile_profile(definition: dict) -> bytes:
+    """This function builds the register image of a profile, every register
+    not named in the profile keeps its reset value.
+
+    :definition: A profile, see PROFILES.
+    :returns: An immutable image of NUM_REGISTERS bytes, indexed by register
+              address, ready for ADS1299.apply_profile().
+
+    """
+    image = bytearray(RESET_IMAGE)
+
+    # The common channel setting goes first so CHnSET overrides always win
+    if "CHnSET" in definition:
+        image[ADS1299.CH1SET:ADS1299.CH8SET + 1] = bytes([_field_value(make_chnset, definition["CHnSET"])] * 8)
+
+    for name, value in definition.items():
+        if name == "CHnSET":
+            continue
+        if name[:2] == "CH" and name[3:] == "SET" and "1" <= name[2] <= "8":
+            image[ADS1299.CH1SET + int(name[2]) - 1] = _field_value(make_chnset, value)
+        elif name in _FIELDS:
+            register, helper = _FIELDS[name]
+            image[register] = _field_value(helper, value)
+        else:
+            raise ValueError("unknown register in profile: {}".format(name))
+
+    return bytes(image[:NUM_REGISTERS])
+
+def compile_profiles(profiles: dict = PROFILES) -> dict:
+    """Compiles every profile.
+
+    :profiles: A dict of profile name -> definition.
+    :returns: A dict of profile name -> register image.
+
+    """
+    return {name: compile_profile(definition) for name, definition in profiles.items()}
+
+def load(name: str) -> bytes:
+    """Returns the register image of a profile, the precompiled one from
+    module/profile_images.py when it is deployed, else it is compiled now.
+
+    :name: Profile name, see PROFILES.
+    :returns: The register image.
+
+    """
+    try:
+        from .profile_images import IMAGES
+        return IMAGES[name]
+    except (ImportError, KeyError):
+        return compile_profile(PROFILES[name])
@@ -1,11 +1,16 @@
+import argparse
 import sys
 import socket
-import json
 import queue
-from collections import deque
+import time
 import numpy as np
 from PyQt6 import QtWidgets, QtCore
 import pyqtgraph as pg
+from protocol import MAGIC, JsonLineDecoder, TelemetryDecoder
+from filters import SosFilter, make_chain
+from pacing import RenderPacer
+from ring import BlockFifo, SampleRing
+from spectrum import WelchPSD
 
 # ==========================================
 # ADS1299 Constants (Adjusted for 250 SPS & Gain 1)
@@ -15,6 +20,26 @@ GAIN = 1
 # Formula: V = (Raw_Int * V_REF) / (GAIN * (2**23 - 1))
 LSB_TO_VOLTS = V_REF / (GAIN * ((1 << 23) - 1))
 
+# Display defaults, see the command line options
+NUM_CHANNELS = 8
+SAMPLE_RATE = 250
+WINDOW_S = 2.0
+RENDER_PERIOD_MS = 33
+LATENCY_TARGET_S = 0.25
+PREBUFFER_S = 0.1
+PACING_REPORT_S = 0.5
+
+# Filter chain defaults, see the command line options
+LINE_HZ = 50
+BASELINE_S = 1.0
+FILTER_ORDER = 4
+
+# Spectral view defaults: 1 s segments (1 Hz resolution) with 50 % overlap, 8 averaged
+SEGMENT_S = 1.0
+PSD_AVERAGES = 8
+PSD_MAX_HZ = 100
+SPECTRUM_BUDGET_MS = 5
+
 class TelemetryReceiver(QtCore.QThread):
     """
     Dedicated thread for high-speed TCP reception.
@@ -40,42 +65,68 @@ class TelemetryReceiver(QtCore.QThread):
 
                     conn, addr = s.accept()
                     with conn:
-                        self.status_msg.emit(f"Streaming established with ESP32: {addr}")
-                        buffer = ""
-                        while self.running:
-                            try:
-                                data = conn.recv(4096).decode('utf-8')
-                                if not data:
-                                    break
-
-                                buffer += data
-                                # Extract complete JSON objects from stream
-                                while "}" in buffer:
-                                    end_pos = buffer.find("}") + 1
-                                    json_part = buffer[:end_pos]
-                                    buffer = buffer[end_pos:]
-
-                                    try:
-                                        payload = json.loads(json_part)
-                                        self.data_queue.put(payload)
-                                    except json.JSONDecodeError:
-                                        continue
-                            except socket.error:
-                                break
+                        # Binary packets start with the protocol magic, anything else is the JSON fallback
+                        head = conn.recv(len(MAGIC), socket.MSG_PEEK | socket.MSG_WAITALL)
+                        if head == MAGIC:
+                            self.status_msg.emit(f"Streaming established with ESP32 (binary): {addr}")
+                            self.receive(conn, TelemetryDecoder())
+                        else:
+                            self.status_msg.emit(f"Streaming established with ESP32 (JSON): {addr}")
+                            self.receive(conn, JsonLineDecoder())
                         self.status_msg.emit("Connection lost. Waiting for reconnect...")
             except Exception as e:
                 self.status_msg.emit(f"Receiver Error: {e}. Retrying...")
                 QtCore.QThread.msleep(1000)
 
+    def receive(self, conn, decoder):
+        """Receives straight into the decoder buffer and enqueues one block of frames per recv."""
+        stats_count = 0
+        while self.running:
+            try:
+                if not decoder.recv_into(conn):
+                    break
+            except OSError:
+                break
+
+            lost = decoder.lost_frames
+            block = decoder.decode()
+            if block is not None:
+                block["rx"] = time.monotonic()
+                self.data_queue.put(block)
+            if decoder.lost_frames != lost:
+                self.report_loss(decoder.sequences)
+            if getattr(decoder, "stats_count", 0) != stats_count:
+                stats_count = decoder.stats_count
+                self.report_stats(decoder.stats)
+
+    def report_stats(self, stats):
+        """Shows the device GC and DRDY latency stats."""
+        self.status_msg.emit(
+            f"GC: {stats['gc_collections']} runs ({stats['gc_forced']} without slack), "
+            f"last {stats['gc_last_us']} us, worst {stats['gc_worst_us']} us | "
+            f"worst DRDY latency {stats['drdy_worst_latency_us']} us | free heap {stats['mem_free']} B")
+
+    def report_loss(self, sequences):
+        """Reports the frames dropped by the device or lost on the way."""
+        first, count = sequences.gaps[-1]
+        self.status_msg.emit(f"Lost {sequences.lost_frames} frames, last gap: seq {first}..{first + count - 1}")
+
 
 class Dashboard(QtWidgets.QMainWindow):
     """
     Real-Time Monitor.
-    Acts as the 'Consumer', buffering and plotting smoothly.
+    Acts as the 'Consumer', buffering and plotting smoothly. Received blocks
+    go through the filter chain, wait in a BlockFifo and are played into a
+    SampleRing at the sample clock measured by a RenderPacer, curves are
+    updated from views of the ring.
+    The PSD and band power of every channel are updated from the new segments
+    of the ring within SPECTRUM_BUDGET_MS per tick.
     """
-    def __init__(self):
+    def __init__(self, channels=NUM_CHANNELS, sample_rate=SAMPLE_RATE, window_s=WINDOW_S, line_hz=LINE_HZ,
+                 band=None, baseline_s=BASELINE_S, order=FILTER_ORDER, segment_s=SEGMENT_S,
+                 averages=PSD_AVERAGES, latency_target_s=LATENCY_TARGET_S):
         super().__init__()
-        self.setWindowTitle("ADS1299 Monitor - 250 SPS Synchronized")
+        self.setWindowTitle(f"ADS1299 Monitor - {sample_rate} SPS Synchronized")
         self.resize(1200, 900)
 
         self.central_widget = QtWidgets.QWidget()
@@ -83,14 +134,26 @@ class Dashboard(QtWidgets.QMainWindow):
         self.layout = QtWidgets.QVBoxLayout(self.central_widget)
 
         self.win = pg.GraphicsLayoutWidget()
-        self.layout.addWidget(self.win)
+        self.layout.addWidget(self.win, 3)
+        self.spec_win = pg.GraphicsLayoutWidget()
+        self.layout.addWidget(self.spec_win, 1)
 
-        self.win_size = 500
-        self.buffers = [deque([0.0] * self.win_size, maxlen=self.win_size) for _ in range(8)]
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.win_size = int(window_s * sample_rate)
+        self.ring = SampleRing(channels, self.win_size)
+        self.pending = BlockFifo()
+        self.filter = SosFilter(make_chain(sample_rate, line_hz, band, baseline_s, order), channels)
+        # Without a baseline or band-pass stage the window mean is removed at plot time
+        self.center = not (band or baseline_s)
+        self.pacer = RenderPacer(sample_rate, latency_target_s, min(PREBUFFER_S, latency_target_s / 2))
+        self.next_report = 0.0
+        self.time_axis = np.arange(self.win_size, dtype=np.float32) / sample_rate
+        self.plot_data = np.empty((channels, self.win_size), dtype=np.float32)
         self.curves = []
 
         # Subplots initialization
-        for i in range(8):
+        for i in range(channels):
             p = self.win.addPlot(row=i, col=0)
             p.showGrid(x=True, y=True, alpha=0.3)
             p.setLabel('left', f'Ch{i}', units='V')
@@ -98,71 +161,118 @@ class Dashboard(QtWidgets.QMainWindow):
             # Dynamic Y scaling, fixed X range
             p.enableAutoRange('y', True)
             p.enableAutoRange('x', False)
-            p.setXRange(0, self.win_size)
+            p.setXRange(0, window_s)
 
             curve = p.plot(pen=pg.mkPen(color=(0, 255, 127), width=1.2))
+            # Long windows: draw at most about one point per pixel, peaks kept
+            curve.setDownsampling(auto=True, method='peak')
+            curve.setClipToView(True)
             self.curves.append(curve)
-            if i < 7:
-                self.win.nextRow()
+
+        # Spectral view: PSD of every channel and band power bars grouped by channel
+        self.spectrum = WelchPSD(self.ring, sample_rate, int(segment_s * sample_rate), averages=averages)
+        psd_plot = self.spec_win.addPlot(row=0, col=0)
+        psd_plot.showGrid(x=True, y=True, alpha=0.3)
+        psd_plot.setLogMode(x=False, y=True)
+        psd_plot.setLabel('left', 'PSD', units='V²/Hz')
+        psd_plot.setLabel('bottom', 'Frequency', units='Hz')
+        psd_plot.setXRange(0, min(PSD_MAX_HZ, sample_rate / 2))
+        self.psd_curves = [psd_plot.plot(pen=pg.mkPen(color=pg.intColor(i, hues=channels), width=1))
+                           for i in range(channels)]
+
+        band_plot = self.spec_win.addPlot(row=0, col=1)
+        band_plot.showGrid(y=True, alpha=0.3)
+        band_plot.setLabel('left', 'Band power', units='µV²')
+        band_plot.setLabel('bottom', 'Channel')
+        band_plot.addLegend()
+        n_bands = len(self.spectrum.band_names)
+        width = 0.8 / n_bands
+        self.band_bars = []
+        for b, name in enumerate(self.spectrum.band_names):
+            x = np.arange(channels) + (b - (n_bands - 1) / 2) * width
+            bars = pg.BarGraphItem(x=x, height=np.zeros(channels), width=width, brush=pg.intColor(b, hues=n_bands),
+                                   name=name)
+            band_plot.addItem(bars)
+            self.band_bars.append(bars)
 
         self.raw_queue = queue.Queue()
-        self.playback_queues = [queue.Queue() for _ in range(8)]
 
         self.receiver = TelemetryReceiver(self.raw_queue)
         self.receiver.status_msg.connect(self.statusBar().showMessage)
+        self.pacing_label = QtWidgets.QLabel()
+        self.statusBar().addPermanentWidget(self.pacing_label)
         self.receiver.start()
 
         # Rendering timer: 30 FPS -> ~33ms frame rate
         self.timer = QtCore.QTimer()
         self.timer.timeout.connect(self.consume_and_render)
-        self.timer.start(33)
+        self.timer.start(RENDER_PERIOD_MS)
+
+    def to_volts(self, block):
+        """
+        Converts a block to a float32 (frames, channels) array of volts, channels
+        missing from the block are 0 and channels beyond the plots are ignored.
+        """
+        samples = block["samples"]
+        channels = block["channels"]
+        if channels == list(range(self.channels)):
+            return np.multiply(samples, LSB_TO_VOLTS, dtype=np.float32)
+        volts = np.zeros((len(samples), self.channels), dtype=np.float32)
+        for column, ch in enumerate(channels):
+            if ch < self.channels:
+                np.multiply(samples[:, column], LSB_TO_VOLTS, out=volts[:, ch], dtype=np.float32)
+        return volts
 
     def consume_and_render(self):
         """
-        Drains network queue and pulls ~8 samples per tick (250 SPS / 30 FPS) for smooth playback.
+        Drains the network queue and plays the samples due since the last tick at the measured sample clock.
         """
-        # 1. Drain network queue into playback queues
+        # 1. Drain network queue, one block of frames per item
         while not self.raw_queue.empty():
             try:
-                payload = self.raw_queue.get_nowait()
-                for i in range(8):
-                    key = f'Ch{i}'
-                    if key in payload:
-                        raw_data = payload[key]
-                        values = raw_data if isinstance(raw_data, list) else [raw_data]
-
-                        for val in values:
-                            # Convert raw value to voltage
-                            volts = val * LSB_TO_VOLTS
-                            self.playback_queues[i].put(volts)
+                block = self.raw_queue.get_nowait()
+                self.pacer.arrived(len(block["samples"]), block["ts"], block["rx"])
+                self.pending.put(self.filter.process(self.to_volts(block)), block["rx"])
             except queue.Empty:
                 break
 
-        # 2. Smooth playback: ~8 samples per frame
-        samples_per_tick = 8
-        rendered = False
-
-        for i in range(8):
-            count = 0
-            # Pull samples only if a small buffer exists to avoid stuttering
-            while self.playback_queues[i].qsize() > 2 and count < samples_per_tick:
-                volts = self.playback_queues[i].get_nowait()
-                self.buffers[i].append(volts)
-                count += 1
+        # 2. Smooth playback: the samples of one tick, appended as one block. After a stall the whole excess
+        # backlog is appended at once, its samples reach the ring and the spectrum but are not rendered on their own
+        now = time.monotonic()
+        count = self.pacer.due(now, self.pending.samples)
+        rows = self.pending.take(count) if count else None
+        self.report_pacing(now)
+        if rows is None:
+            return
+        self.ring.append(rows)
 
-            if count > 0:
-                rendered = True
+        # 3. Plot, the filters removed the DC offset or it is removed here (center at 0), all channels at once
+        window = self.ring.view()
+        if self.center:
+            window = np.subtract(window, window.mean(axis=1, keepdims=True), out=self.plot_data)
+        for i, curve in enumerate(self.curves):
+            curve.setData(self.time_axis, window[i], skipFiniteCheck=True)
 
-        # 3. Plot and remove DC Offset (center at 0)
-        if rendered:
-            for i in range(8):
-                data_array = np.array(self.buffers[i])
+        # 4. Spectral view, only the segments completed since the last tick (DC bin left out of the log plot)
+        if self.spectrum.update(SPECTRUM_BUDGET_MS / 1000):
+            freqs = self.spectrum.freqs[1:]
+            for i, curve in enumerate(self.psd_curves):
+                curve.setData(freqs, self.spectrum.psd[i, 1:], skipFiniteCheck=True)
+            for b, bars in enumerate(self.band_bars):
+                bars.setOpts(height=self.spectrum.band_power[:, b] * 1e12)
 
-                # Subtract mean to center the wave
-                if len(data_array) > 0:
-                    data_array = data_array - np.mean(data_array)
-
-                self.curves[i].setData(data_array)
+    def report_pacing(self, now):
+        """Shows the measured sample clock and the display latency of the newest sample plotted."""
+        if now < self.next_report:
+            return
+        self.next_report = now + PACING_REPORT_S
+        latency = self.pacer.latency(now, self.pending.last_stamp, self.pending.last_behind)
+        source = "measured" if self.pacer.measured else "nominal"
+        self.pacing_label.setText(
+            f"{self.pacer.rate:.0f} SPS ({source}) | display latency "
+            f"{'-' if latency is None else f'{latency * 1000:.0f} ms'} | backlog "
+            f"{self.pending.samples / self.pacer.rate * 1000:.0f} ms | catch-ups {self.pacer.catch_ups}, "
+            f"underruns {self.pacer.underruns}")
 
     def closeEvent(self, event):
         """Ensure proper thread and socket closure on exit"""
@@ -172,12 +282,28 @@ class Dashboard(QtWidgets.QMainWindow):
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ADS1299 real-time monitor")
+    parser.add_argument("--channels", type=int, default=NUM_CHANNELS, help="Plotted channels")
+    parser.add_argument("--rate", type=int, default=SAMPLE_RATE, help="Device sample rate (SPS)")
+    parser.add_argument("--window", type=float, default=WINDOW_S, help="Plotted window (s)")
+    parser.add_argument("--line", type=float, default=LINE_HZ, help="Line frequency notch (Hz), 0 disables it")
+    parser.add_argument("--band", type=float, nargs=2, metavar=("LOW", "HIGH"), help="Band-pass edges (Hz)")
+    parser.add_argument("--baseline", type=float, default=BASELINE_S,
+                        help="Time constant of the EMA baseline removal (s), 0 disables it")
+    parser.add_argument("--order", type=int, default=FILTER_ORDER, help="Order of the band-pass edges")
+    parser.add_argument("--segment", type=float, default=SEGMENT_S, help="Welch segment length (s)")
+    parser.add_argument("--averages", type=int, default=PSD_AVERAGES, help="Welch segments averaged")
+    parser.add_argument("--latency", type=float, default=LATENCY_TARGET_S,
+                        help="Display latency target (s), a larger backlog is caught up at once")
+    args = parser.parse_args()
+
     app = QtWidgets.QApplication(sys.argv)
 
     pg.setConfigOption('background', 'k')
     pg.setConfigOption('foreground', 'w')
     pg.setConfigOptions(antialias=False)
 
-    window = Dashboard()
+    window = Dashboard(args.channels, args.rate, args.window, args.line, args.band, args.baseline, args.order,
+                       args.segment, args.averages, args.latency)
     window.show()
     sys.exit(app.exec())
@@ -0,0 +1,211 @@
+"""
+Streaming filters of the dashboard, applied to every received block before
+it is played into the plot ring.
+
+Filters are second-order sections in the scipy layout, one row
+[b0, b1, b2, 1, a1, a2] per section, each section in transposed direct form
+II with its own (z1, z2) state per channel. Instead of running the recursion
+sample by sample, SosFilter runs the whole cascade as one state-space
+system: for a block of n <= chunk samples
+
+    y = T[:n, :n] @ u + O[:n] @ x        x = A^n @ x + G[:n][::-1].T @ u
+
+with T the lower triangular Toeplitz matrix of the impulse response and O, A^n
+and G precomputed once, so a block of every channel costs a few matrix
+products and the output is exactly that of the recursion.
+"""
+import numpy as np
+
+
+def notch(f0: float, fs: float, q: float = 30.0) -> np.ndarray:
+    """
+    Notch section, e.g. at the 50/60 Hz line frequency.
+
+    :param f0: Rejected frequency (Hz).
+    :param fs: Sample rate (Hz).
+    :param q: Quality factor, f0 / -3 dB bandwidth.
+    :return: SOS array of 1 section.
+    """
+    w0 = 2 * np.pi * f0 / fs
+    alpha = np.sin(w0) / (2 * q)
+    cos_w0 = np.cos(w0)
+    return _section([1.0, -2 * cos_w0, 1.0], [1 + alpha, -2 * cos_w0, 1 - alpha])
+
+
+def butter(order: int, fc: float, fs: float, btype: str = "lowpass") -> np.ndarray:
+    """
+    Butterworth low-pass or high-pass filter, bilinear transform with the
+    cutoff prewarped.
+
+    :param order: Filter order, an odd order adds a first order section.
+    :param fc: -3 dB frequency (Hz).
+    :param fs: Sample rate (Hz).
+    :param btype: "lowpass" or "highpass".
+    :return: SOS array of (order + 1) // 2 sections.
+    """
+    if btype not in ("lowpass", "highpass"):
+        raise ValueError(f"Unknown filter type: {btype}")
+    if not 0 < fc < fs / 2:
+        raise ValueError(f"Cutoff {fc} Hz out of (0, {fs / 2}) Hz")
+
+    k = np.tan(np.pi * fc / fs)
+    sections = []
+    for i in range(order // 2):
+        # Q of the i-th pair of analog Butterworth poles
+        q = 1 / (2 * np.sin((2 * i + 1) * np.pi / (2 * order)))
+        a = [k * k + k / q + 1, 2 * (k * k - 1), k * k - k / q + 1]
+        b = [k * k, 2 * k * k, k * k] if btype == "lowpass" else [1.0, -2.0, 1.0]
+        sections.append(_section(b, a))
+    if order % 2:
+        a = [k + 1, k - 1, 0.0]
+        b = [k, k, 0.0] if btype == "lowpass" else [1.0, -1.0, 0.0]
+        sections.append(_section(b, a))
+    return np.concatenate(sections)
+
+
+def bandpass(low: float, high: float, fs: float, order: int = 4) -> np.ndarray:
+    """
+    Band-pass filter: Butterworth high-pass at low followed by a Butterworth
+    low-pass at high, both of the given order.
+
+    :return: SOS array.
+    """
+    if not low < high:
+        raise ValueError(f"Empty band: {low}..{high} Hz")
+    return np.concatenate([butter(order, low, fs, "highpass"), butter(order, high, fs, "lowpass")])
+
+
+def ema_baseline(tau_s: float, fs: float) -> np.ndarray:
+    """
+    Removes the baseline tracked by an exponential moving average,
+    y = x - ema(x), the first order high-pass (1 - a)(1 - z^-1) / (1 - (1 - a) z^-1).
+
+    :param tau_s: Time constant of the average (s).
+    :param fs: Sample rate (Hz).
+    :return: SOS array of 1 section.
+    """
+    alpha = 1 - np.exp(-1 / (tau_s * fs))
+    return _section([1 - alpha, alpha - 1, 0.0], [1.0, alpha - 1, 0.0])
+
+
+def make_chain(fs: float, line_hz: float | None = 50.0, band: tuple[float, float] | None = None,
+               baseline_s: float | None = None, order: int = 4) -> np.ndarray:
+    """
+    SOS of the dashboard filter chain: EMA baseline, band-pass and notch, each
+    one left out when its argument is None.
+
+    :param fs: Sample rate (Hz).
+    :param line_hz: Notch frequency, 50 or 60 Hz.
+    :param band: (low, high) band-pass edges (Hz).
+    :param baseline_s: Time constant of the EMA baseline (s).
+    :param order: Order of each Butterworth edge of the band-pass.
+    :return: SOS array, possibly of 0 sections.
+    """
+    sections = [np.empty((0, 6))]
+    if baseline_s:
+        sections.append(ema_baseline(baseline_s, fs))
+    if band:
+        sections.append(bandpass(band[0], band[1], fs, order))
+    if line_hz:
+        sections.append(notch(line_hz, fs))
+    return np.concatenate(sections)
+
+
+def _section(b, a) -> np.ndarray:
+    return np.array([[b[0] / a[0], b[1] / a[0], b[2] / a[0], 1.0, a[1] / a[0], a[2] / a[0]]])
+
+
+class SosFilter:
+    """
+    Cascade of second-order sections with persistent state, filtering blocks
+    of shape (frames, channels) for all the channels at once.
+    """
+
+    def __init__(self, sos: np.ndarray, channels: int, chunk: int = 128):
+        """
+        :param sos: SOS array, see make_chain().
+        :param channels: Channels of every block.
+        :param chunk: Most samples filtered by one set of matrix products, the cost per sample grows with it.
+        """
+        self.sos = np.atleast_2d(np.asarray(sos, dtype=np.float64))
+        self.channels = channels
+        self.chunk = chunk
+        a, b, c, d = self._state_space(self.sos)
+        order = len(a)
+        self._state = np.zeros((order, channels))
+        self._primed = False
+        if not order:
+            return
+
+        # Impulse response h, observability O = C A^i, A^n and G = A^j B up to chunk samples
+        powers = np.empty((chunk + 1, order, order))
+        powers[0] = np.eye(order)
+        for i in range(chunk):
+            powers[i + 1] = a @ powers[i]
+        self._obs = (c @ powers[:chunk])[:, 0]      # (chunk, order)
+        self._powers = powers                       # (chunk + 1, order, order)
+        self._gain = (powers[:chunk] @ b)[:, :, 0]  # (chunk, order)
+        h = np.concatenate([[d], self._obs[:chunk - 1] @ b[:, 0]])
+        index = np.arange(chunk)
+        lag = index[:, None] - index[None, :]
+        self._toeplitz = np.where(lag >= 0, h[np.clip(lag, 0, None)], 0.0)
+        # State reached by a constant unit input, to start without a step transient
+        self._steady = np.linalg.solve(np.eye(order) - a, b[:, 0])
+
+    @property
+    def zi(self) -> np.ndarray:
+        """Current state, shape (sections, 2, channels) as in scipy.signal.sosfilt."""
+        return self._state.reshape(len(self.sos), 2, self.channels)
+
+    @zi.setter
+    def zi(self, value: np.ndarray) -> None:
+        self._state[:] = np.reshape(value, self._state.shape)
+        self._primed = True
+
+    def reset(self) -> None:
+        """Clears the state, the next block primes it again."""
+        self._state[:] = 0
+        self._primed = False
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """
+        Filters a block and keeps the state for the next one. The first block
+        starts from the steady state of its first frame.
+
+        :param block: Array (frames, channels).
+        :return: Filtered float32 array of the same shape.
+        """
+        out = np.empty(block.shape, dtype=np.float32)
+        if not len(self.sos):
+            out[:] = block
+            return out
+        if len(block) and not self._primed:
+            self._state[:] = self._steady[:, None] * block[0]
+            self._primed = True
+
+        state = self._state
+        for start in range(0, len(block), self.chunk):
+            u = np.asarray(block[start:start + self.chunk], dtype=np.float64)
+            n = len(u)
+            out[start:start + n] = self._toeplitz[:n, :n] @ u + self._obs[:n] @ state
+            state = self._powers[n] @ state + self._gain[n - 1::-1].T @ u
+        self._state = state
+        return out
+
+    @staticmethod
+    def _state_space(sos: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray, float]:
+        # Cascade of transposed direct form II sections, states of the first section first
+        a = np.empty((0, 0))
+        b = np.empty((0, 1))
+        c = np.empty((1, 0))
+        d = 1.0
+        for b0, b1, b2, _, a1, a2 in sos:
+            a_s = np.array([[-a1, 1.0], [-a2, 0.0]])
+            b_s = np.array([[b1 - a1 * b0], [b2 - a2 * b0]])
+            c_s = np.array([[1.0, 0.0]])
+            n = len(a)
+            a = np.block([[a, np.zeros((n, 2))], [b_s @ c, a_s]])
+            b = np.vstack([b, b_s * d])
+            c = np.hstack([b0 * c, c_s])
+            d = b0 * d
+        return a, b, c, d
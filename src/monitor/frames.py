@@ -0,0 +1,64 @@
+"""
+Host-side (NumPy) decoding of raw ADS1299 frames.
+
+Mirrors module.ads1299.decode_frames() for the dashboard and offline tools:
+a whole block of concatenated frames is converted with a handful of vector
+operations instead of a Python loop per sample.
+"""
+import numpy as np
+
+STATUS_BYTES = 3
+BYTES_PER_SAMPLE = 3
+NUM_CHANNELS = 8
+FRAME_SIZE = STATUS_BYTES + BYTES_PER_SAMPLE * NUM_CHANNELS
+
+
+def frame_size(channels: int = NUM_CHANNELS) -> int:
+    """Size in bytes of one frame (status word + channels) of a single device."""
+    return STATUS_BYTES + BYTES_PER_SAMPLE * channels
+
+
+def unpack_int24(raw, count: int | None = None) -> np.ndarray:
+    """Converts big-endian 24-bit two's complement samples to int32.
+
+    :param raw: bytes-like object with packed samples.
+    :param count: Number of samples to convert, all complete samples by default.
+    :return: 1-D int32 array.
+    """
+    data = np.frombuffer(raw, dtype=np.uint8)
+    if count is None:
+        count = len(data) // BYTES_PER_SAMPLE
+    triplets = data[:count * BYTES_PER_SAMPLE].reshape(count, BYTES_PER_SAMPLE).astype(np.int32)
+
+    words = (triplets[:, 0] << 16) | (triplets[:, 1] << 8) | triplets[:, 2]
+    return (words ^ 0x800000) - 0x800000
+
+
+def decode_frames(raw, n_frames: int | None = None, channels: int = NUM_CHANNELS,
+                  out: np.ndarray | None = None, status_out: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """Decodes a block of concatenated ADS1299 frames in one pass.
+
+    :param raw: bytes, bytearray or memoryview holding the raw frames.
+    :param n_frames: Number of frames to decode, all complete frames by default.
+    :param channels: Channels following each status word (8 for the ADS1299).
+    :param out: Optional preallocated int32 array of shape (n_frames, channels).
+    :param status_out: Optional preallocated int32 array of n_frames items.
+    :return: Tuple (status words, samples) with shapes (n_frames,) and (n_frames, channels).
+    """
+    size = frame_size(channels)
+    data = np.frombuffer(raw, dtype=np.uint8)
+    if n_frames is None:
+        n_frames = len(data) // size
+
+    words = data[:n_frames * size].reshape(n_frames, size // BYTES_PER_SAMPLE, BYTES_PER_SAMPLE).astype(np.int32)
+    words = (words[:, :, 0] << 16) | (words[:, :, 1] << 8) | words[:, :, 2]
+
+    if status_out is None:
+        status_out = np.empty(n_frames, dtype=np.int32)
+    if out is None:
+        out = np.empty((n_frames, channels), dtype=np.int32)
+
+    status_out[:n_frames] = words[:, 0]
+    np.subtract(words[:, 1:] ^ 0x800000, 0x800000, out=out[:n_frames])
+
+    return status_out[:n_frames], out[:n_frames]
@@ -0,0 +1,134 @@
+"""
+Render pacing of the dashboard.
+
+RenderPacer decides how many received samples each render tick plays into the
+plot ring. The playback rate is the measured sample clock: frames counted
+between device timestamps of the binary packets (host arrival times for the
+JSON lines, which carry none), not the configured rate. Playback starts once
+`prebuffer_s` of samples are waiting and rebuffers after an underrun. In
+between the speed is nudged (at most DRIFT_LIMIT) to keep the backlog halfway
+between the prebuffer and the latency target, which absorbs the error of the
+rate estimate. When the backlog exceeds `latency_target_s` it is caught up in one tick: every sample
+still goes through the ring, only the intermediate renders are dropped.
+"""
+from protocol import TICKS_MODULUS
+
+# Shortest interval of a sample clock measurement (s), a quarter of it for the first one
+RATE_WINDOW_S = 1.0
+# Longest tick interval credited to the playback, a stalled UI catches up through the latency target instead
+MAX_TICK_S = 0.25
+# Largest playback speed correction
+DRIFT_LIMIT = 0.05
+
+
+class RenderPacer:
+    """
+    Samples per render tick from the measured sample clock, with a bounded
+    display latency.
+    """
+
+    def __init__(self, nominal_rate: float, latency_target_s: float = 0.25, prebuffer_s: float = 0.1):
+        """
+        :param nominal_rate: Configured sample rate, used until the first measurement.
+        :param latency_target_s: Backlog (s) above which the playback catches up.
+        :param prebuffer_s: Backlog (s) left after a catch-up and needed to (re)start the playback.
+        """
+        if not 0 < prebuffer_s < latency_target_s:
+            raise ValueError(f"Prebuffer {prebuffer_s} s must be in (0, {latency_target_s}) s")
+        self.rate = float(nominal_rate)
+        self.latency_target_s = latency_target_s
+        self.prebuffer_s = prebuffer_s
+        self.reset()
+
+    def reset(self) -> None:
+        """Restarts the measurement and the playback, e.g. on a new connection."""
+        self.measured = False   # True once rate comes from a measurement
+        self.playing = False
+        self.underruns = 0      # Ticks that found fewer samples than due
+        self.catch_ups = 0      # Ticks that caught up the backlog
+        self.skipped = 0        # Samples played at once by the catch-ups, never rendered on their own
+        self._anchor = None     # (clock in s, frames received before it)
+        self._frames = 0        # Frames received
+        self._device_us = None  # Last device timestamp
+        self._device_s = 0.0
+        self._last_tick = None
+        self._credit = 0.0      # Fraction of a sample carried to the next tick
+
+    def arrived(self, frames: int, device_us: int | None, rx_s: float) -> None:
+        """
+        Registers a received block.
+
+        :param frames: Frames of the block.
+        :param device_us: Device timestamp (ticks_us) of its first frame, None if unknown.
+        :param rx_s: Host arrival time (s) of the block.
+        """
+        if device_us is None:
+            clock_s = rx_s
+        else:
+            # Device clock unwrapped into seconds since the first block
+            if self._device_us is not None:
+                self._device_s += (device_us - self._device_us) % TICKS_MODULUS / 1e6
+            self._device_us = device_us
+            clock_s = self._device_s
+
+        if self._anchor is None:
+            self._anchor = (clock_s, self._frames)
+        else:
+            elapsed = clock_s - self._anchor[0]
+            if elapsed >= (RATE_WINDOW_S if self.measured else RATE_WINDOW_S / 4):
+                rate = (self._frames - self._anchor[1]) / elapsed
+                self.rate = rate if not self.measured else 0.5 * self.rate + 0.5 * rate
+                self.measured = True
+                self._anchor = (clock_s, self._frames)
+        self._frames += frames
+
+    def due(self, now_s: float, backlog: int) -> int:
+        """
+        Samples to play at this tick.
+
+        :param now_s: Current time (s), same clock as the arrival times.
+        :param backlog: Samples waiting to be played.
+        :return: Samples to take, at most backlog.
+        """
+        elapsed = min(now_s - self._last_tick, MAX_TICK_S) if self._last_tick is not None else 0.0
+        self._last_tick = now_s
+        if not self.playing:
+            if backlog < self.prebuffer_s * self.rate:
+                return 0
+            self.playing = True
+            self._credit = 0.0
+            elapsed = 0.0
+
+        # Faster above the middle of the backlog range, slower below it
+        middle = (self.prebuffer_s + self.latency_target_s) / 2
+        drift = (backlog / self.rate - middle) / self.latency_target_s
+        self._credit += self.rate * elapsed * (1 + min(max(drift, -DRIFT_LIMIT), DRIFT_LIMIT))
+        count = int(self._credit)
+        self._credit -= count
+        if count > backlog:
+            # Underrun: play what is left and wait for a new prebuffer
+            self.underruns += 1
+            self.playing = False
+            self._credit = 0.0
+            return backlog
+
+        excess = backlog - count - int(self.prebuffer_s * self.rate)
+        if backlog - count > self.latency_target_s * self.rate and excess > 0:
+            self.catch_ups += 1
+            self.skipped += excess
+            count += excess
+        return count
+
+    def latency(self, now_s: float, stamp: float | None, behind: int) -> float | None:
+        """
+        Display latency of the newest sample played: time since its block
+        arrived plus its age inside the block.
+
+        :param now_s: Current time (s), same clock as the arrival times.
+        :param stamp: Arrival time of its block, see BlockFifo.last_stamp.
+        :param behind: Rows of its block after it, see BlockFifo.last_behind.
+        :return: Latency (s), None before the first sample.
+        """
+        if stamp is None:
+            return None
+        return now_s - stamp + behind / self.rate
@@ -0,0 +1,279 @@
+"""
+Host-side decoders of the telemetry built by src/telemetry.py (binary
+packets) and by src/main.py (legacy JSON lines).
+
+Packet layout (little-endian header):
+    magic (2s) | version (B) | flags (B) | sequence (I) | timestamp_us (I) | sample_count (H) | channel_mask (I)
+followed by sample_count frames of the channels set in channel_mask. Samples
+are 24-bit big-endian (flags bit 0 = 0) or 32-bit little-endian (bit 0 = 1).
+Stats packets (flags bit 1) carry sample_count int32 little-endian words
+(STATS_FIELDS) instead of frames.
+"""
+import abc
+import json
+import re
+import struct
+from collections import deque
+
+import numpy as np
+from frames import unpack_int24
+
+MAGIC = b"AD"
+VERSION = 1
+HEADER = struct.Struct("<2sBBIIHI")
+FORMAT_INT32 = 0x01
+FLAG_STATS = 0x02
+STATS_FIELDS = ("gc_collections", "gc_forced", "gc_last_us", "gc_worst_us", "gc_total_ms", "drdy_worst_latency_us",
+                "mem_free")
+
+# The device wraps sequence numbers at 2**30 so they stay MicroPython small ints
+SEQUENCE_MODULUS = 1 << 30
+# Device timestamps are ticks_us(), which wraps at 2**30 on the ESP32 port
+TICKS_MODULUS = 1 << 30
+
+# Values of a legacy JSON line: {"Seq":<n>,"Ch0":<n>,...}\n
+NUM_JSON_CHANNELS = 8
+JSON_VALUE = re.compile(rb'":(-?\d+)')
+
+
+def mask_to_channels(channel_mask: int) -> list[int]:
+    """Channel indexes set in a channel mask, lowest first."""
+    return [i for i in range(32) if channel_mask >> i & 1]
+
+
+class SequenceTracker:
+    """
+    Follows the device frame sequence numbers and records every gap, so the
+    exact sequence numbers of the missing frames can be reported.
+    """
+
+    def __init__(self, max_gaps: int = 1024):
+        self._expected = None
+        self.lost_frames = 0
+        self.gaps = deque(maxlen=max_gaps)  # (first missing sequence, count)
+
+    def update(self, sequence: int, count: int = 1) -> int:
+        """
+        Registers count consecutive frames starting at sequence.
+
+        :param sequence: Sequence number of the first frame.
+        :param count: Number of frames.
+        :return: Number of frames missing right before this run.
+        """
+        expected = self._expected
+        missing = 0
+        if expected is not None and sequence != expected:
+            gap = (sequence - expected) % SEQUENCE_MODULUS
+            # Anything beyond half the range is a duplicate or a device restart
+            if gap < SEQUENCE_MODULUS // 2:
+                missing = gap
+                self.lost_frames += gap
+                self.gaps.append((expected, gap))
+        self._expected = (sequence + count) % SEQUENCE_MODULUS
+        return missing
+
+    def missing_sequences(self) -> list[int]:
+        """Every recorded missing sequence number, oldest first."""
+        return [(first + i) % SEQUENCE_MODULUS for first, count in self.gaps for i in range(count)]
+
+
+class StreamDecoder(abc.ABC):
+    """
+    Framing of a TCP stream without building strings. The socket writes
+    straight into a preallocated bytearray (recv_into), decode() splits every
+    complete message in it in one pass and converts them as one NumPy block,
+    then only the incomplete tail is moved to the front of the buffer.
+
+    A block is {"seq": first sequence, "ts": device time of the first frame or
+    None, "channels": channel indexes, "samples": int32 array (frames, channels)}.
+    Subclasses implement _decode().
+    """
+
+    def __init__(self, size: int = 1 << 16):
+        self._buffer = bytearray(size)
+        self._view = memoryview(self._buffer)
+        self._filled = 0
+        self.sequences = SequenceTracker()
+        self.resyncs = 0
+
+    @property
+    def lost_frames(self) -> int:
+        return self.sequences.lost_frames
+
+    def recv_into(self, sock) -> int:
+        """
+        Receives from the socket into the free space of the buffer.
+
+        :param sock: Connected socket.
+        :return: Bytes received, 0 once the peer has closed the connection.
+        """
+        if self._filled == len(self._buffer):
+            self._grow(len(self._buffer) * 2)
+        received = sock.recv_into(self._view[self._filled:])
+        self._filled += received
+        return received
+
+    def feed(self, data) -> dict | None:
+        """
+        Appends data (instead of receiving it) and decodes it.
+
+        :param data: Bytes-like object, e.g. a chunk read from a capture file.
+        :return: Block with every complete message, None if there is none.
+        """
+        end = self._filled + len(data)
+        if end > len(self._buffer):
+            self._grow(max(end, len(self._buffer) * 2))
+        self._view[self._filled:end] = data
+        self._filled = end
+        return self.decode()
+
+    def decode(self) -> dict | None:
+        """
+        Decodes every complete message received so far as one block, a
+        message whose layout differs from the first one starts the next block.
+
+        :return: Block, None if there is no complete message.
+        """
+        used, block = self._decode(self._filled)
+        rest = self._filled - used
+        if used and rest:
+            self._view[:rest] = self._view[used:self._filled]
+        self._filled = rest
+        return block
+
+    @abc.abstractmethod
+    def _decode(self, end: int) -> tuple[int, dict | None]:
+        """
+        :param end: Bytes held in self._buffer.
+        :return: Tuple (bytes consumed, block or None).
+        """
+
+    def _grow(self, size: int) -> None:
+        buffer = bytearray(size)
+        buffer[:self._filled] = self._view[:self._filled]
+        self._view.release()
+        self._buffer = buffer
+        self._view = memoryview(buffer)
+
+    def _track(self, sequences: np.ndarray) -> None:
+        # One SequenceTracker update per run of consecutive sequence numbers
+        breaks = np.flatnonzero(np.diff(sequences) % SEQUENCE_MODULUS != 1) + 1
+        start = 0
+        for stop in [*breaks.tolist(), len(sequences)]:
+            self.sequences.update(int(sequences[start]), stop - start)
+            start = stop
+
+
+class TelemetryDecoder(StreamDecoder):
+    """
+    Decoder of the binary packets. The packets of a block are located with
+    their headers and their payloads are converted with a single
+    unpack_int24() (or frombuffer) call. The last stats packet received is
+    kept in stats, stats_count tells when a new one arrived.
+    """
+
+    def __init__(self, size: int = 1 << 16):
+        super().__init__(size)
+        self.stats = {}
+        self.stats_count = 0
+
+    def _decode(self, end: int) -> tuple[int, dict | None]:
+        buf = self._buffer
+        view = self._view
+        pos = 0
+        parts = []
+        first = None
+        layout = None
+        n_frames = 0
+
+        while end - pos >= HEADER.size:
+            magic, version, flags, sequence, timestamp, count, channel_mask = HEADER.unpack_from(buf, pos)
+            if magic != MAGIC or version != VERSION:
+                # Lost framing, skip to the next candidate magic
+                self.resyncs += 1
+                next_pos = buf.find(MAGIC, pos + 1, end)
+                pos = next_pos if next_pos >= 0 else end - 1
+                continue
+
+            if flags & FLAG_STATS:
+                size = HEADER.size + 4 * count
+                if end - pos < size:
+                    break
+                self.stats = dict(zip(STATS_FIELDS, struct.unpack_from(f"<{count}i", buf, pos + HEADER.size)))
+                self.stats_count += 1
+                pos += size
+                continue
+
+            if layout is not None and layout != (flags & FORMAT_INT32, channel_mask):
+                break
+            bytes_per_sample = 4 if flags & FORMAT_INT32 else 3
+            n_channels = bin(channel_mask).count("1")
+            size = HEADER.size + count * n_channels * bytes_per_sample
+            if end - pos < size:
+                break
+
+            if first is None:
+                first = (sequence, timestamp)
+                layout = (flags & FORMAT_INT32, channel_mask)
+            parts.append(view[pos + HEADER.size:pos + size])
+            self.sequences.update(sequence, count)
+            n_frames += count
+            pos += size
+
+        if not parts:
+            return pos, None
+
+        raw = parts[0] if len(parts) == 1 else b"".join(parts)
+        if layout[0]:
+            samples = np.frombuffer(raw, dtype="<i4").astype(np.int32)
+        else:
+            samples = unpack_int24(raw)
+        channels = mask_to_channels(layout[1])
+        return pos, {"seq": first[0], "ts": first[1], "channels": channels,
+                     "samples": samples.reshape(n_frames, len(channels))}
+
+
+class JsonLineDecoder(StreamDecoder):
+    """
+    Decoder of the legacy JSON lines. Everything up to the last newline is
+    split at once: the values of all the lines are extracted by one regular
+    expression pass and converted by NumPy, json.loads() is only used for a
+    chunk whose lines do not all have the layout of the first one.
+    """
+
+    def _decode(self, end: int) -> tuple[int, dict | None]:
+        last = self._buffer.rfind(b"\n", 0, end)
+        if last < 0:
+            return 0, None
+
+        chunk = bytes(self._view[:last + 1])
+        n_lines = chunk.count(b"\n")
+        n_fields = chunk.count(b":", 0, chunk.find(b"\n"))
+        values = JSON_VALUE.findall(chunk)
+
+        if n_fields > 1 and chunk.startswith(b'{"Seq":') and len(values) == n_lines * n_fields:
+            table = np.array(values).astype(np.int64).reshape(n_lines, n_fields)
+            sequences = table[:, 0]
+            samples = table[:, 1:].astype(np.int32)
+            channels = list(range(n_fields - 1))
+        else:
+            sequences, channels, samples = self._decode_lines(chunk)
+            if not len(sequences):
+                return last + 1, None
+
+        self._track(sequences)
+        return last + 1, {"seq": int(sequences[0]), "ts": None, "channels": channels, "samples": samples}
+
+    def _decode_lines(self, chunk: bytes) -> tuple[np.ndarray, list[int], np.ndarray]:
+        # Slow path, one json.loads() per line: malformed lines are skipped
+        rows = []
+        for line in chunk.split(b"\n"):
+            try:
+                payload = json.loads(line)
+                rows.append([payload["Seq"]] + [payload[f"Ch{ch}"] for ch in range(NUM_JSON_CHANNELS)])
+            except (ValueError, KeyError, TypeError):
+                self.resyncs += 1 if line else 0
+        if not rows:
+            return np.empty(0, dtype=np.int64), [], np.empty((0, 0), dtype=np.int32)
+        table = np.array(rows, dtype=np.int64)
+        return table[:, 0], list(range(NUM_JSON_CHANNELS)), table[:, 1:].astype(np.int32)
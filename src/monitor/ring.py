@@ -0,0 +1,116 @@
+"""
+NumPy buffers of the dashboard rendering path.
+
+SampleRing keeps the last `window` samples of every channel in a
+preallocated (channels, 2 * window) array. Every block is written twice, at
+its position and one window further, so the latest window is always one
+contiguous view and the plot never copies or reorders it. BlockFifo holds the
+received blocks, with their arrival time, until the playback takes them.
+"""
+from collections import deque
+
+import numpy as np
+
+
+class SampleRing:
+    """
+    (channels, window) ring of samples with vectorized block appends.
+    """
+
+    def __init__(self, channels: int, window: int, dtype=np.float32):
+        self.channels = channels
+        self.window = window
+        self._data = np.zeros((channels, 2 * window), dtype=dtype)
+        self._head = 0
+        self.count = 0  # Valid samples, up to window
+        self.total = 0  # Samples appended since the start
+
+    def append(self, block: np.ndarray) -> None:
+        """
+        Appends a block of samples, only its last window samples are kept.
+
+        :param block: Array of shape (n, channels), one row per frame.
+        """
+        n = len(block)
+        if n == 0:
+            return
+        self.total += n
+        if n > self.window:
+            block = block[-self.window:]
+            n = self.window
+
+        window = self.window
+        head = self._head
+        data = self._data
+        first = min(n, window - head)
+        part = block[:first].T
+        data[:, head:head + first] = part
+        data[:, head + window:head + window + first] = part
+        if first < n:
+            part = block[first:].T
+            data[:, :n - first] = part
+            data[:, window:window + n - first] = part
+
+        self._head = (head + n) % window
+        self.count = min(self.count + n, window)
+
+    def view(self) -> np.ndarray:
+        """
+        The latest window, oldest sample first, without copying.
+
+        :return: View of shape (channels, window), valid until the next append().
+        """
+        return self._data[:, self._head:self._head + self.window]
+
+    def clear(self) -> None:
+        self._data[:] = 0
+        self._head = 0
+        self.count = 0
+
+
+class BlockFifo:
+    """
+    FIFO of (n, channels) blocks that hands out any number of rows at once.
+    """
+
+    def __init__(self):
+        self._blocks = deque()  # (block, stamp)
+        self._offset = 0        # Rows of the first block already taken
+        self.samples = 0        # Rows waiting
+        self.last_stamp = None  # Stamp of the block of the last row taken
+        self.last_behind = 0    # Rows of that block after the last row taken
+
+    def put(self, block: np.ndarray, stamp: float = 0.0) -> None:
+        """
+        :param block: Array (n, channels).
+        :param stamp: Arrival time of the block, e.g. time.monotonic().
+        """
+        if len(block):
+            self._blocks.append((block, stamp))
+            self.samples += len(block)
+
+    def take(self, n: int) -> np.ndarray | None:
+        """
+        Removes up to n of the oldest rows.
+
+        :param n: Rows wanted.
+        :return: Array of at most n rows, None if the FIFO is empty.
+        """
+        parts = []
+        while n > 0 and self._blocks:
+            block, stamp = self._blocks[0]
+            rows = block[self._offset:self._offset + n]
+            parts.append(rows)
+            n -= len(rows)
+            self._offset += len(rows)
+            self.last_stamp = stamp
+            self.last_behind = len(block) - self._offset
+            if self._offset == len(block):
+                self._blocks.popleft()
+                self._offset = 0
+
+        if not parts:
+            return None
+        rows = parts[0] if len(parts) == 1 else np.concatenate(parts)
+        self.samples -= len(rows)
+        return rows
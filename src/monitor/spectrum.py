@@ -0,0 +1,159 @@
+"""
+Incremental Welch power spectral density of the dashboard.
+
+WelchPSD reads overlapped segments from a SampleRing as the samples arrive.
+Each new segment is detrended, multiplied by a precomputed Hann window and
+transformed once; its periodogram replaces the oldest one of a fixed set of
+`averages` segments and a running sum keeps their mean. Full-window PSDs are
+never recomputed. update() only takes the segments whose measured cost fits
+its time budget, the rest wait for the next call (or are skipped once the ring
+has overwritten them). Every call that defers lowers the cost estimate, so one
+slow segment cannot freeze the view.
+"""
+import time
+
+import numpy as np
+
+# EEG bands (Hz), upper edge excluded
+BANDS = (("delta", 1.0, 4.0), ("theta", 4.0, 8.0), ("alpha", 8.0, 13.0), ("beta", 13.0, 30.0),
+         ("gamma", 30.0, 45.0))
+# Factor applied to the segment cost estimate by every call that takes nothing because of it
+DEFER_DECAY = 0.8
+
+
+class WelchPSD:
+    """
+    Welch PSD (one-sided, V^2/Hz) and band power (V^2) of every channel of a
+    SampleRing, updated segment by segment.
+    """
+
+    def __init__(self, ring, fs: float, nperseg: int, overlap: float = 0.5, averages: int = 8,
+                 bands=BANDS):
+        """
+        :param ring: SampleRing the segments are read from, its window holds at least nperseg samples.
+        :param fs: Sample rate (Hz).
+        :param nperseg: Samples per segment, the frequency resolution is fs / nperseg.
+        :param overlap: Fraction of a segment shared with the next one.
+        :param averages: Segments averaged by the PSD.
+        :param bands: (name, low, high) frequency bands of band_power.
+        """
+        if nperseg > ring.window:
+            raise ValueError(f"Segment of {nperseg} samples longer than the {ring.window} samples window")
+        self.ring = ring
+        self.fs = fs
+        self.nperseg = nperseg
+        self.step = max(1, int(nperseg * (1 - overlap)))
+        self.averages = averages
+        self.freqs = np.fft.rfftfreq(nperseg, 1 / fs)
+
+        # Hann window and density scaling, one-sided: every bin but DC (and Nyquist) counts twice
+        self._window = np.hanning(nperseg + 1)[:-1].astype(np.float32)
+        scale = np.full(len(self.freqs), 2 / (fs * np.sum(self._window.astype(np.float64) ** 2)))
+        scale[0] /= 2
+        if nperseg % 2 == 0:
+            scale[-1] /= 2
+        self._scale = scale
+        self._offsets = np.arange(nperseg)
+
+        self.band_names = [name for name, _, _ in bands]
+        df = fs / nperseg
+        self._band_matrix = np.array([((self.freqs >= low) & (self.freqs < high)) * df for _, low, high in bands])
+
+        self._periodograms = np.zeros((averages, ring.channels, len(self.freqs)))
+        self._sum = np.zeros((ring.channels, len(self.freqs)))
+        self.psd = np.zeros((ring.channels, len(self.freqs)))
+        self.band_power = np.zeros((ring.channels, len(bands)))
+        self.reset()
+        self._segment_s = self._measure()  # Time per segment, measured before the first update
+
+    def reset(self) -> None:
+        """Forgets every segment, the next one ends nperseg samples after the current ring position."""
+        self._periodograms[:] = 0
+        self._sum[:] = 0
+        self.psd[:] = 0
+        self.band_power[:] = 0
+        self._slot = 0
+        self.segments = 0  # Segments in the average
+        self.skipped = 0   # Segments overwritten by the ring before they were taken
+        self.deferred = 0  # Calls that took nothing because no segment fitted the budget
+        self._next_end = self.ring.total + self.nperseg
+
+    @property
+    def pending(self) -> int:
+        """Complete segments not taken yet."""
+        available = self.ring.total - self._next_end
+        return available // self.step + 1 if available >= 0 else 0
+
+    def update(self, budget_s: float) -> int:
+        """
+        Takes the new segments whose estimated cost fits in the time budget,
+        none if a single one does not fit (the estimate is then lowered by
+        DEFER_DECAY).
+
+        :param budget_s: Time budget of this call (s).
+        :return: Segments taken.
+        """
+        ring = self.ring
+        total = ring.total
+        # Segments whose start was overwritten by the ring cannot be taken anymore
+        oldest_end = total - ring.window + self.nperseg
+        if self._next_end < oldest_end:
+            behind = -(-(oldest_end - self._next_end) // self.step)
+            self.skipped += behind
+            self._next_end += behind * self.step
+
+        count = self.pending
+        if not count:
+            return 0
+        if count > self.averages:
+            # Only the newest segments stay in the average
+            self.skipped += count - self.averages
+            self._next_end += (count - self.averages) * self.step
+            count = self.averages
+        count = min(count, int(budget_s / self._segment_s))
+        if not count:
+            # A single slow segment (GC pause, cold cache) must not keep the estimate above the budget for good
+            self.deferred += 1
+            self._segment_s *= DEFER_DECAY
+            return 0
+
+        start = time.perf_counter()
+        ends = self._next_end + self.step * np.arange(count)
+        # Sample indexes of the segments in the ring view, shape (count, nperseg)
+        index = (ends - self.nperseg - (total - ring.window))[:, None] + self._offsets
+        periodograms = self._periodogram(ring.view()[:, index])
+
+        for i in range(count):
+            self._sum -= self._periodograms[self._slot]
+            self._periodograms[self._slot] = periodograms[:, i]
+            self._sum += periodograms[:, i]
+            self._slot = (self._slot + 1) % self.averages
+        self.segments = min(self.segments + count, self.averages)
+        self._next_end += count * self.step
+
+        # A full sum from time to time, the running one accumulates rounding errors
+        if self._slot == 0:
+            self._sum = self._periodograms.sum(axis=0)
+        np.divide(self._sum, self.segments, out=self.psd)
+        np.matmul(self.psd, self._band_matrix.T, out=self.band_power)
+
+        # The estimate follows slowdowns at once and speedups slowly, so it stays on the safe side
+        cost = (time.perf_counter() - start) / count
+        self._segment_s = cost if cost > self._segment_s else 0.9 * self._segment_s + 0.1 * cost
+        return count
+
+    def _periodogram(self, segments: np.ndarray) -> np.ndarray:
+        # (channels, count, nperseg) samples -> (channels, count, bins) periodograms
+        segments = segments - segments.mean(axis=2, keepdims=True)
+        spectra = np.fft.rfft(segments * self._window, axis=2)
+        return (spectra.real ** 2 + spectra.imag ** 2) * self._scale
+
+    def _measure(self) -> float:
+        # Cost of one segment of every channel with the update bookkeeping, the first transform warms up the FFT
+        segment = np.zeros((self.ring.channels, 1, self.nperseg), dtype=np.float32)
+        self._periodogram(segment)
+        start = time.perf_counter()
+        periodogram = self._periodogram(segment)
+        np.divide(self._sum + periodogram[:, 0], 1, out=self.psd)
+        np.matmul(self.psd, self._band_matrix.T, out=self.band_power)
+        return time.perf_counter() - start
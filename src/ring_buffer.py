@@ -1,26 +1,82 @@
 # #! /bin/MicroPython
 import array
 
+from micropython import const
+
+# FrameRingBuffer frame layout: [sequence, timestamp, status, Ch0, Ch1, ...]
+SEQUENCE = const(0)
+TIMESTAMP = const(1)
+STATUS = const(2)
+FIRST_CHANNEL = const(3)
+
+# Sequence numbers wrap like ticks_us() so they always stay small ints
+SEQUENCE_MASK = const(0x3FFFFFFF)
+
+# FrameRingBuffer overflow policies
+DROP_NEWEST = const(0)  # Reject the incoming frame
+DROP_OLDEST = const(1)  # Overwrite the oldest stored frame
+DECIMATE = const(2)     # Above the high-water mark keep only one of every `decimation` frames
+
+
+def _store_frame_py(view, start: int, channels, n_channels: int, sequence: int, timestamp: int, status: int) -> None:
+    """This function writes one frame at index start of a FrameRingBuffer
+       storage, it is the pure bytecode version used when the viper emitter is
+       not available, see _ring_buffer_viper.py.
+
+    :view: memoryview of the buffer storage.
+    :start: Index of the first item of the frame.
+    :channels: Array with at least n_channels samples.
+    :n_channels: Number of samples to be copied.
+    :sequence: Sequence number of the frame.
+    :timestamp: Acquisition time of the frame.
+    :status: Status word of the frame.
+    :returns: None
+
+    """
+    view[start + SEQUENCE] = sequence
+    view[start + TIMESTAMP] = timestamp
+    view[start + STATUS] = status
+    view[start + FIRST_CHANNEL:start + FIRST_CHANNEL + n_channels] = channels
+
+
+try:
+    from _ring_buffer_viper import store_frame
+    ACCELERATED = True
+except (ImportError, SyntaxError, AttributeError):
+    store_frame = _store_frame_py
+    ACCELERATED = False
+
 
 class RingBuffer:
     """This class provides a circular buffer implementation optimized for
     MicroPython using array.array to minimize memory fragmentation and
     allocation during high-speed data acquisition.
+
+    The storage is rounded up to a power of two so indexes wrap with a mask
+    instead of a modulo.
     """
 
     def __init__(self, size: int, typecode: str = 'i'):
         """Initialize the queue with a fixed size and data type.
 
-        :size: Maximum number of elements the queue can hold.
+        :size: Minimum number of elements the queue can hold, the capacity is
+               rounded up so that size + 1 is a power of two.
         :typecode: Type of the elements in the array (e.g., 'i' for signed int, 'f' for float).
         :returns: None
 
         """
         # We add 1 to size to distinguish between full and empty states
-        self._max_size = size + 1
-        self._buffer = array.array(typecode, [0] * self._max_size)
+        max_size = 1
+        while max_size < size + 1:
+            max_size <<= 1
+
+        self._max_size = max_size
+        self._mask = max_size - 1
+        self._buffer = array.array(typecode, [0] * max_size)
+        self._view = memoryview(self._buffer)
         self._head = 0
         self._tail = 0
+        self.overflows = 0  # Items rejected because the buffer was full
 
     def init(self) -> None:
         """Resets the queue pointers to empty the buffer without reallocating memory.
@@ -45,7 +101,23 @@ class RingBuffer:
         :returns: True if full, False otherwise.
 
         """
-        return ((self._head + 1) % self._max_size) == self._tail
+        return ((self._head + 1) & self._mask) == self._tail
+
+    def capacity(self) -> int:
+        """Maximum number of items the buffer can hold.
+
+        :returns: Capacity of the buffer.
+
+        """
+        return self._mask
+
+    def count(self) -> int:
+        """Number of items waiting to be read.
+
+        :returns: Stored items.
+
+        """
+        return (self._head - self._tail) & self._mask
 
     def write(self, item: int) -> bool:
         """Push a single item into the circular buffer.
@@ -54,9 +126,10 @@ class RingBuffer:
         :returns: True if successful, False if the buffer is full.
 
         """
-        next_head = (self._head + 1) % self._max_size
+        next_head = (self._head + 1) & self._mask
 
         if next_head == self._tail:
+            self.overflows += 1
             return False
 
         self._buffer[self._head] = item
@@ -73,5 +146,299 @@ class RingBuffer:
             return None
 
         item = self._buffer[self._tail]
-        self._tail = (self._tail + 1) % self._max_size
+        self._tail = (self._tail + 1) & self._mask
         return item
+
+    def write_many(self, src) -> int:
+        """Push as many items of src as fit with at most two slice copies.
+
+        :src: array.array (same typecode) or memoryview with the items.
+        :returns: Number of items written, less than len(src) if the buffer
+                  became full.
+
+        """
+        head = self._head
+        n_items = min(len(src), self._mask - ((head - self._tail) & self._mask))
+        self.overflows += len(src) - n_items
+        if n_items == 0:
+            return 0
+
+        src_view = memoryview(src)
+        first = min(n_items, self._max_size - head)
+        self._view[head:head + first] = src_view[0:first]
+        if first < n_items:
+            self._view[0:n_items - first] = src_view[first:n_items]
+
+        self._head = (head + n_items) & self._mask
+        return n_items
+
+    def read_into(self, dst) -> int:
+        """Pop up to len(dst) of the oldest items into dst with at most two
+        slice copies.
+
+        :dst: array.array (same typecode) or memoryview receiving the items.
+        :returns: Number of items copied, 0 if the buffer is empty.
+
+        """
+        tail = self._tail
+        n_items = min(len(dst), (self._head - tail) & self._mask)
+        if n_items == 0:
+            return 0
+
+        dst_view = memoryview(dst)
+        first = min(n_items, self._max_size - tail)
+        dst_view[0:first] = self._view[tail:tail + first]
+        if first < n_items:
+            dst_view[first:n_items] = self._view[0:n_items - first]
+
+        self._tail = (tail + n_items) & self._mask
+        return n_items
+
+    def contiguous_spans(self) -> tuple:
+        """Zero-copy views of the stored items in FIFO order, call advance()
+        once they have been consumed (e.g. sent to a socket or a file).
+
+        :returns: A tuple with up to two memoryview slices of the backing array.
+
+        """
+        head = self._head
+        tail = self._tail
+
+        if head == tail:
+            return ()
+        if head > tail:
+            return (self._view[tail:head],)
+        if head == 0:
+            return (self._view[tail:],)
+        return (self._view[tail:], self._view[0:head])
+
+    def advance(self, n_items: int) -> None:
+        """Release items previously obtained with contiguous_spans().
+
+        :n_items: Number of items to be released.
+        :returns: None
+
+        """
+        self._tail = (self._tail + min(n_items, self.count())) & self._mask
+
+
+class FrameRingBuffer:
+    """This class provides a circular buffer of whole frames. Each frame is
+    stored interleaved (sequence number, timestamp and status word followed by
+    the channel samples) in a single array.array with one head/tail pair, so
+    a producer pays one call per frame instead of one call per channel.
+
+    Every offered frame gets the next sequence number, including the ones
+    dropped by the overflow policy, so the receiver can tell exactly which
+    frames are missing.
+    """
+
+    def __init__(self, frames: int, channels: int = 8, typecode: str = 'i', policy: int = DROP_NEWEST,
+                 decimation: int = 2):
+        """Initialize the buffer with a fixed number of frames.
+
+        :frames: Maximum number of frames the buffer can hold.
+        :channels: Channels per frame, 8 for one ADS1299 or 16 for two.
+        :typecode: Type of the elements in the array (e.g., 'i' for signed int).
+        :policy: What happens when the buffer is full, could be:
+                 DROP_NEWEST -> The incoming frame is discarded.
+                 DROP_OLDEST -> The oldest frame is overwritten. The producer
+                                moves the tail, do not use it with a reader
+                                running on another thread.
+                 DECIMATE    -> Above 3/4 of the capacity only one of every
+                                decimation frames is stored, if the buffer
+                                still fills up the incoming frame is discarded.
+        :decimation: Decimation factor used by the DECIMATE policy.
+        :returns: None
+
+        """
+        self._width = FIRST_CHANNEL + channels
+        self._channels = channels
+        # The viper copy works on 32-bit items only
+        self._store = store_frame if typecode == 'i' else _store_frame_py
+        # We add 1 to frames to distinguish between full and empty states
+        self._max_frames = frames + 1
+        self._buffer = array.array(typecode, [0] * (self._max_frames * self._width))
+        self._view = memoryview(self._buffer)
+        # Slicing a memoryview allocates, so the view of every stored frame is created once here and
+        # read_frames_into() copies them one by one without touching the heap
+        self._frame_views = [self._view[i * self._width:(i + 1) * self._width] for i in range(self._max_frames)]
+        self._dst = None
+        self._dst_view = None
+        self._head = 0
+        self._tail = 0
+
+        self.policy = policy
+        self.decimation = decimation
+        self._high_water = frames * 3 // 4
+        self._skip = 0
+
+        self.sequence = 0
+        self.reset_counters()
+
+    def init(self) -> None:
+        """Resets the buffer pointers to empty it without reallocating memory.
+
+        :returns: None
+
+        """
+        self._head = 0
+        self._tail = 0
+
+    def reset_counters(self) -> None:
+        """Resets the drop counters.
+
+        :returns: None
+
+        """
+        self.overflows = 0  # Frames lost because the buffer was full
+        self.decimated = 0  # Frames skipped by the DECIMATE policy
+
+    @property
+    def width(self) -> int:
+        """Number of items of each frame (sequence, timestamp, status + channels)."""
+        return self._width
+
+    def is_empty(self) -> bool:
+        """Checks if the buffer contains no frames.
+
+        :returns: True if empty, False otherwise.
+
+        """
+        return self._head == self._tail
+
+    def is_full(self) -> bool:
+        """Checks if the buffer has reached its maximum capacity.
+
+        :returns: True if full, False otherwise.
+
+        """
+        next_head = self._head + 1
+        if next_head == self._max_frames:
+            next_head = 0
+        return next_head == self._tail
+
+    def count(self) -> int:
+        """Number of frames waiting to be read.
+
+        :returns: Stored frames.
+
+        """
+        used = self._head - self._tail
+        if used < 0:
+            used += self._max_frames
+        return used
+
+    def dropped(self) -> int:
+        """Total number of frames discarded by the overflow policy.
+
+        :returns: Overflows plus decimated frames.
+
+        """
+        return self.overflows + self.decimated
+
+    def write_frame(self, channels, status: int = 0, timestamp: int = 0, sequence: int = -1) -> bool:
+        """Push a whole frame into the buffer, the frame gets the next
+        sequence number even if the policy drops it.
+
+        :channels: Array with the samples of every channel of the frame,
+                   array('i') when the buffer typecode is 'i'.
+        :status: Status word of the frame.
+        :timestamp: Acquisition time of the frame (e.g. ticks_us()).
+        :sequence: Sequence number assigned by the acquisition layer (e.g. the
+                   ADS1299 DRDY counter) so frames it missed also show up as
+                   gaps, by default the buffer numbers the frames itself.
+        :returns: True if the frame was stored, False if it was dropped.
+
+        """
+        if sequence < 0:
+            sequence = self.sequence
+        self.sequence = (sequence + 1) & SEQUENCE_MASK
+
+        if self.policy == DECIMATE and self.count() >= self._high_water:
+            self._skip += 1
+            if self._skip < self.decimation:
+                self.decimated += 1
+                return False
+            self._skip = 0
+
+        head = self._head
+        next_head = head + 1
+        if next_head == self._max_frames:
+            next_head = 0
+
+        if next_head == self._tail:
+            self.overflows += 1
+            if self.policy != DROP_OLDEST:
+                return False
+
+            tail = self._tail + 1
+            if tail == self._max_frames:
+                tail = 0
+            self._tail = tail
+
+        self._store(self._view, head * self._width, channels, self._channels, sequence, timestamp, status)
+        self._head = next_head
+        return True
+
+    def read_frames_into(self, dst, max_n: int, offset: int = 0) -> int:
+        """Pop up to max_n of the oldest frames (FIFO) copying them into dst,
+        one slice copy per frame from the preallocated frame views so the
+        call does not allocate. The memoryview of dst is kept until a
+        different dst is passed.
+
+        :dst: Array of at least offset + max_n * width items, frames are
+              stored interleaved in the same layout as in the buffer.
+        :max_n: Maximum number of frames to be read.
+        :offset: Index of dst where the first frame is written.
+        :returns: Number of frames copied.
+
+        """
+        n_frames = min(self.count(), max_n)
+        if n_frames == 0:
+            return 0
+
+        if dst is not self._dst:
+            self._dst = dst
+            self._dst_view = memoryview(dst)
+        dst_view = self._dst_view
+        frame_views = self._frame_views
+        width = self._width
+        max_frames = self._max_frames
+        tail = self._tail
+        pos = offset
+
+        for _ in range(n_frames):
+            dst_view[pos:pos + width] = frame_views[tail]
+            pos += width
+            tail += 1
+            if tail == max_frames:
+                tail = 0
+
+        self._tail = tail
+        return n_frames
+
+    def peek_contiguous(self) -> memoryview:
+        """Zero-copy view of the oldest frames that are contiguous in memory,
+        call advance() once they have been consumed. When the stored data wraps
+        around the end of the buffer a second call returns the remainder.
+
+        :returns: memoryview over n * width items (empty if no frames).
+
+        """
+        head = self._head
+        tail = self._tail
+        end = head if head >= tail else self._max_frames
+        return self._view[tail * self._width:end * self._width]
+
+    def advance(self, n_frames: int) -> None:
+        """Release frames previously obtained with peek_contiguous().
+
+        :n_frames: Number of frames to be released.
+        :returns: None
+
+        """
+        tail = self._tail + min(n_frames, self.count())
+        if tail >= self._max_frames:
+            tail -= self._max_frames
+        self._tail = tail
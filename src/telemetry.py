@@ -0,0 +1,361 @@
+# #! /bin/MicroPython
+import array
+import struct
+
+from micropython import const
+from utime import ticks_diff, ticks_ms
+
+from ring_buffer import FIRST_CHANNEL, SEQUENCE, SEQUENCE_MASK, TIMESTAMP
+
+########################################################################################################################
+#                                                      PROTOCOL                                                        #
+########################################################################################################################
+# Every packet starts with a little-endian header:
+#   magic (2s) | version (B) | flags (B) | sequence (I) | timestamp_us (I) | sample_count (H) | channel_mask (I)
+# followed by sample_count frames, each one holding the samples of the channels set in channel_mask (lowest first).
+# The sequence is the FrameRingBuffer number of the first frame (wraps at 2**30), the frames of a packet are always
+# consecutive so any gap between packets is exactly the set of frames dropped on the device.
+#   flags bit 0 = 0 -> 24-bit two's complement samples, big-endian as sent by the ADS1299
+#   flags bit 0 = 1 -> 32-bit signed samples, little-endian
+#   flags bit 1 = 1 -> Stats packet: sample_count 32-bit signed little-endian words follow instead of frames,
+#                      channel_mask is 0 and sequence is the one of the next frame. The words are STATS_FIELDS.
+MAGIC = b'AD'
+VERSION = const(1)
+HEADER_FMT = '<2sBBIIHI'
+HEADER_SIZE = const(18)
+
+FORMAT_INT24 = const(0)
+FORMAT_INT32 = const(1)
+FLAG_STATS = const(2)
+
+# Words of a stats packet, in order (heap.GCScheduler.fill_stats() writes them)
+STATS_FIELDS = ("gc_collections", "gc_forced", "gc_last_us", "gc_worst_us", "gc_total_ms", "drdy_worst_latency_us",
+                "mem_free")
+STATS_WORDS = const(7)
+
+_EAGAIN = const(11)
+
+# Legacy text telemetry, one JSON object per frame:
+#   {"Seq":<sequence>,"Ch0":<sample>,...,"Ch7":<sample>}\n
+JSON_LINE_MAX = const(160)  # Longest line of 8 channels, every number at its widest
+_JSON_SEQ = b'{"Seq":'
+_JSON_KEYS = tuple((',"Ch' + str(ch) + '":').encode() for ch in range(8))
+_JSON_END = b'}\n'
+
+
+def _put_int(buf, pos: int, value: int) -> int:
+    # Decimal digits written in place (least significant first, then reversed) instead of str(value)
+    if value < 0:
+        buf[pos] = 0x2D  # '-'
+        pos += 1
+        value = -value
+    start = pos
+    while True:
+        buf[pos] = 0x30 + value % 10
+        pos += 1
+        value //= 10
+        if not value:
+            break
+    end = pos - 1
+    while start < end:
+        buf[start], buf[end] = buf[end], buf[start]
+        start += 1
+        end -= 1
+    return pos
+
+
+def format_json_line(buf, frame, offset: int = 0, channels: int = 8) -> int:
+    """This function writes the legacy JSON line of one FrameRingBuffer frame
+       into a preallocated buffer, the same text str.format() gives but without
+       allocating the string or its encoded bytes.
+
+    :buf: bytearray of at least JSON_LINE_MAX bytes.
+    :frame: array('i') holding the frame (FrameRingBuffer layout).
+    :offset: Index of frame where the frame starts.
+    :channels: Channels of the frame, at most 8.
+    :returns: Length of the line written at the start of buf.
+
+    """
+    buf[0:7] = _JSON_SEQ
+    pos = _put_int(buf, 7, frame[offset + SEQUENCE])
+    base = offset + FIRST_CHANNEL
+    for ch in range(channels):
+        buf[pos:pos + 7] = _JSON_KEYS[ch]
+        pos = _put_int(buf, pos + 7, frame[base + ch])
+    buf[pos:pos + 2] = _JSON_END
+    return pos + 2
+
+
+class TelemetryPacker:
+    """This class builds binary telemetry packets into a preallocated buffer,
+    no heap allocation happens while packing: the packet views of every
+    length and the channel views of the source frames are created once.
+    """
+
+    def __init__(self, max_frames: int, channels: int = 8, sample_format: int = FORMAT_INT24):
+        """Preallocate the packet buffer.
+
+        :max_frames: Maximum number of frames per packet.
+        :channels: Channels per frame, all of them are sent.
+        :sample_format: FORMAT_INT24 (3 bytes per sample) or FORMAT_INT32.
+        :returns: None
+
+        """
+        self.channels = channels
+        self.channel_mask = (1 << channels) - 1
+        self.sample_format = sample_format
+        self.max_frames = max_frames
+        self.frame_bytes = channels * (4 if sample_format == FORMAT_INT32 else 3)
+
+        self._buffer = bytearray(HEADER_SIZE + max_frames * self.frame_bytes)
+        view = memoryview(self._buffer)
+        self._packets = [view[0:HEADER_SIZE + n * self.frame_bytes] for n in range(max_frames + 1)]
+        self._src = None
+        self._src_width = 0
+        self._src_frames = None
+
+    def pack(self, frames, n_frames: int, sequence: int, timestamp: int, width: int = 0) -> memoryview:
+        """Pack n_frames interleaved frames (FrameRingBuffer layout) into a
+        single packet.
+
+        :frames: array('i') holding the frames.
+        :n_frames: Number of frames to be packed, at most max_frames.
+        :sequence: Sequence number of the first frame.
+        :timestamp: Device timestamp (ticks_us) of the first frame.
+        :width: Items per frame in frames, FIRST_CHANNEL + channels by default.
+        :returns: memoryview of the packet, valid until the next pack().
+
+        """
+        channels = self.channels
+        if not width:
+            width = FIRST_CHANNEL + channels
+
+        buf = self._buffer
+        struct.pack_into(HEADER_FMT, buf, 0, MAGIC, VERSION, self.sample_format, sequence, timestamp,
+                         n_frames, self.channel_mask)
+        pos = HEADER_SIZE
+
+        if self.sample_format == FORMAT_INT32:
+            if frames is not self._src or width != self._src_width:
+                self._src = frames
+                self._src_width = width
+                src_view = memoryview(frames)
+                self._src_frames = [src_view[i * width + FIRST_CHANNEL:i * width + FIRST_CHANNEL + channels]
+                                    for i in range(len(frames) // width)]
+            src_frames = self._src_frames
+            frame_bytes = self.frame_bytes
+            for frame in range(n_frames):
+                # One raw copy per frame, the ESP32 is little-endian
+                buf[pos:pos + frame_bytes] = src_frames[frame]
+                pos += frame_bytes
+        else:
+            for frame in range(n_frames):
+                base = frame * width + FIRST_CHANNEL
+                for ch in range(channels):
+                    value = frames[base + ch]
+                    buf[pos] = (value >> 16) & 0xFF
+                    buf[pos + 1] = (value >> 8) & 0xFF
+                    buf[pos + 2] = value & 0xFF
+                    pos += 3
+
+        return self._packets[n_frames]
+
+
+class TelemetrySender:
+    """This class coalesces many frames into each socket send. Frames are
+    staged in a reusable buffer and flushed as one packet when it reaches
+    max_bytes or when the oldest staged frame is max_age_ms old. Partial
+    sends and EAGAIN keep the unsent remainder and resume from that offset,
+    meanwhile the frames wait in the queue, whose policy decides what is
+    dropped. A packet never spans a sequence gap.
+    """
+
+    def __init__(self, sock, channels: int = 8, sample_format: int = FORMAT_INT24, max_bytes: int = 1400,
+                 max_age_ms: int = 20):
+        """Preallocate the staging and packet buffers.
+
+        :sock: Non-blocking socket used to send the packets.
+        :channels: Channels per frame.
+        :sample_format: FORMAT_INT24 or FORMAT_INT32.
+        :max_bytes: Size threshold of a packet (header included), 1400 keeps
+                    each packet inside a single TCP segment.
+        :max_age_ms: Latency cap, a partial packet is flushed once its oldest
+                     frame has waited this long.
+        :returns: None
+
+        """
+        frame_bytes = channels * (4 if sample_format == FORMAT_INT32 else 3)
+
+        self.sock = sock
+        self.max_age_ms = max_age_ms
+        self.frames_per_packet = max(1, (max_bytes - HEADER_SIZE) // frame_bytes)
+
+        self._width = FIRST_CHANNEL + channels
+        self._packer = TelemetryPacker(self.frames_per_packet, channels, sample_format)
+        self._staging = array.array('i', [0] * (self.frames_per_packet * self._width))
+        self._staging_view = memoryview(self._staging)
+        self._staged = 0
+        self._staged_ms = 0
+
+        self._packet = None
+        self._packet_frames = 0
+        self._offset = 0
+
+        # Stats packet, sent between two frame packets once queued
+        self._stats = bytearray(HEADER_SIZE + 4 * STATS_WORDS)
+        self._stats_view = memoryview(self._stats)
+        self._stats_queued = False
+
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        """Restart the statistics window.
+
+        :returns: None
+
+        """
+        self.bytes_sent = 0
+        self.packets_sent = 0
+        self.frames_sent = 0
+        self.stats_sent = 0   # Stats packets, not counted in packets_sent
+        self.eagain_count = 0
+        self.send_errors = 0
+        self.frames_lost = 0  # Frames of the packets discarded on connection errors
+        self._stats_start = ticks_ms()
+
+    def stats(self) -> tuple[int, int, int]:
+        """Throughput since the last reset_stats().
+
+        :returns: A tuple (bytes per second, packets per second, average frames
+                  per packet x 100).
+
+        """
+        elapsed_ms = max(1, ticks_diff(ticks_ms(), self._stats_start))
+        packets = self.packets_sent
+        return (self.bytes_sent * 1000 // elapsed_ms, packets * 1000 // elapsed_ms,
+                self.frames_sent * 100 // packets if packets else 0)
+
+    def pending(self) -> bool:
+        """Checks if a packet is waiting to be (completely) sent.
+
+        :returns: True if part of a packet is still unsent.
+
+        """
+        return self._packet is not None
+
+    def poll(self, queue) -> int:
+        """Move frames from the queue to the staging buffer and send a packet
+        when a threshold is reached. Never blocks.
+
+        :queue: FrameRingBuffer with the acquired frames.
+        :returns: Number of frames packed in this call.
+
+        """
+        if self._packet is not None and not self._send_pending():
+            return 0  # Socket still busy, frames stay in the queue
+
+        if self._stats_queued:
+            self._stats_queued = False
+            self._packet = self._stats_view
+            self._packet_frames = 0
+            self._offset = 0
+            if not self._send_pending():
+                return 0
+
+        staged = self._staged
+        room = self.frames_per_packet - staged
+        if room:
+            n_frames = queue.read_frames_into(self._staging, room, staged * self._width)
+            if n_frames:
+                if staged == 0:
+                    self._staged_ms = ticks_ms()
+                staged += n_frames
+                self._staged = staged
+
+        if staged == 0:
+            return 0
+        if staged < self.frames_per_packet and ticks_diff(ticks_ms(), self._staged_ms) < self.max_age_ms:
+            return 0
+
+        return self.flush()
+
+    def send_stats(self, words, sequence: int = 0, timestamp: int = 0) -> None:
+        """Queue a stats packet, poll() sends it before the next frame packet.
+        A stats packet still queued is overwritten. Does not allocate.
+
+        :words: Array with STATS_WORDS values (STATS_FIELDS order).
+        :sequence: Sequence number of the next frame.
+        :timestamp: Device time (ticks_us) of the values.
+        :returns: None
+
+        """
+        buf = self._stats
+        struct.pack_into(HEADER_FMT, buf, 0, MAGIC, VERSION, FLAG_STATS, sequence, timestamp, STATS_WORDS, 0)
+        pos = HEADER_SIZE
+        for i in range(STATS_WORDS):
+            struct.pack_into('<i', buf, pos, words[i])
+            pos += 4
+        self._stats_queued = True
+
+    def flush(self) -> int:
+        """Pack the staged frames and start sending them, regardless of the
+        thresholds. Does nothing while a previous packet is still pending.
+        Only the frames consecutive to the first one are packed, the rest stay
+        staged for the next packet.
+
+        :returns: Number of frames packed.
+
+        """
+        staged = self._staged
+        if staged == 0 or self._packet is not None:
+            return 0
+
+        staging = self._staging
+        width = self._width
+        sequence = staging[SEQUENCE]
+        n_frames = 1
+        while n_frames < staged and staging[n_frames * width + SEQUENCE] == (sequence + n_frames) & SEQUENCE_MASK:
+            n_frames += 1
+
+        self._packet = self._packer.pack(staging, n_frames, sequence, staging[TIMESTAMP], width)
+        self._packet_frames = n_frames
+        self._offset = 0
+
+        if n_frames < staged:
+            # Move the frames after the gap to the front of the staging buffer
+            view = self._staging_view
+            view[0:(staged - n_frames) * width] = view[n_frames * width:staged * width]
+            self._staged_ms = ticks_ms()
+        self._staged = staged - n_frames
+
+        self._send_pending()
+        return n_frames
+
+    def _send_pending(self) -> bool:
+        packet = self._packet
+        offset = self._offset
+        try:
+            # Only the remainder of a partial send is sliced, a whole packet goes out as is
+            sent = self.sock.send(packet[offset:] if offset else packet)
+        except OSError as e:
+            if e.args[0] == _EAGAIN:
+                self.eagain_count += 1  # WiFi buffer full, retry from the same offset
+                return False
+            # Connection error, the packet is discarded
+            self.send_errors += 1
+            self.frames_lost += self._packet_frames
+            self._packet = None
+            return True
+
+        self._offset += sent or 0
+        if self._offset < len(packet):
+            return False
+
+        self.bytes_sent += len(packet)
+        if self._packet_frames:
+            self.packets_sent += 1
+            self.frames_sent += self._packet_frames
+        else:
+            self.stats_sent += 1
+        self._packet = None
+        return True
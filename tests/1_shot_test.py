@@ -1,6 +1,7 @@
 # #! /bin/MicroPython
+import array
 import json
-from ring_buffer import RingBuffer
+from ring_buffer import FIRST_CHANNEL, FrameRingBuffer
 
 from machine import SPI, Pin, freq
 from utime import sleep_ms
@@ -11,8 +12,6 @@ from module.ads1299 import ADS1299, make_chnset, make_config1, make_config3
 #                                                       GLOBALS                                                        #
 ########################################################################################################################
 
-data_ready = False # Declare data_ready at the top to use in every function
-
 # Set the CPU frequency to 240Mhx
 # This can help optimize the performance of the microcontroller
 freq(240000000)
@@ -28,16 +27,6 @@ spi = SPI(2, baudrate=16000000, polarity=0, phase=1, bits=8, firstbit=SPI.MSB, s
 #                                                      FUNCTIONS                                                       #
 ########################################################################################################################
 
-def irq_handler(pin: Pin) -> None:
-    """
-    Interrupt Callback
-
-    :param pin: The machine.Pin instance that triggered the interrupt.
-    :return: None
-    """
-    global data_ready
-    pass
-
 def main() -> None:
     """Main Function
     :returns: None
@@ -45,9 +34,6 @@ def main() -> None:
     ###################################################################################################################
     #                                                     INIT                                                        #
     ###################################################################################################################
-    global data_ready # Indicates that is global
-    data_ready = False
-
     ads = ADS1299(cs, spi)                                # Initialize the ADS1299 with the configured SPI and CS pins
     cf1 = make_config1(data_rate=ADS1299.SAMPLE_RATE_500) # Set the samples rate to 500sps
     cf3 = make_config3(pwr_down_refbuf=True)              # Set the internal reference buffer to power down mode
@@ -79,9 +65,9 @@ def main() -> None:
     # Create a dictionary for the final output
     dictionary = {f'Ch{i}': [] for i in range(8)}
 
-    # Pre-allocate Circular Buffers for each channel (1000 samples each)
+    # Pre-allocate a single frame buffer (1000 frames of 8 channels)
     # This avoids .append() and heap allocation during acquisition
-    channel_queues = tuple(RingBuffer(1000) for _ in range(8))
+    frames = FrameRingBuffer(1000)
 
     ###################################################################################################################
     #                                                      APP                                                        #
@@ -91,32 +77,30 @@ def main() -> None:
     ads.enable_read_continuous()
 
     # Enable irq
-    drdy.irq(trigger=Pin.IRQ_FALLING, handler=irq_handler)
+    ads.attach_drdy(drdy)
 
-    # Read until the circular buffers are full (zero allocation)
-    while not channel_queues[0].is_full():
-        if data_ready:
-            data_ready = False
+    # Read until the frame buffer is full (zero allocation)
+    while not frames.is_full():
+        if ads.data_ready():
             # Read the channels ONE SHOT AT THE TIME from the ADS1299
             _, channels_data = ads.read_channels_once()
             # @NOTE: This only works with samples rate less than 1K
 
-            # Write to queue instead of appending to list
-            for i in range(8):
-                channel_queues[i].write(channels_data[i])
+            # Write the whole frame to the buffer instead of appending to lists
+            frames.write_frame(channels_data)
         else:
             pass
 
     # Disable interruption
     ads.disable_read_continuous()
-    drdy.irq(handler=None)
+    ads.detach_drdy(drdy)
+    print("DRDY edges: {}, frames read: {}, overruns: {}".format(ads.drdy_count, ads.frames_read, ads.overruns))
 
     # Once sampling is complete, extract data to dictionary for JSON serialization
-    for i in range(8):
-        q = channel_queues[i]
-        target_list = dictionary[f'Ch{i}']
-        while not q.is_empty():
-            target_list.append(q.read())
+    frame = array.array('i', [0] * frames.width) # [sequence, timestamp, status, Ch0..Ch7]
+    while frames.read_frames_into(frame, 1):
+        for i in range(8):
+            dictionary[f'Ch{i}'].append(frame[FIRST_CHANNEL + i])
 
     print(dictionary) # View data ()
 
@@ -1,30 +1,43 @@
-from machine import Pin, freq, SPI
-from utime import sleep_ms
-from ads1299 import ADS1299
-from ads1299 import make_config3, make_chnset
 import json
 
+from machine import SPI, Pin, freq
+
+from module.ads1299 import ADS1299, DeviceGroup, make_chnset, make_config3
+
 # Set the CPU frequency to 240MHz
 freq(240000000)
 
-# Define CS pins for both ADS1299 devices
-cs1 = Pin(2, Pin.OUT)
-cs2 = Pin(4, Pin.OUT)
+# Define CS pins for both ADS1299 devices, ads1 is the clock master (CLKSEL high), ads2 takes CLK from it
+cs1 = Pin(5, Pin.OUT, value=True)
+cs2 = Pin(15, Pin.OUT, value=True)
+
+# DRDY of both devices, only the master one is waited on, the other one is checked for lockstep
+drdy1 = Pin(4, Pin.IN, Pin.PULL_UP)
+drdy2 = Pin(16, Pin.IN, Pin.PULL_UP)
+
+# START pin wired to both devices, they begin to convert on the same clock edge
+start = Pin(17, Pin.OUT, value=False)
 
-# SPI settings: CPOL = 0, CPHA = 1, 4MHz clock, 8-bit mode, MSB first
-spi = SPI(1, 4000000, polarity=0, phase=1, bits=8,
-          firstbit=SPI.MSB, sck=Pin(14), mosi=Pin(13), miso=Pin(12))
+# SPI settings: CPOL = 0, CPHA = 1, 16MHz clock, 8-bit mode, MSB first
+spi = SPI(2, 16000000, polarity=0, phase=1, bits=8,
+          firstbit=SPI.MSB, sck=Pin(18), mosi=Pin(23), miso=Pin(19))
+
+try:
+    import board  # Emulator only: second device on cs2/drdy2 sharing the clock and START of the default one
+    board.device_group([15], [16], 17)
+except ImportError:
+    pass
 
 # Create instances of the ADS1299 class for both devices
 ads1 = ADS1299(cs1, spi)
 ads2 = ADS1299(cs2, spi)
+group = DeviceGroup([ads1, ads2], drdy1, start=start, drdy_pins=[drdy2])
 
 # Set internal reference for both devices
 cf3 = make_config3(pwr_down_refbuf=True)
 
-# Initialize both ADS1299 devices with the internal reference configuration
-ads1.init(config3=cf3)
-ads2.init(config3=cf3)
+# Initialize both ADS1299 devices with the internal reference configuration, master first
+group.init(config3=cf3)
 
 # Configure all channels of ADS1299 device 1 with the method config_all_channels()
 ads1.config_all_channels(
@@ -54,25 +67,26 @@ for i in range(len(ads1_regs)):
 # Create a dictionary to store the data from both ADS1299 devices
 dictionary = {f'Ch{i}': [] for i in range((16))}
 
-# Enable continuous reading for both ADS1299 devices
-ads1.enable_read_continuous()
-ads2.enable_read_continuous()
+# Start both ADS1299 devices together
+group.start()
 
-# Run the data collection for 200 samples
-for i in range(200):
-    # Read data from both ADS1299 devices
-    channels_0_7 = ads1.read_channels_continuous()
-    channels_8_15 = ads2.read_channels_continuous()
+# Run the data collection for 200 samples, one merged frame of 16 channels per DRDY of the master
+samples = 0
+while samples < 200:
+    if not group.data_ready():
+        continue
 
-    # Store the data in the dictionary
-    for j in range(8):
-        dictionary[f'Ch{j}'].append(channels_0_7[j])
+    _, channels = group.read()
 
-    for j in range(8, 16):
-        dictionary[f'Ch{j}'].append(channels_8_15[j-8])
+    # Store the data in the dictionary
+    for j in range(16):
+        dictionary[f'Ch{j}'].append(channels[j])
+    samples += 1
 
-    # Wait 1 ms before taking the next sample
-    sleep_ms(1)
+# Stop both ADS1299 devices
+group.stop()
+print("DRDY edges: {}, frames read: {}, overruns: {}, out of lockstep: {}".format(
+    ads1.drdy_count, ads1.frames_read, ads1.overruns, list(group.lockstep_errors)))
 
 # Convert the dictionary to a JSON string
 jsonString = json.dumps(dictionary)
@@ -85,7 +99,3 @@ jsonFile.close()
 # Clear the dictionary to free up memory
 for i in range(16):
     dictionary[f'Ch{i}'].clear()
-
-# Disable continuous reading for both ADS1299 devices
-ads1.disable_read_continuous()
-ads2.disable_read_continuous()
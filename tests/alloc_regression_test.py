@@ -0,0 +1,132 @@
+# #! /bin/MicroPython
+import array
+import gc
+
+from utime import ticks_diff, ticks_ms
+
+import main
+from heap import AllocationAudit
+from module.ads1299 import ADS1299, make_config1, make_config3
+from ring_buffer import FIRST_CHANNEL, SEQUENCE
+from telemetry import JSON_LINE_MAX, TelemetrySender, format_json_line
+
+########################################################################################################################
+#                                                       GLOBALS                                                        #
+########################################################################################################################
+
+DATA_RATE = ADS1299.SAMPLE_RATE_1K
+WINDOW_FRAMES = 1000  # Frames per gc.mem_alloc() sample
+WINDOWS = 5           # Measured windows for each telemetry format
+WARM_UP_FRAMES = 500  # First frames run the lazy caches (memoryviews of the destination buffers)
+TIMEOUT_MS = 30000
+
+try:
+    # Emulator only: CPython keeps the big ints held by attributes (DRDY timestamps) on the heap and their size moves
+    # a few dozen bytes between windows, on the board they are small ints and the tolerance is 0
+    import board  # noqa: F401
+    TOLERANCE = 256
+except ImportError:
+    TOLERANCE = 0
+
+# Legacy line built with str.format(), the reference of format_json_line()
+_JSON_FMT = '{{"Seq":{},"Ch0":{},"Ch1":{},"Ch2":{},"Ch3":{},"Ch4":{},"Ch5":{},"Ch6":{},"Ch7":{}}}\n'
+
+########################################################################################################################
+#                                                      FUNCTIONS                                                       #
+########################################################################################################################
+
+class NullSocket:
+    """Socket stand-in that takes every byte and does not allocate."""
+
+    def __init__(self):
+        self.bytes = 0
+
+    def send(self, data) -> int:
+        self.bytes += len(data)
+        return len(data)
+
+def check_json_line() -> bool:
+    """format_json_line() must write the same text as the str.format() line, sign and width edges included."""
+    buf = bytearray(JSON_LINE_MAX)
+    frame = array.array('i', [0] * (FIRST_CHANNEL + 8))
+    samples = (0, 1, -1, 9, -10, 8388607, -8388608, 123456)
+    for sequence in (0, 7, 10, 99999, 0x3FFFFFFF):
+        frame[SEQUENCE] = sequence
+        for ch in range(8):
+            frame[FIRST_CHANNEL + ch] = samples[(ch + sequence) % len(samples)]
+        expected = _JSON_FMT.format(sequence, *frame[FIRST_CHANNEL:]).encode()
+        if bytes(buf[0:format_json_line(buf, frame)]) != expected:
+            print("FAIL: JSON line {} != {}".format(bytes(buf[0:format_json_line(buf, frame)]), expected))
+            return False
+    return True
+
+def run(ads: ADS1299, binary: bool) -> AllocationAudit:
+    """Runs the main.py acquisition and send loop with the heap audit, GC disabled while measuring."""
+    queue = main.frame_queue
+    queue.init()
+    sock = NullSocket()
+    sender = TelemetrySender(sock, max_bytes=main.TX_MAX_BYTES, max_age_ms=main.TX_MAX_AGE_MS)
+    audit = AllocationAudit(WINDOW_FRAMES, TOLERANCE)
+
+    ads.enable_read_continuous()
+    ads.attach_drdy(main.drdy)
+
+    measuring = False
+    start = ticks_ms()
+    gc.collect()
+    try:
+        while audit.windows + audit.skipped < WINDOWS and ticks_diff(ticks_ms(), start) < TIMEOUT_MS:
+            if ads.data_ready():
+                main.read_data(ads)
+            if binary:
+                sender.poll(queue)
+            else:
+                main.send_data(sock)
+
+            if measuring:
+                audit.poll(ads.frames_read)
+            elif ads.frames_read >= WARM_UP_FRAMES:
+                gc.collect()
+                gc.disable()  # A collection now only happens if the loop allocates and fills the heap
+                audit.reset(ads.frames_read)
+                measuring = True
+    finally:
+        gc.enable()
+        ads.detach_drdy(main.drdy)
+        ads.disable_read_continuous()
+
+    return audit
+
+def main_test() -> None:
+    """Checks the steady state acquisition and send loop allocates nothing, for both telemetry formats.
+    On the emulator windows that allocate up to TOLERANCE bytes still pass, only leaks are caught there.
+    Exits with status 1 on failure.
+    :returns: None
+    """
+    ads = ADS1299(main.cs, main.spi)
+    ads.init(config1=make_config1(data_rate=DATA_RATE), config3=make_config3(pwr_down_refbuf=True))
+    ads.config_all_channels(channels_active=8, gain=ADS1299.GAIN_1, channel_input=ADS1299.NORMAL)
+
+    ok = check_json_line()
+    if TOLERANCE:
+        print("Emulator: windows allocating up to {} B pass, only leaks are caught".format(TOLERANCE))
+    print("format  windows  allocated  worst(B)  skipped")
+    for name, binary in (("binary", True), ("json", False)):
+        audit = run(ads, binary)
+        print("{:<6}  {:>7}  {:>9}  {:>8}  {:>7}".format(name, audit.windows, audit.dirty, audit.worst,
+                                                         audit.skipped))
+        if audit.windows + audit.skipped < WINDOWS:
+            print("FAIL: {} windows measured before the timeout".format(audit.windows))
+            ok = False
+        # With the GC disabled a skipped window means the heap filled up, so it also allocated
+        if not audit.clean() or audit.skipped:
+            print("FAIL: the {} loop allocates {} B every {} frames".format(name, audit.worst, WINDOW_FRAMES))
+            ok = False
+
+    print("PASS" if ok else "FAIL")
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main_test()
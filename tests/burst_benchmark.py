@@ -0,0 +1,121 @@
+# #! /bin/MicroPython
+from machine import SPI, Pin, freq
+from utime import sleep_ms, ticks_diff, ticks_ms, ticks_us
+
+from module.ads1299 import ADS1299, make_config1, make_config3
+
+########################################################################################################################
+#                                                       GLOBALS                                                        #
+########################################################################################################################
+
+FRAMES_PER_BLOCK = 64 # Frames (K) captured before a block is handed to the consumer
+CAPTURE_MS = 1000     # Capture length for each data rate
+
+RATES = (
+    (ADS1299.SAMPLE_RATE_16K, 16000),
+    (ADS1299.SAMPLE_RATE_8K, 8000),
+    (ADS1299.SAMPLE_RATE_4K, 4000),
+    (ADS1299.SAMPLE_RATE_2K, 2000),
+    (ADS1299.SAMPLE_RATE_1K, 1000),
+    (ADS1299.SAMPLE_RATE_500, 500),
+    (ADS1299.SAMPLE_RATE_250, 250),
+)
+
+drdy_edges = 0
+blocks_done = 0
+
+freq(240000000)
+
+cs = Pin(5, Pin.OUT, value=True)
+drdy = Pin(4, Pin.IN, Pin.PULL_UP)
+
+spi = SPI(2, baudrate=16000000, polarity=0, phase=1, bits=8, firstbit=SPI.MSB,
+          sck=Pin(18), mosi=Pin(23), miso=Pin(19))
+
+########################################################################################################################
+#                                                      FUNCTIONS                                                       #
+########################################################################################################################
+
+def count_drdy(pin: Pin) -> None:
+    """Counts DRDY edges while the polling loop captures, hard so it adds no scheduled callback per frame."""
+    global drdy_edges
+    drdy_edges += 1
+
+def on_block(block: bytearray) -> None:
+    """Consumer of the interrupt driven burst mode."""
+    global blocks_done
+    blocks_done += 1
+
+def setup(ads: ADS1299, data_rate: int) -> None:
+    """Configures the device for a data rate with all channels on normal input."""
+    ads.init(config1=make_config1(data_rate=data_rate), config3=make_config3(pwr_down_refbuf=True))
+    ads.config_all_channels(channels_active=8, gain=ADS1299.GAIN_1, channel_input=ADS1299.NORMAL)
+    ads.init_burst(FRAMES_PER_BLOCK)
+
+def run_poll(ads: ADS1299, n_blocks: int) -> tuple[int, int, int]:
+    """Tight readinto loop, returns (frames read, DRDY edges, elapsed us)."""
+    global drdy_edges
+    drdy_edges = 0
+    drdy.irq(trigger=Pin.IRQ_FALLING, handler=count_drdy, hard=True)
+    ads.enable_read_continuous()
+    drdy_edges = 0  # Edges before RDATAC are never read
+
+    start = ticks_us()
+    for _ in range(n_blocks):
+        ads.read_block(drdy)
+    elapsed = ticks_diff(ticks_us(), start)
+    edges = drdy_edges
+
+    drdy.irq(handler=None)
+    ads.disable_read_continuous()
+    return ads.burst_frames_read, edges, elapsed
+
+def run_irq(ads: ADS1299, n_blocks: int) -> tuple[int, int, int]:
+    """DRDY ISR + micropython.schedule, returns (frames read, DRDY edges, elapsed us)."""
+    global blocks_done
+    blocks_done = 0
+    timeout_ms = 2 * CAPTURE_MS + 500
+
+    ads.start_burst(drdy, on_block)
+    ads.enable_read_continuous()
+
+    start = ticks_us()
+    start_ms = ticks_ms()
+    while blocks_done < n_blocks and ticks_diff(ticks_ms(), start_ms) < timeout_ms:
+        sleep_ms(1)
+    elapsed = ticks_diff(ticks_us(), start)
+    frames, edges = ads.burst_frames_read, ads.burst_drdy_count
+
+    ads.stop_burst(drdy)
+    ads.disable_read_continuous()
+    return frames, edges, elapsed
+
+def main() -> None:
+    """Reports the sustained SPS and dropped frames of both burst modes for every CONFIG1 rate.
+    :returns: None
+    """
+    ads = ADS1299(cs, spi)
+    best = {"poll": 0, "irq": 0}
+
+    print("mode  rate(SPS)  read(SPS)  frames  dropped")
+    for data_rate, sps in RATES:
+        n_blocks = max(1, sps * CAPTURE_MS // 1000 // FRAMES_PER_BLOCK)
+
+        for mode, run in (("poll", run_poll), ("irq", run_irq)):
+            setup(ads, data_rate)
+            frames, edges, elapsed = run(ads, n_blocks)
+
+            # The last edge may belong to a frame that is still being read
+            dropped = max(0, edges - frames - 1)
+            achieved = frames * 1000000 // max(elapsed, 1)
+            print("{:<5} {:>9}  {:>9}  {:>6}  {:>7}".format(mode, sps, achieved, frames, dropped))
+
+            if dropped == 0 and frames >= n_blocks * FRAMES_PER_BLOCK:
+                best[mode] = max(best[mode], sps)
+
+    for mode, sps in best.items():
+        print("Max sustained SPS without drops ({}): {}".format(mode, sps))
+
+
+if __name__ == "__main__":
+    main()
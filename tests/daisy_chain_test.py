@@ -0,0 +1,92 @@
+# #! /bin/MicroPython
+import array
+import json
+
+from machine import SPI, Pin, freq
+from utime import ticks_diff, ticks_us
+
+from module.ads1299 import ADS1299, ADS1299Chain, make_config1, make_config3
+from ring_buffer import FIRST_CHANNEL, FrameRingBuffer
+
+########################################################################################################################
+#                                                       GLOBALS                                                        #
+########################################################################################################################
+
+DEVICES = 2       # ADS1299 in the chain, 8 channels each
+SAMPLES = 1000    # Frames captured
+
+freq(240000000)
+
+cs = Pin(5, Pin.OUT, value=True)   # CS shared by every device of the chain
+drdy = Pin(4, Pin.IN, Pin.PULL_UP) # DRDY of the first device
+
+# SPI settings are CPOL = 0 and CPHA = 1, MISO is the DOUT of the first device
+spi = SPI(2, baudrate=16000000, polarity=0, phase=1, bits=8, firstbit=SPI.MSB, sck=Pin(18), mosi=Pin(23), miso=Pin(19))
+
+try:
+    import board  # Emulator only: chains DEVICES models behind the default one
+    board.daisy_chain(DEVICES)
+except ImportError:
+    pass
+
+########################################################################################################################
+#                                                      FUNCTIONS                                                       #
+########################################################################################################################
+
+def read_cost(read, repeat: int = 200) -> int:
+    """Average us of a read function, the device does not need new data."""
+    start = ticks_us()
+    for _ in range(repeat):
+        read()
+    return ticks_diff(ticks_us(), start) // repeat
+
+def main() -> None:
+    """Captures SAMPLES frames of 8 x DEVICES channels with one SPI transaction per DRDY.
+    :returns: None
+    """
+    channels = 8 * DEVICES
+    ads = ADS1299Chain(cs, spi, devices=DEVICES)
+    # Every device gets the same configuration in the same transactions
+    ads.init(config1=make_config1(data_rate=ADS1299.SAMPLE_RATE_1K), config3=make_config3(pwr_down_refbuf=True))
+    ads.config_all_channels(channels_active=8, gain=ADS1299.GAIN_1, channel_input=ADS1299.NORMAL)
+
+    print("--- ADS1299 daisy chain of {} devices ---".format(DEVICES))
+    regs = ads.read_all_registers()
+    for addr, val in enumerate(regs):
+        print("Reg 0x{:02x}: 0x{:02x}".format(addr, val))
+
+    dictionary = {f'Ch{i}': [] for i in range(channels)}
+    frames = FrameRingBuffer(SAMPLES, channels=channels)
+
+    ads.enable_read_continuous()
+    ads.attach_drdy(drdy)
+
+    while not frames.is_full():
+        if ads.data_ready():
+            _, channels_data = ads.read_channels_continuous()
+            frames.write_frame(channels_data, ads.status_word(0), ads.timestamp, ads.sequence)
+
+    ads.detach_drdy(drdy)
+    print("DRDY edges: {}, frames read: {}, overruns: {}".format(ads.drdy_count, ads.frames_read, ads.overruns))
+    chain_us = read_cost(ads.read_channels_continuous)
+    ads.disable_read_continuous()
+
+    # Per sample cost against one read per device, as separate CS lines would need
+    single = ADS1299(cs, spi)
+    single.enable_read_continuous()
+    single_us = read_cost(single.read_channels_continuous)
+    single.disable_read_continuous()
+    print("us per {} channels: chain {}, {} separate reads {}".format(channels, chain_us, DEVICES,
+                                                                      single_us * DEVICES))
+
+    frame = array.array('i', [0] * frames.width) # [sequence, timestamp, status, Ch0..Ch(channels - 1)]
+    while frames.read_frames_into(frame, 1):
+        for i in range(channels):
+            dictionary[f'Ch{i}'].append(frame[FIRST_CHANNEL + i])
+
+    with open("signals.json", "w") as jsonFile:
+        json.dump(dictionary, jsonFile)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# #! /bin/MicroPython
+import struct
+
+from machine import idle
+from utime import sleep_ms, ticks_diff, ticks_ms
+
+import main
+from module.ads1299 import ADS1299, make_config1, make_config3
+from ring_buffer import SEQUENCE_MASK
+from telemetry import HEADER_FMT, TelemetrySender
+
+########################################################################################################################
+#                                                       GLOBALS                                                        #
+########################################################################################################################
+
+DATA_RATE = ADS1299.SAMPLE_RATE_1K
+CAPTURE_MS = 3000    # Capture length for each acquisition mode
+SEND_DELAY_MS = 40   # Time every send() blocks, emulates a congested WiFi link
+TX_MAX_BYTES = 1400  # ~51 frames per packet, the slow link still keeps up with 1 kSPS on average
+
+try:
+    # Emulator only: host scheduling stalls of the DRDY clock must not count as frames lost by the code under test,
+    # and the host may wake the acquisition thread more than a sample period late now and then
+    import board
+    board.ads.catch_up = False
+    TOLERANCE = 2
+except ImportError:
+    TOLERANCE = 0
+
+########################################################################################################################
+#                                                      FUNCTIONS                                                       #
+########################################################################################################################
+
+class SlowSocket:
+    """Socket stand-in that blocks on every send and checks the packet sequence numbers."""
+
+    def __init__(self, delay_ms: int):
+        self.delay_ms = delay_ms
+        self.frames = 0
+        self.lost = 0
+        self._expected = None
+
+    def send(self, packet) -> int:
+        sleep_ms(self.delay_ms)
+        _, _, _, sequence, _, count, _ = struct.unpack_from(HEADER_FMT, packet, 0)
+        if self._expected is not None:
+            self.lost += (sequence - self._expected) & SEQUENCE_MASK
+        self._expected = (sequence + count) & SEQUENCE_MASK
+        self.frames += count
+        return len(packet)
+
+def capture(ads: ADS1299, threaded: bool) -> tuple[int, int, int, int, int, int]:
+    """Captures CAPTURE_MS with the slow sender.
+
+    :returns: A tuple of 6 counters (DRDY edges, frames read, overruns, frames dropped by the queue, frames never
+              received, sequence gaps seen by the receiver).
+
+    """
+    queue = main.frame_queue
+    queue.init()
+    queue.reset_counters()
+
+    sock = SlowSocket(SEND_DELAY_MS)
+    sender = TelemetrySender(sock, max_bytes=TX_MAX_BYTES)
+
+    ads.enable_read_continuous()
+    ads.attach_drdy(main.drdy, main.wake_acquisition if threaded else None)
+    if threaded:
+        main.start_acquisition_thread(ads)
+
+    start = ticks_ms()
+    while ticks_diff(ticks_ms(), start) < CAPTURE_MS:
+        if not threaded and ads.data_ready():
+            main.read_data(ads)
+        sender.poll(queue)
+        if threaded and queue.is_empty():
+            idle()
+
+    if threaded:
+        main.stop_acquisition_thread()
+    ads.detach_drdy(main.drdy)
+    ads.disable_read_continuous()
+
+    # Drain what is still queued so it reaches the receiver
+    while not queue.is_empty() or sender.pending():
+        sender.poll(queue)
+        sender.flush()
+    sender.flush()
+
+    # The last edge may belong to a frame that was not read yet
+    edges = ads.drdy_count - ads.data_ready()
+    read = ads.frames_read
+    return edges, read, ads.overruns, queue.dropped(), read - queue.dropped() - sock.frames, sock.lost
+
+def main_test() -> None:
+    """Runs both acquisition modes at 1 kSPS with a slow sender and checks the thread mode loses no frames.
+    On the emulator up to TOLERANCE lost frames still pass. Exits with status 1 on failure.
+    :returns: None
+    """
+    ads = ADS1299(main.cs, main.spi)
+    ads.init(config1=make_config1(data_rate=DATA_RATE), config3=make_config3(pwr_down_refbuf=True))
+    ads.config_all_channels(channels_active=8, gain=ADS1299.GAIN_1, channel_input=ADS1299.NORMAL)
+
+    if TOLERANCE:
+        print("Emulator: the thread mode passes with up to {} lost frames (host scheduling)".format(TOLERANCE))
+    print("mode    drdy   read  overruns  dropped  lost  gaps")
+    ok = True
+    missed_frames = {}
+    for mode, threaded in (("loop", False), ("thread", True)):
+        edges, read, overruns, dropped, lost, gaps = capture(ads, threaded)
+        print("{:<6} {:>5}  {:>5}  {:>8}  {:>7}  {:>4}  {:>4}".format(mode, edges, read, overruns, dropped, lost,
+                                                                   gaps))
+        # Every frame missing on the receiver must be explained by the device counters
+        if gaps != overruns + dropped:
+            print("FAIL: {} sequence gaps but {} frames accounted".format(gaps, overruns + dropped))
+            ok = False
+        missed_frames[mode] = overruns + dropped + lost
+
+    if missed_frames["thread"] > TOLERANCE:
+        print("FAIL: thread mode lost {} frames".format(missed_frames["thread"]))
+        ok = False
+    if not ok:
+        raise SystemExit(1)
+    print("PASS: thread mode lost {} frames ({} lost by the single loop)".format(missed_frames["thread"],
+                                                                              missed_frames["loop"]))
+
+
+if __name__ == "__main__":
+    main_test()
@@ -0,0 +1,127 @@
+"""
+Host benchmark of the dashboard filter chain of src/monitor/filters.py:
+samples/s of each filter configuration on 8 channels at 4 kSPS, blocks the
+size of a TelemetrySender packet. The output is checked against a sample by
+sample transposed direct form II recursion, and the responses at a few
+frequencies against the design.
+
+Usage:
+    python tests/filter_benchmark.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "monitor"))
+from filters import SosFilter, make_chain  # noqa: E402
+
+########################################################################################################################
+#                                                       GLOBALS                                                        #
+########################################################################################################################
+
+SAMPLE_RATE = 4000
+CHANNELS = 8
+SECONDS = 10
+FRAMES_PER_BLOCK = 46  # One TelemetrySender packet per block
+CHECK_FRAMES = 2000    # Frames filtered by the reference recursion
+MAX_LOAD = 0.25        # Fraction of one core the chain may take in real time
+
+# (name, make_chain() keyword arguments)
+CONFIGS = (
+    ("none", {"line_hz": None}),
+    ("notch 50", {"line_hz": 50}),
+    ("ema baseline", {"line_hz": None, "baseline_s": 1.0}),
+    ("band 1-40", {"line_hz": None, "band": (1, 40)}),
+    ("ema+band+notch", {"line_hz": 50, "band": (1, 40), "baseline_s": 1.0}),
+    ("band 0.5-100 o8", {"line_hz": 60, "band": (0.5, 100), "order": 8}),
+)
+
+########################################################################################################################
+#                                                      FUNCTIONS                                                       #
+########################################################################################################################
+
+def reference(sos: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """Sample by sample transposed direct form II cascade starting from a zero state."""
+    y = x.astype(np.float64)
+    for b0, b1, b2, _, a1, a2 in sos:
+        z1 = np.zeros(x.shape[1])
+        z2 = np.zeros(x.shape[1])
+        out = np.empty_like(y)
+        for k, u in enumerate(y):
+            v = b0 * u + z1
+            z1 = b1 * u - a1 * v + z2
+            z2 = b2 * u - a2 * v
+            out[k] = v
+        y = out
+    return y
+
+def response(sos: np.ndarray, freq: float) -> float:
+    """Gain of the cascade at freq."""
+    z = np.exp(-2j * np.pi * freq / SAMPLE_RATE)
+    gain = 1.0
+    for b0, b1, b2, _, a1, a2 in sos:
+        gain *= (b0 + b1 * z + b2 * z * z) / (1 + a1 * z + a2 * z * z)
+    return abs(gain)
+
+def check_design() -> bool:
+    """Notch depth, band edges at -3 dB and pass band gain of the full chain."""
+    sos = make_chain(SAMPLE_RATE, 50, (1, 40), 1.0)
+    notch_sos = make_chain(SAMPLE_RATE, 50)
+    band_sos = make_chain(SAMPLE_RATE, None, (1, 40))
+    return (response(notch_sos, 50) < 1e-6 and abs(response(notch_sos, 10) - 1) < 1e-3
+            and abs(response(band_sos, 1) - 2 ** -0.5) < 1e-6 and abs(response(band_sos, 40) - 2 ** -0.5) < 1e-6
+            and abs(response(sos, 10) - 1) < 1e-2 and response(sos, 50) < 1e-6)
+
+def check_output(sos: np.ndarray, x: np.ndarray) -> bool:
+    """Block by block output and final state against the reference recursion."""
+    chain = SosFilter(sos, CHANNELS)
+    chain.zi = np.zeros((len(sos), 2, CHANNELS))
+    sizes = [1, FRAMES_PER_BLOCK, 500, 3]
+    out = []
+    start = 0
+    while start < len(x):
+        size = sizes[len(out) % len(sizes)]
+        out.append(chain.process(x[start:start + size]))
+        start += size
+    expected = reference(sos, x)
+    return np.allclose(np.concatenate(out), expected, atol=1e-4 * np.abs(expected).max() + 1e-12)
+
+def main() -> None:
+    """Filters SECONDS of 8 channels at 4 kSPS with each configuration.
+    Exits with status 1 on failure.
+    :returns: None
+    """
+    rng = np.random.default_rng(1)
+    frames = SAMPLE_RATE * SECONDS
+    t = np.arange(frames)[:, None] / SAMPLE_RATE
+    # EEG-like test signal: drift, 10 Hz alpha, 50 Hz line noise and noise, in volts
+    signal = (1e-3 * t + 20e-6 * np.sin(2 * np.pi * 10 * t) + 50e-6 * np.sin(2 * np.pi * 50 * t)
+              + 5e-6 * rng.standard_normal((frames, CHANNELS))).astype(np.float32)
+    blocks = [signal[i:i + FRAMES_PER_BLOCK] for i in range(0, frames, FRAMES_PER_BLOCK)]
+    real_time = SAMPLE_RATE * CHANNELS
+
+    ok = check_design()
+    print(f"design checks: {'ok' if ok else 'FAIL'}")
+    print(f"{CHANNELS} channels x {SAMPLE_RATE} SPS = {real_time} samples/s, {FRAMES_PER_BLOCK} frames per block")
+    print(f"{'filters':<16} {'sections':>8} {'samples/s':>12} {'core load':>10} {'check':>6}")
+    for name, kwargs in CONFIGS:
+        sos = make_chain(SAMPLE_RATE, **kwargs)
+        passed = check_output(sos, signal[:CHECK_FRAMES])
+        chain = SosFilter(sos, CHANNELS)
+        start = time.perf_counter()
+        for block in blocks:
+            chain.process(block)
+        rate = frames * CHANNELS / (time.perf_counter() - start)
+        load = real_time / rate
+        ok = ok and passed and load < MAX_LOAD
+        print(f"{name:<16} {len(sos):>8} {rate:>12.0f} {load:>9.1%} {'ok' if passed else 'FAIL':>6}")
+
+    print("PASS" if ok else "FAIL")
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Host test of the NumPy frame decoder of src/monitor/frames.py against the
+bytecode decoder of the firmware, module.ads1299._decode_frames_py(), on random
+frames and on frames holding the 24-bit sign edges. The firmware module is
+imported through the emulator stand-ins. Exits with status 1 on failure.
+
+Usage:
+    python tests/frames_test.py
+"""
+import array
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src", "monitor"))
+sys.path.insert(0, os.path.join(ROOT, "src", "emulator"))
+import run  # noqa: E402
+
+run.install()
+from frames import FRAME_SIZE, NUM_CHANNELS, decode_frames, unpack_int24  # noqa: E402
+
+from module.ads1299 import _decode_frames_py  # noqa: E402
+
+########################################################################################################################
+#                                                       GLOBALS                                                        #
+########################################################################################################################
+
+RANDOM_FRAMES = 1000
+# 24-bit words around the two's complement boundaries
+EDGE_SAMPLES = (0x000000, 0x000001, 0x7FFFFE, 0x7FFFFF, 0x800000, 0x800001, 0xFFFFFE, 0xFFFFFF)
+
+########################################################################################################################
+#                                                      FUNCTIONS                                                       #
+########################################################################################################################
+
+def make_frames() -> bytes:
+    """Random frames followed by one frame per edge sample, on every channel."""
+    rng = np.random.default_rng(2)
+    raw = bytearray(rng.integers(0, 256, RANDOM_FRAMES * FRAME_SIZE, dtype=np.uint8).tobytes())
+    for sample in EDGE_SAMPLES:
+        word = bytes([sample >> 16, (sample >> 8) & 0xFF, sample & 0xFF])
+        raw += bytes([0xC0, 0x00, 0x00]) + word * NUM_CHANNELS
+    return bytes(raw)
+
+def reference(raw: bytes, n_frames: int) -> tuple[np.ndarray, np.ndarray]:
+    """(status words, samples) decoded by the firmware."""
+    channels = array.array('i', [0] * (n_frames * NUM_CHANNELS))
+    status = array.array('i', [0] * n_frames)
+    _decode_frames_py(raw, n_frames, channels, status)
+    return np.array(status, dtype=np.int32), np.array(channels, dtype=np.int32).reshape(n_frames, NUM_CHANNELS)
+
+def main() -> None:
+    """Checks decode_frames() and unpack_int24() against the firmware decoder.
+    Exits with status 1 on failure.
+    :returns: None
+    """
+    raw = make_frames()
+    n_frames = len(raw) // FRAME_SIZE
+    status, samples = reference(raw, n_frames)
+
+    checks = []
+    got_status, got_samples = decode_frames(raw)
+    checks.append(("decode_frames", np.array_equal(got_status, status) and np.array_equal(got_samples, samples)))
+
+    # Into preallocated arrays larger than the block, from a memoryview
+    out = np.zeros((n_frames + 4, NUM_CHANNELS), dtype=np.int32)
+    status_out = np.zeros(n_frames + 4, dtype=np.int32)
+    got_status, got_samples = decode_frames(memoryview(raw), n_frames, out=out, status_out=status_out)
+    checks.append(("preallocated", np.array_equal(got_status, status) and np.array_equal(got_samples, samples)
+                   and not out[n_frames:].any()))
+
+    edges = decode_frames(raw)[1][RANDOM_FRAMES:, 0]
+    checks.append(("sign edges", edges.tolist() == [(v ^ 0x800000) - 0x800000 for v in EDGE_SAMPLES]))
+
+    # The samples of one frame, without its status word
+    checks.append(("unpack_int24", np.array_equal(unpack_int24(raw[3:FRAME_SIZE]), samples[0])))
+
+    ok = True
+    for name, passed in checks:
+        ok = ok and passed
+        print(f"{name:<14} {'ok' if passed else 'FAIL'}")
+    print("PASS" if ok else "FAIL")
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# #! /bin/MicroPython
+import array
+import gc
+import struct
+
+from utime import ticks_diff, ticks_ms, ticks_us
+
+import main
+from heap import GCScheduler
+from module.ads1299 import ADS1299, make_config1, make_config3
+from telemetry import FLAG_STATS, HEADER_FMT, HEADER_SIZE, STATS_FIELDS, STATS_WORDS, TelemetrySender
+
+########################################################################################################################
+#                                                       GLOBALS                                                        #
+########################################################################################################################
+
+DATA_RATE = ADS1299.SAMPLE_RATE_250  # Rate of main.py
+CAPTURE_MS = 4000
+PERIODIC_GC_MS = 2000  # The fixed gc.collect() period of the old main loop
+GARBAGE_BYTES = 48     # Allocated and dropped for every frame, stands for the application's own allocations
+
+########################################################################################################################
+#                                                      FUNCTIONS                                                       #
+########################################################################################################################
+
+class StatsSocket:
+    """Socket stand-in that takes every byte and keeps the last stats packet."""
+
+    def __init__(self):
+        self.stats = None
+
+    def send(self, packet) -> int:
+        if packet[3] & FLAG_STATS:
+            self.stats = bytes(packet)
+        return len(packet)
+
+def garbage() -> None:
+    # A reference cycle, so the host interpreter also keeps it until a collection
+    junk = [bytearray(GARBAGE_BYTES)]
+    junk.append(junk)
+
+def capture(ads: ADS1299, scheduled: bool) -> tuple[GCScheduler, TelemetrySender, int]:
+    """Acquires CAPTURE_MS with the automatic GC disabled, collecting every PERIODIC_GC_MS or with the scheduler.
+    :returns: A tuple (scheduler, telemetry sender, overruns).
+    """
+    scheduler = GCScheduler(ads.sample_period_us(), main.GC_LOW_WATER, main.GC_CRITICAL, main.GC_CHECK_FRAMES)
+    queue = main.frame_queue
+    queue.init()
+    sender = TelemetrySender(StatsSocket())
+
+    ads.enable_read_continuous()
+    ads.attach_drdy(main.drdy)
+    gc.collect()
+    gc.disable()
+
+    start = last_gc = ticks_ms()
+    try:
+        while ticks_diff(ticks_ms(), start) < CAPTURE_MS:
+            if ads.data_ready():
+                main.read_data(ads)
+                garbage()
+                if scheduled:
+                    scheduler.after_frame(ads.timestamp, ads.data_ready())
+                else:
+                    scheduler.frame(ads.timestamp)
+            sender.poll(queue)
+
+            if not scheduled and ticks_diff(ticks_ms(), last_gc) >= PERIODIC_GC_MS:
+                last_gc = ticks_ms()
+                gc_start = ticks_us()
+                gc.collect()
+                elapsed = ticks_diff(ticks_us(), gc_start)
+                scheduler.collections += 1
+                scheduler.last_us = elapsed
+                scheduler.worst_us = max(scheduler.worst_us, elapsed)
+    finally:
+        gc.enable()
+        ads.detach_drdy(main.drdy)
+        ads.disable_read_continuous()
+
+    return scheduler, sender, ads.overruns
+
+def check_stats_packet(scheduler: GCScheduler, sender: TelemetrySender) -> bool:
+    """The stats sent through the telemetry channel must decode to the scheduler values."""
+    words = array.array('i', [0] * STATS_WORDS)
+    scheduler.fill_stats(words)
+    sender.send_stats(words, main.frame_queue.sequence, ticks_us())
+    while sender.poll(main.frame_queue) or sender.pending():
+        pass
+
+    packet = sender.sock.stats
+    if packet is None:
+        print("FAIL: no stats packet sent")
+        return False
+    header = struct.unpack_from(HEADER_FMT, packet, 0)
+    received = struct.unpack_from('<' + 'i' * header[5], packet, HEADER_SIZE)
+    # mem_free is read again by fill_stats(), it may move between the two calls
+    for i in range(STATS_WORDS - 1):
+        if received[i] != words[i]:
+            print("FAIL: stats field {} sent {} received {}".format(STATS_FIELDS[i], words[i], received[i]))
+            return False
+    return True
+
+def main_test() -> None:
+    """Compares the fixed period gc.collect() with the GC scheduler under a steady allocation rate.
+    Exits with status 1 on failure.
+    :returns: None
+    """
+    ads = ADS1299(main.cs, main.spi)
+    ads.init(config1=make_config1(data_rate=DATA_RATE), config3=make_config3(pwr_down_refbuf=True))
+    ads.config_all_channels(channels_active=8, gain=ADS1299.GAIN_1, channel_input=ADS1299.NORMAL)
+    print("DRDY period: {} us".format(ads.sample_period_us()))
+
+    print("mode       collections  forced  last(us)  worst(us)  worst latency(us)  overruns")
+    for mode, scheduled in (("periodic", False), ("scheduled", True)):
+        scheduler, sender, overruns = capture(ads, scheduled)
+        print("{:<9}  {:>11}  {:>6}  {:>8}  {:>9}  {:>17}  {:>8}".format(
+            mode, scheduler.collections, scheduler.forced, scheduler.last_us, scheduler.worst_us,
+            scheduler.worst_latency_us, overruns))
+
+    # The last capture is the scheduled one
+    ok = check_stats_packet(scheduler, sender)
+    if not scheduler.collections:
+        print("FAIL: the scheduler never collected")
+        ok = False
+    if scheduler.forced:
+        # A collection longer than the DRDY period never fits, it still runs right after a read
+        print("{} of {} collections did not fit before the next DRDY".format(scheduler.forced, scheduler.collections))
+    print("PASS" if ok else "FAIL")
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main_test()
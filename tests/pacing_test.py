@@ -0,0 +1,149 @@
+"""
+Host test of the dashboard render pacing of src/monitor/pacing.py against the
+previous fixed 8 samples per tick, on a simulated stream: packets every
+TX_MAX_AGE_MS with network jitter, a network stall, a stalled UI, render ticks
+with jitter and a device clock that wraps. The dashboard is always started with
+the default 250 SPS while the device runs at each of DEVICE_RATES.
+
+Usage:
+    python tests/pacing_test.py
+"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "monitor"))
+from pacing import RenderPacer  # noqa: E402
+from protocol import TICKS_MODULUS  # noqa: E402
+from ring import BlockFifo  # noqa: E402
+
+########################################################################################################################
+#                                                       GLOBALS                                                        #
+########################################################################################################################
+
+NOMINAL_RATE = 250
+DEVICE_RATES = (250, 500, 1000, 2000, 4000)
+DURATION_S = 30.0
+TX_MAX_AGE_MS = 20
+NETWORK_DELAY_S = 0.005
+NETWORK_JITTER_S = 0.010
+NETWORK_STALL = (10.0, 0.8)  # (start, duration) s: packets sent meanwhile arrive together at its end
+UI_STALL = (20.0, 0.6)       # (start, duration) s: no render tick
+RENDER_PERIOD_S = 0.033
+RENDER_JITTER_S = 0.005
+LATENCY_TARGET_S = 0.25
+PREBUFFER_S = 0.1
+SETTLE_S = 1.5  # After a stall or the start, time given to get back under the target
+CLOCK_ERROR = 0.002  # Largest relative error of the measured sample clock
+
+########################################################################################################################
+#                                                      FUNCTIONS                                                       #
+########################################################################################################################
+
+def make_packets(rate: int, rng) -> list[tuple[float, int, int, int]]:
+    """(arrival s, first frame, frames, device ticks_us of the first frame) of every packet, by arrival."""
+    frames_per_packet = max(1, rate * TX_MAX_AGE_MS // 1000)
+    start_us = TICKS_MODULUS - 3_000_000  # ticks_us() wraps 3 s into the stream
+    packets = []
+    for first in range(0, int(DURATION_S * rate), frames_per_packet):
+        sent = (first + frames_per_packet) / rate
+        arrival = sent + NETWORK_DELAY_S + rng.uniform(0, NETWORK_JITTER_S)
+        stall, length = NETWORK_STALL
+        if stall <= sent < stall + length:
+            arrival = stall + length + NETWORK_DELAY_S
+        device_us = (start_us + first * 1_000_000 // rate) % TICKS_MODULUS
+        packets.append((arrival, first, frames_per_packet, device_us))
+    packets.sort()
+    return packets
+
+def make_ticks(rng) -> np.ndarray:
+    ticks = []
+    now = 0.0
+    while now < DURATION_S:
+        now += RENDER_PERIOD_S + rng.uniform(-RENDER_JITTER_S, RENDER_JITTER_S)
+        stall, length = UI_STALL
+        if stall <= now < stall + length:
+            now = stall + length
+        ticks.append(now)
+    return np.array(ticks)
+
+def settled(now: float) -> bool:
+    """True outside of the start and of the stalls (and the time they take to recover)."""
+    return now > SETTLE_S and all(not start <= now < start + length + SETTLE_S
+                                  for start, length in (NETWORK_STALL, UI_STALL))
+
+def simulate(rate: int, paced: bool) -> dict:
+    """Plays the stream with the pacer (paced) or the previous fixed pacing, returns the measurements."""
+    rng = np.random.default_rng(rate)
+    packets = make_packets(rate, rng)
+    pacer = RenderPacer(NOMINAL_RATE, LATENCY_TARGET_S, PREBUFFER_S)
+    fifo = BlockFifo()
+    received = 0
+    played = 0
+    latencies = []
+    errors = []
+    next_packet = 0
+
+    for now in make_ticks(rng):
+        while next_packet < len(packets) and packets[next_packet][0] <= now:
+            arrival, first, frames, device_us = packets[next_packet]
+            # One row per frame holding its frame index
+            fifo.put(np.arange(first, first + frames)[:, None], arrival)
+            pacer.arrived(frames, device_us, arrival)
+            received += frames
+            next_packet += 1
+
+        if paced:
+            count = pacer.due(now, fifo.samples)
+        else:
+            # Previous consume_and_render(): 8 samples per tick while more than 2 wait
+            count = min(8, fifo.samples - 2) if fifo.samples > 2 else 0
+        rows = fifo.take(count) if count else None
+        if rows is None:
+            continue
+        played += len(rows)
+        # Acquisition time of the newest frame plotted is its index / rate
+        latency = now - rows[-1, 0] / rate
+        if settled(now):
+            latencies.append(latency)
+            estimate = pacer.latency(now, fifo.last_stamp, fifo.last_behind)
+            # The estimate misses the network delay and the frame period between the last frame and the send
+            errors.append(latency - estimate)
+
+    return {"received": received, "played": played, "backlog": fifo.samples, "pacer": pacer,
+            "latency": np.array(latencies), "estimate_error": np.array(errors),
+            "final_latency": fifo.samples / rate}
+
+def main() -> None:
+    """Compares the previous fixed pacing with the RenderPacer at every device rate.
+    Exits with status 1 on failure.
+    :returns: None
+    """
+    print(f"dashboard started at {NOMINAL_RATE} SPS, latency target {LATENCY_TARGET_S * 1000:.0f} ms, "
+          f"network stall {NETWORK_STALL[1]} s at {NETWORK_STALL[0]} s, UI stall {UI_STALL[1]} s at {UI_STALL[0]} s")
+    print(f"{'SPS':>5} {'fixed backlog':>13} {'paced rate':>10} {'p50 ms':>7} {'p99 ms':>7} {'est err ms':>10} "
+          f"{'catch-ups':>9} {'underruns':>9} {'lost':>5} {'check':>6}")
+    ok = True
+    for rate in DEVICE_RATES:
+        fixed = simulate(rate, paced=False)
+        paced = simulate(rate, paced=True)
+        pacer = paced["pacer"]
+        p50, p99 = np.percentile(paced["latency"], (50, 99))
+        # Every received frame is played or still waiting, none is dropped
+        lost = paced["received"] - paced["played"] - paced["backlog"]
+        passed = (abs(pacer.rate - rate) < CLOCK_ERROR * rate and p99 < LATENCY_TARGET_S + RENDER_PERIOD_S
+                  and lost == 0 and pacer.catch_ups >= 1
+                  and np.abs(paced["estimate_error"]).max() < NETWORK_DELAY_S + NETWORK_JITTER_S + 1 / rate + 0.001)
+        ok = ok and passed
+        print(f"{rate:>5} {fixed['final_latency']:>12.1f}s {pacer.rate:>10.1f} {p50 * 1000:>7.0f} {p99 * 1000:>7.0f} "
+              f"{np.abs(paced['estimate_error']).max() * 1000:>10.1f} {pacer.catch_ups:>9} {pacer.underruns:>9} "
+              f"{lost:>5} {'ok' if passed else 'FAIL':>6}")
+
+    print("PASS" if ok else "FAIL")
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Host benchmark of the dashboard receiver: legacy str concatenation + find("}")
++ json.loads per sample against the recv_into decoders of src/monitor/protocol.py.
+
+Usage:
+    python tests/receiver_benchmark.py
+"""
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "monitor"))
+from protocol import HEADER, MAGIC, VERSION, JsonLineDecoder, TelemetryDecoder  # noqa: E402
+
+########################################################################################################################
+#                                                       GLOBALS                                                        #
+########################################################################################################################
+
+FRAMES = 40000          # 10 s at 4 kSPS
+CHANNELS = 8
+FRAMES_PER_PACKET = 46  # What a 1400 byte TelemetrySender packet holds
+RECV_SIZE = 4096
+DROPPED = (1000, 1001, 25000)  # Sequence numbers missing from the stream
+
+JSON_FMT = '{{"Seq":{},"Ch0":{},"Ch1":{},"Ch2":{},"Ch3":{},"Ch4":{},"Ch5":{},"Ch6":{},"Ch7":{}}}\n'
+
+########################################################################################################################
+#                                                      FUNCTIONS                                                       #
+########################################################################################################################
+
+class StreamSocket:
+    """Socket stand-in returning a byte stream in chunks of at most RECV_SIZE bytes."""
+
+    def __init__(self, data: bytes):
+        self.data = memoryview(data)
+        self.pos = 0
+
+    def recv(self, size: int) -> bytes:
+        chunk = bytes(self.data[self.pos:self.pos + min(size, RECV_SIZE)])
+        self.pos += len(chunk)
+        return chunk
+
+    def recv_into(self, buffer) -> int:
+        n = min(len(buffer), RECV_SIZE, len(self.data) - self.pos)
+        buffer[:n] = self.data[self.pos:self.pos + n]
+        self.pos += n
+        return n
+
+def make_stream() -> tuple[np.ndarray, np.ndarray, bytes, bytes]:
+    """Returns (sequences, samples, binary stream, JSON stream) of the same frames."""
+    rng = np.random.default_rng(1)
+    sequences = np.array([s for s in range(FRAMES + len(DROPPED)) if s not in DROPPED], dtype=np.int64)
+    samples = rng.integers(-(1 << 23), 1 << 23, size=(FRAMES, CHANNELS), dtype=np.int32)
+
+    packets = []
+    start = 0
+    while start < FRAMES:
+        stop = min(start + FRAMES_PER_PACKET, FRAMES)
+        # A packet never spans a sequence gap
+        gaps = np.flatnonzero(np.diff(sequences[start:stop]) != 1)
+        if len(gaps):
+            stop = start + gaps[0] + 1
+        words = samples[start:stop].astype(">i4").view(np.uint8).reshape(-1, 4)[:, 1:]
+        packets.append(HEADER.pack(MAGIC, VERSION, 0, int(sequences[start]), start * 250, stop - start,
+                                   (1 << CHANNELS) - 1) + words.tobytes())
+        start = stop
+
+    lines = [JSON_FMT.format(int(sequences[i]), *samples[i].tolist()) for i in range(FRAMES)]
+    return sequences, samples, b"".join(packets), "".join(lines).encode()
+
+def legacy_json(sock: StreamSocket) -> tuple[int, int]:
+    """The previous receive_json(): returns (frames, queue items)."""
+    buffer = ""
+    items = 0
+    while True:
+        data = sock.recv(RECV_SIZE).decode('utf-8')
+        if not data:
+            break
+        buffer += data
+        while "}" in buffer:
+            end_pos = buffer.find("}") + 1
+            json_part = buffer[:end_pos]
+            buffer = buffer[end_pos:]
+            try:
+                json.loads(json_part)
+                items += 1
+            except json.JSONDecodeError:
+                continue
+    return items, items
+
+def receive(decoder, sock: StreamSocket) -> tuple[list[dict], int]:
+    """The new receive(): returns (blocks, frames)."""
+    blocks = []
+    while decoder.recv_into(sock):
+        block = decoder.decode()
+        if block is not None:
+            blocks.append(block)
+    return blocks, sum(len(block["samples"]) for block in blocks)
+
+def check(blocks: list[dict], decoder, samples: np.ndarray) -> bool:
+    received = np.concatenate([block["samples"] for block in blocks])
+    return np.array_equal(received, samples) and decoder.lost_frames == len(DROPPED)
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def main() -> None:
+    """Decodes the same frames as JSON lines and binary packets, chunked like recv(4096).
+    Exits with status 1 on failure.
+    :returns: None
+    """
+    sequences, samples, binary, lines = make_stream()
+    print(f"{FRAMES} frames x {CHANNELS} channels, JSON {len(lines)} B, binary {len(binary)} B")
+    print(f"{'receiver':<16} {'frames/s':>12} {'queue items':>12} {'check':>6}")
+
+    (frames, items), elapsed = timed(legacy_json, StreamSocket(lines))
+    print(f"{'legacy json':<16} {frames / elapsed:>12.0f} {items:>12} {'':>6}")
+
+    ok = True
+    for name, decoder, stream in (("json", JsonLineDecoder(), lines), ("binary", TelemetryDecoder(), binary)):
+        (blocks, frames), elapsed = timed(receive, decoder, StreamSocket(stream))
+        passed = check(blocks, decoder, samples)
+        ok = ok and passed
+        print(f"{name:<16} {frames / elapsed:>12.0f} {len(blocks):>12} {'ok' if passed else 'FAIL':>6}")
+
+    print("PASS" if ok else "FAIL")
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
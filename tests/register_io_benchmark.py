@@ -0,0 +1,101 @@
+# #! /bin/MicroPython
+import gc
+
+from machine import SPI, Pin, freq
+from utime import ticks_diff, ticks_us
+
+from module.ads1299 import ADS1299, make_chnset
+
+########################################################################################################################
+#                                                       GLOBALS                                                        #
+########################################################################################################################
+
+BAUDRATE = 16000000 # Same SCLK as main.py
+REPEAT = 100        # Reconfigurations per mode
+
+MODES = (
+    ("byte by byte", {"byte_by_byte": True}),
+    ("batched, 4 MHz", {}),
+    ("batched, spaced", {"register_baudrate": 0}),
+)
+
+freq(240000000)
+
+cs = Pin(5, Pin.OUT, value=True)
+spi = SPI(2, baudrate=BAUDRATE, polarity=0, phase=1, bits=8, firstbit=SPI.MSB,
+          sck=Pin(18), mosi=Pin(23), miso=Pin(19))
+
+try:
+    import board  # Emulator only: counts SPI transfers and tSDECODE violations
+    model = board.ads
+except ImportError:
+    model = None
+
+########################################################################################################################
+#                                                      FUNCTIONS                                                       #
+########################################################################################################################
+
+def reconfigure(ads: ADS1299, gain: int) -> list[int]:
+    """Per-subject gain change: writes the 8 CHnSET registers and reads the whole map back over SPI."""
+    ads.write_registers(ADS1299.CH1SET, [make_chnset(gain=gain, channel_input=ADS1299.NORMAL)] * 8)
+    ads.sync()
+    return ads.read_all_registers()
+
+def switch_gains(ads: ADS1299) -> int:
+    """Session gain change through the register cache (diff-only), returns the elapsed us per switch."""
+    start = ticks_us()
+    for i in range(REPEAT):
+        ads.set_channel_gain(i & 7, ADS1299.GAIN_1 if i & 8 else ADS1299.GAIN_24)
+    return ticks_diff(ticks_us(), start) // REPEAT
+
+def run(ads: ADS1299) -> tuple[int, int, int]:
+    """Returns (elapsed us, SPI transfers, allocated bytes) of REPEAT reconfigurations."""
+    transfers = model.transfers if model else 0
+    mem_alloc = getattr(gc, "mem_alloc", None)
+    gc.collect()
+    allocated = mem_alloc() if mem_alloc else 0
+
+    start = ticks_us()
+    for i in range(REPEAT):
+        reconfigure(ads, ADS1299.GAIN_1 if i & 1 else ADS1299.GAIN_24)
+    elapsed = ticks_diff(ticks_us(), start)
+
+    allocated = mem_alloc() - allocated if mem_alloc else 0
+    return elapsed, (model.transfers - transfers) if model else 0, allocated
+
+def main() -> None:
+    """Compares the original byte by byte register path with the batched transactions.
+    Exits with status 1 on failure.
+    :returns: None
+    """
+    ok = True
+    reference = None
+    baseline = 0
+
+    print("{:<16} {:>10} {:>10} {:>12} {:>10} {:>8} {:>8}".format("mode", "us/reconf", "transfers", "alloc(B)",
+                                                                   "tSDECODE", "speedup", "us/gain"))
+    for name, kwargs in MODES:
+        ads = ADS1299(cs, spi, baudrate=BAUDRATE, **kwargs)
+        ads.send_command(ADS1299.SDATAC) # Registers are not accessible in RDATAC mode
+        violations = model.decode_violations if model else 0
+
+        elapsed, transfers, allocated = run(ads)
+        regs = reconfigure(ads, ADS1299.GAIN_24)
+        if reference is None:
+            reference = regs
+            baseline = elapsed
+        elif regs != reference:
+            print("FAIL: {} read back different registers".format(name))
+            ok = False
+
+        print("{:<16} {:>10} {:>10} {:>12} {:>10} {:>7.1f}x {:>8}".format(
+            name, elapsed // REPEAT, transfers // REPEAT, allocated // REPEAT,
+            (model.decode_violations - violations) if model else "-", baseline / max(elapsed, 1), switch_gains(ads)))
+
+    print("PASS" if ok else "FAIL")
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Host benchmark of the dashboard rendering data path: the legacy per sample
+queue.Queue + deque + np.array per tick against the BlockFifo + SampleRing of
+src/monitor/ring.py, without Qt (setData is not included).
+
+Usage:
+    python tests/render_benchmark.py
+"""
+import os
+import queue
+import sys
+import time
+from collections import deque
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "monitor"))
+from ring import BlockFifo, SampleRing  # noqa: E402
+
+########################################################################################################################
+#                                                       GLOBALS                                                        #
+########################################################################################################################
+
+RENDER_PERIOD_MS = 33
+FRAMES_PER_BLOCK = 46  # One TelemetrySender packet per block
+TICKS = 60             # Rendered ticks per configuration
+LSB_TO_VOLTS = 4.5 / ((1 << 23) - 1)
+
+# (channels, sample rate, window in s)
+CONFIGS = ((8, 250, 2.0), (8, 1000, 10.0), (16, 1000, 10.0), (32, 4000, 10.0))
+
+########################################################################################################################
+#                                                      FUNCTIONS                                                       #
+########################################################################################################################
+
+def make_blocks(channels: int, rate: int) -> list[np.ndarray]:
+    """Int32 blocks of the frames received during TICKS render periods."""
+    frames = rate * RENDER_PERIOD_MS * TICKS // 1000
+    rng = np.random.default_rng(1)
+    samples = rng.integers(-(1 << 23), 1 << 23, size=(frames, channels), dtype=np.int32)
+    return [samples[i:i + FRAMES_PER_BLOCK] for i in range(0, frames, FRAMES_PER_BLOCK)]
+
+def blocks_per_tick(blocks: list[np.ndarray], rate: int) -> list[list[np.ndarray]]:
+    """Splits the blocks by the tick during which they arrive."""
+    per_tick = [[] for _ in range(TICKS)]
+    received = 0
+    for block in blocks:
+        per_tick[min(received * 1000 // (rate * RENDER_PERIOD_MS), TICKS - 1)].append(block)
+        received += len(block)
+    return per_tick
+
+def legacy(per_tick: list[list[np.ndarray]], channels: int, rate: int, window: int) -> tuple[float, np.ndarray]:
+    """The previous consume_and_render(): returns (worst tick in s, last plotted window)."""
+    buffers = [deque([0.0] * window, maxlen=window) for _ in range(channels)]
+    playback = [queue.Queue() for _ in range(channels)]
+    samples_per_tick = rate * RENDER_PERIOD_MS // 1000
+    worst = 0.0
+    data = None
+    for arrived in per_tick:
+        start = time.perf_counter()
+        for block in arrived:
+            volts = block * LSB_TO_VOLTS
+            for ch in range(channels):
+                for val in volts[:, ch]:
+                    playback[ch].put(val)
+        for i in range(channels):
+            count = 0
+            while playback[i].qsize() > 2 and count < samples_per_tick:
+                buffers[i].append(playback[i].get_nowait())
+                count += 1
+        data = []
+        for i in range(channels):
+            data_array = np.array(buffers[i])
+            data.append(data_array - np.mean(data_array))
+        worst = max(worst, time.perf_counter() - start)
+    return worst, np.array(data)
+
+def ring(per_tick: list[list[np.ndarray]], channels: int, rate: int, window: int) -> tuple[float, np.ndarray]:
+    """The new consume_and_render(): returns (worst tick in s, last plotted window)."""
+    samples = SampleRing(channels, window)
+    pending = BlockFifo()
+    plot_data = np.empty((channels, window), dtype=np.float32)
+    samples_per_tick = rate * RENDER_PERIOD_MS // 1000
+    worst = 0.0
+    for arrived in per_tick:
+        start = time.perf_counter()
+        for block in arrived:
+            pending.put(np.multiply(block, LSB_TO_VOLTS, dtype=np.float32))
+        if pending.samples > 2:
+            samples.append(pending.take(min(samples_per_tick, pending.samples - 2)))
+            view = samples.view()
+            np.subtract(view, view.mean(axis=1, keepdims=True), out=plot_data)
+        worst = max(worst, time.perf_counter() - start)
+    return worst, plot_data
+
+def check_ring() -> bool:
+    """SampleRing against a deque for blocks smaller, equal to and larger than the window."""
+    samples = SampleRing(3, 10)
+    reference = deque([[0.0] * 3] * 10, maxlen=10)
+    value = 0
+    for n in (1, 4, 9, 10, 3, 25, 7, 0, 11):
+        block = np.arange(value, value + 3 * n, dtype=np.float32).reshape(n, 3)
+        value += 3 * n
+        samples.append(block)
+        reference.extend(block.tolist())
+        if not np.array_equal(samples.view(), np.array(reference, dtype=np.float32).T):
+            return False
+    return samples.count == 10 and samples.total == 70
+
+def check_fifo() -> bool:
+    """BlockFifo takes spanning several blocks and part of a block."""
+    fifo = BlockFifo()
+    for i in range(0, 30, 6):
+        fifo.put(np.arange(i, i + 6).reshape(3, 2))
+    taken = [fifo.take(n) for n in (1, 4, 2, 10)]
+    return (fifo.take(1) is None and fifo.samples == 0
+            and np.array_equal(np.concatenate(taken), np.arange(30).reshape(15, 2)))
+
+def main() -> None:
+    """Renders the same blocks with both data paths for each configuration.
+    Exits with status 1 on failure.
+    :returns: None
+    """
+    ok = check_ring() and check_fifo()
+    print(f"ring and FIFO checks: {'ok' if ok else 'FAIL'}")
+    print(f"{'channels':>8} {'SPS':>6} {'window':>7} {'legacy ms':>10} {'ring ms':>8} {'budget':>7} {'check':>6}")
+    for channels, rate, window_s in CONFIGS:
+        window = int(window_s * rate)
+        per_tick = blocks_per_tick(make_blocks(channels, rate), rate)
+        legacy_worst, expected = legacy(per_tick, channels, rate, window)
+        ring_worst, plotted = ring(per_tick, channels, rate, window)
+        passed = np.allclose(plotted, expected, atol=1e-6)
+        ok = ok and passed and ring_worst * 1000 < RENDER_PERIOD_MS
+        print(f"{channels:>8} {rate:>6} {window_s:>6.0f}s {legacy_worst * 1000:>10.2f} {ring_worst * 1000:>8.2f} "
+              f"{RENDER_PERIOD_MS:>5} ms {'ok' if passed else 'FAIL':>6}")
+
+    print("PASS" if ok else "FAIL")
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
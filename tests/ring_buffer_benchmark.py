@@ -0,0 +1,96 @@
+# #! /bin/MicroPython
+import array
+
+from utime import ticks_diff, ticks_us
+
+from ring_buffer import RingBuffer
+
+########################################################################################################################
+#                                                       GLOBALS                                                        #
+########################################################################################################################
+
+SIZE = 256        # Items per buffer, same as the main.py queues
+ITEMS = 20000     # Items pushed and popped on every run
+CHUNK = 64        # Items per bulk call
+
+########################################################################################################################
+#                                                      FUNCTIONS                                                       #
+########################################################################################################################
+
+class LegacyRingBuffer:
+    """Single item RingBuffer with modulo arithmetic, used as the baseline."""
+
+    def __init__(self, size: int, typecode: str = 'i'):
+        self._max_size = size + 1
+        self._buffer = array.array(typecode, [0] * self._max_size)
+        self._head = 0
+        self._tail = 0
+
+    def write(self, item: int) -> bool:
+        next_head = (self._head + 1) % self._max_size
+        if next_head == self._tail:
+            return False
+        self._buffer[self._head] = item
+        self._head = next_head
+        return True
+
+    def read(self) -> int | None:
+        if self._head == self._tail:
+            return None
+        item = self._buffer[self._tail]
+        self._tail = (self._tail + 1) % self._max_size
+        return item
+
+def run_single(queue) -> int:
+    """Push/drain CHUNK items at a time with write() and read()."""
+    start = ticks_us()
+    for base in range(0, ITEMS, CHUNK):
+        for i in range(CHUNK):
+            queue.write(base + i)
+        while queue.read() is not None:
+            pass
+    return ticks_diff(ticks_us(), start)
+
+def run_bulk(queue: RingBuffer) -> int:
+    """Push/drain CHUNK items at a time with write_many() and read_into()."""
+    src = array.array('i', range(CHUNK))
+    dst = array.array('i', [0] * CHUNK)
+    start = ticks_us()
+    for _ in range(0, ITEMS, CHUNK):
+        queue.write_many(src)
+        while queue.read_into(dst):
+            pass
+    return ticks_diff(ticks_us(), start)
+
+def run_spans(queue: RingBuffer) -> int:
+    """Push CHUNK items with write_many() and drain them through contiguous_spans()."""
+    src = array.array('i', range(CHUNK))
+    sink = bytearray(CHUNK * 4)
+    start = ticks_us()
+    for _ in range(0, ITEMS, CHUNK):
+        queue.write_many(src)
+        for span in queue.contiguous_spans():
+            sink[0:len(span) * 4] = span  # Raw copy, as a socket or file write would do
+            queue.advance(len(span))
+    return ticks_diff(ticks_us(), start)
+
+def main() -> None:
+    """Reports the time per item of every RingBuffer access pattern.
+    :returns: None
+    """
+    results = (
+        ("legacy write/read", run_single(LegacyRingBuffer(SIZE))),
+        ("write/read", run_single(RingBuffer(SIZE))),
+        ("write_many/read_into", run_bulk(RingBuffer(SIZE))),
+        ("write_many/contiguous_spans", run_spans(RingBuffer(SIZE))),
+    )
+
+    baseline = results[0][1]
+    print("{:<28} {:>10} {:>10} {:>8}".format("pattern", "total(us)", "ns/item", "speedup"))
+    for name, elapsed in results:
+        print("{:<28} {:>10} {:>10} {:>7.1f}x".format(name, elapsed, elapsed * 1000 // ITEMS,
+                                                      baseline / max(elapsed, 1)))
+
+
+if __name__ == "__main__":
+    main()
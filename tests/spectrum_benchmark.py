@@ -0,0 +1,140 @@
+"""
+Host benchmark of the dashboard spectral view of src/monitor/spectrum.py: the
+time per render tick of the incremental Welch PSD against a full Welch
+recompute of the ring window, plus the time budget after a burst of samples.
+The PSD is checked against a direct Welch estimate of the same segments, the
+band power against the power of the test sines, and the view must recover from
+a segment cost estimate pushed above the budget by a single slow segment.
+Exits with status 1 on failure.
+
+Usage:
+    python tests/spectrum_benchmark.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "monitor"))
+from ring import SampleRing  # noqa: E402
+from spectrum import WelchPSD  # noqa: E402
+
+########################################################################################################################
+#                                                       GLOBALS                                                        #
+########################################################################################################################
+
+RENDER_PERIOD_MS = 33
+BUDGET_MS = 5
+MARGIN_MS = 2  # Timer resolution and OS scheduling on top of the budget
+AVERAGES = 8
+SECONDS = 20
+BURST_S = 5  # Samples appended at once by the burst test
+SLOW_SEGMENT_S = 0.006  # Cost estimate left by one slow segment, above the budget
+RECOVERY_TICKS = 30     # Ticks given to take a segment again after it
+
+# (channels, sample rate, window in s)
+CONFIGS = ((8, 250, 10.0), (8, 1000, 10.0), (32, 4000, 10.0))
+
+ALPHA_HZ = 10.0  # Amplitude of channel i: (i + 1) * 10 uV
+LINE_HZ = 50.0   # 20 uV on every channel
+
+########################################################################################################################
+#                                                      FUNCTIONS                                                       #
+########################################################################################################################
+
+def make_signal(channels: int, rate: int, seconds: float) -> np.ndarray:
+    t = np.arange(int(seconds * rate))[:, None] / rate
+    amplitude = 10e-6 * np.arange(1, channels + 1)
+    rng = np.random.default_rng(1)
+    return (amplitude * np.sin(2 * np.pi * ALPHA_HZ * t) + 20e-6 * np.sin(2 * np.pi * LINE_HZ * t)
+            + 1e-6 * rng.standard_normal((len(t), channels))).astype(np.float32)
+
+def welch(x: np.ndarray, rate: int, nperseg: int, step: int, last_end: int, averages: int) -> np.ndarray:
+    """Direct one-sided Welch PSD (channels, bins) of the segments ending at last_end, last_end - step, ..."""
+    window = np.hanning(nperseg + 1)[:-1]
+    psd = 0
+    for k in range(averages):
+        segment = x[last_end - k * step - nperseg:last_end - k * step].astype(np.float64)
+        spectrum = np.fft.rfft((segment - segment.mean(axis=0)) * window[:, None], axis=0)
+        periodogram = np.abs(spectrum) ** 2 / (rate * np.sum(window ** 2))
+        periodogram[1:nperseg // 2 + nperseg % 2] *= 2
+        psd = psd + periodogram
+    return (psd / averages).T
+
+def recovers(psd: WelchPSD, ring: SampleRing, x: np.ndarray, per_tick: int) -> bool:
+    """True if segments are taken again within RECOVERY_TICKS after one slow segment."""
+    psd._segment_s = SLOW_SEGMENT_S
+    taken = 0
+    for tick in range(RECOVERY_TICKS):
+        ring.append(x[tick * per_tick:(tick + 1) * per_tick])
+        taken += psd.update(BUDGET_MS / 1000)
+    return taken > 0
+
+def run(channels: int, rate: int, window_s: float) -> tuple[bool, float, float, float, float]:
+    """Returns (check, incremental mean ms, incremental worst ms, full recompute mean ms, burst ms)."""
+    x = make_signal(channels, rate, SECONDS)
+    ring = SampleRing(channels, int(window_s * rate))
+    psd = WelchPSD(ring, rate, rate, averages=AVERAGES)
+    per_tick = rate * RENDER_PERIOD_MS // 1000
+    nperseg = psd.nperseg
+
+    incremental = []
+    full = []
+    for start in range(0, len(x), per_tick):
+        ring.append(x[start:start + per_tick])
+        tick = time.perf_counter()
+        psd.update(BUDGET_MS / 1000)
+        incremental.append(time.perf_counter() - tick)
+        # What a per frame full Welch over the ring window costs
+        if ring.count == ring.window and len(full) < 30:
+            tick = time.perf_counter()
+            view = ring.view()
+            n = (ring.window - nperseg) // psd.step + 1
+            index = (np.arange(n) * psd.step)[:, None] + np.arange(nperseg)
+            segments = view[:, index]
+            np.fft.rfft((segments - segments.mean(axis=2, keepdims=True)) * np.hanning(nperseg), axis=2)
+            full.append(time.perf_counter() - tick)
+
+    last_end = psd._next_end - psd.step
+    expected = welch(x, rate, nperseg, psd.step, last_end, AVERAGES)
+    alpha = psd.band_names.index("alpha")
+    amplitude = 10e-6 * np.arange(1, channels + 1)
+    ok = (np.allclose(psd.psd, expected, rtol=1e-3, atol=1e-6 * expected.max())
+          and np.all(psd.freqs[psd.psd[0].argmax()] == LINE_HZ)
+          and np.allclose(psd.band_power[:, alpha], amplitude ** 2 / 2, rtol=0.05)
+          and psd.skipped == 0)
+
+    # Burst: several seconds arrive at once, a single update still stays within the budget
+    ring.append(make_signal(channels, rate, BURST_S))
+    tick = time.perf_counter()
+    psd.update(BUDGET_MS / 1000)
+    burst = time.perf_counter() - tick
+    ok = ok and recovers(psd, ring, x, per_tick)
+
+    # Every update counts, the first one included
+    ticks = np.array(incremental)
+    return ok, ticks.mean() * 1000, ticks.max() * 1000, np.mean(full) * 1000, burst * 1000
+
+def main() -> None:
+    """Runs the incremental PSD on every configuration.
+    :returns: None
+    """
+    ok = True
+    print(f"1 s segments, 50 % overlap, {AVERAGES} averages, budget {BUDGET_MS} ms per {RENDER_PERIOD_MS} ms tick")
+    print(f"{'channels':>8} {'SPS':>6} {'window':>7} {'tick ms':>8} {'worst ms':>9} {'full ms':>8} "
+          f"{'burst ms':>9} {'check':>6}")
+    for channels, rate, window_s in CONFIGS:
+        passed, mean_ms, worst_ms, full_ms, burst_ms = run(channels, rate, window_s)
+        passed = passed and worst_ms <= BUDGET_MS + MARGIN_MS and burst_ms <= BUDGET_MS + MARGIN_MS
+        ok = ok and passed
+        print(f"{channels:>8} {rate:>6} {window_s:>6.0f}s {mean_ms:>8.3f} {worst_ms:>9.3f} {full_ms:>8.3f} "
+              f"{burst_ms:>9.3f} {'ok' if passed else 'FAIL':>6}")
+
+    print("PASS" if ok else "FAIL")
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
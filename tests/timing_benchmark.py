@@ -0,0 +1,91 @@
+# #! /bin/MicroPython
+from machine import SPI, Pin, freq
+from utime import ticks_diff, ticks_us
+
+from module.ads1299 import ADS1299
+
+########################################################################################################################
+#                                                       GLOBALS                                                        #
+########################################################################################################################
+
+BAUDRATES = (16000000, 8000000, 4000000)
+REPEAT = 2000            # Reads per measurement
+FRAME_PERIOD_US = 62.5   # 16 kSPS
+
+freq(240000000)
+
+cs = Pin(5, Pin.OUT, value=True)
+
+try:
+    import board  # Emulator only: counts the interface timing violations
+    model = board.ads
+except ImportError:
+    model = None
+
+########################################################################################################################
+#                                                      FUNCTIONS                                                       #
+########################################################################################################################
+
+class LegacyADS1299(ADS1299):
+    """Same driver with the fixed sleep_us() padding around CS, used as the baseline."""
+
+    def _set_timing(self, baudrate: int, register_baudrate: int, f_clk: int) -> None:
+        super()._set_timing(baudrate, register_baudrate, f_clk)
+        self._sccs_us = 4
+        self._csh_us = 4
+        self._reset_us = 4
+        self._decode_gap_us = 4
+
+def measure(read) -> float:
+    """Average us per call."""
+    start = ticks_us()
+    for _ in range(REPEAT):
+        read()
+    return ticks_diff(ticks_us(), start) / REPEAT
+
+def violations() -> int:
+    return (model.decode_violations + model.sccs_violations + model.csh_violations) if model else 0
+
+def run(cls, spi: SPI, baudrate: int) -> tuple[float, float, float, int]:
+    """Returns (us per RDATAC read, us per RDATA read, us per command, timing violations)."""
+    ads = cls(cs, spi, baudrate=baudrate)
+    ads.send_command(ADS1299.SDATAC)
+    before = violations()
+
+    ads.send_command(ADS1299.RDATAC)
+    continuous = measure(ads.read_channels_continuous)
+    ads.send_command(ADS1299.SDATAC)
+    once = measure(ads.read_channels_once)
+    command = measure(lambda: ads.send_command(ADS1299.SDATAC))
+
+    return continuous, once, command, violations() - before
+
+def main() -> None:
+    """Compares the per frame overhead of the fixed sleeps with the rate-aware timing.
+    Exits with status 1 on failure.
+    :returns: None
+    """
+    ok = True
+    print("{:<8} {:>9} {:>8} {:>10} {:>10} {:>10} {:>9} {:>10}".format(
+        "timing", "SCLK", "wire", "RDATAC", "overhead", "16kSPS", "RDATA", "command"))
+    for baudrate in BAUDRATES:
+        spi = SPI(2, baudrate=baudrate, polarity=0, phase=1, bits=8, firstbit=SPI.MSB,
+                  sck=Pin(18), mosi=Pin(23), miso=Pin(19))
+        wire_us = 27 * 8 * 1000000 / baudrate
+        for name, cls in (("fixed", LegacyADS1299), ("rate", ADS1299)):
+            continuous, once, command, errors = run(cls, spi, baudrate)
+            overhead = continuous - wire_us
+            print("{:<8} {:>6}MHz {:>6.1f}us {:>8.1f}us {:>8.1f}us {:>9.0f}% {:>7.1f}us {:>8.1f}us".format(
+                name, baudrate // 1000000, wire_us, continuous, overhead, 100 * continuous / FRAME_PERIOD_US,
+                once, command))
+            if errors:
+                print("FAIL: {} interface timing violations".format(errors))
+                ok = False
+
+    print("PASS" if ok else "FAIL")
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
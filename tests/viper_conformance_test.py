@@ -0,0 +1,169 @@
+# #! /bin/MicroPython
+import array
+
+from machine import SPI, Pin, freq
+from utime import ticks_diff, ticks_us
+
+import ring_buffer
+from module import ads1299
+from module.ads1299 import ADS1299, FRAME_SIZE, NUM_CHANNELS
+from module.profile_images import TEST_SIGNAL
+from ring_buffer import DROP_OLDEST, FrameRingBuffer
+
+########################################################################################################################
+#                                                       GLOBALS                                                        #
+########################################################################################################################
+
+CAPTURED_FRAMES = 256  # Frames captured from the device (or the emulator)
+QUEUE_FRAMES = 100     # Smaller than the capture so the ring buffer wraps and overwrites
+
+# Samples around the 24-bit two's complement boundaries, one frame each
+EDGE_SAMPLES = (0x000000, 0x000001, 0x7FFFFE, 0x7FFFFF, 0x800000, 0x800001, 0xFFFFFE, 0xFFFFFF)
+
+freq(240000000)
+
+cs = Pin(5, Pin.OUT, value=True)
+drdy = Pin(4, Pin.IN, Pin.PULL_UP)
+spi = SPI(2, baudrate=16000000, polarity=0, phase=1, bits=8, firstbit=SPI.MSB,
+          sck=Pin(18), mosi=Pin(23), miso=Pin(19))
+
+# Both implementations of every kernel, the viper ones only exist when the port has the native emitter
+try:
+    from module import _frames_viper
+    VIPER_DECODE = _frames_viper.decode_frames
+    VIPER_UINT_TO_INT = _frames_viper.uint_to_int
+except (ImportError, SyntaxError, AttributeError):
+    VIPER_DECODE = VIPER_UINT_TO_INT = None
+
+try:
+    import _ring_buffer_viper
+    VIPER_STORE = _ring_buffer_viper.store_frame
+except (ImportError, SyntaxError, AttributeError):
+    VIPER_STORE = None
+
+########################################################################################################################
+#                                                      FUNCTIONS                                                       #
+########################################################################################################################
+
+def capture() -> bytearray:
+    """Captured frames (test signal on channels 1-4, shorted inputs on 5-8) followed by the edge case frames."""
+    ads = ADS1299(cs, spi)
+    ads.init()
+    ads.apply_profile(TEST_SIGNAL, diff=False)
+    ads.config_all_channels(channels_active=4, gain=ADS1299.GAIN_1, channel_input=ADS1299.TEST)
+    ads.init_burst(CAPTURED_FRAMES, blocks=1)
+    ads.enable_read_continuous()
+    block = ads.read_block(drdy)
+    ads.disable_read_continuous()
+
+    raw = bytearray(block)
+    for sample in EDGE_SAMPLES:
+        word = bytes([sample >> 16, (sample >> 8) & 0xFF, sample & 0xFF])
+        raw += bytearray([0xC0, 0x00, 0x00]) + word * NUM_CHANNELS
+    return raw
+
+def reference(raw, n_frames: int) -> tuple[array.array, array.array]:
+    """Straightforward decode used as the expected output."""
+    channels = array.array('i', [0] * (n_frames * NUM_CHANNELS))
+    status = array.array('i', [0] * n_frames)
+    for frame in range(n_frames):
+        base = frame * FRAME_SIZE
+        status[frame] = (raw[base] << 16) | (raw[base + 1] << 8) | raw[base + 2]
+        for ch in range(NUM_CHANNELS):
+            pos = base + 3 + 3 * ch
+            value = (raw[pos] << 16) | (raw[pos + 1] << 8) | raw[pos + 2]
+            channels[frame * NUM_CHANNELS + ch] = value - (1 << 24) if value >= (1 << 23) else value
+    return channels, status
+
+def check_decode(decode, raw, n_frames: int, expected) -> tuple[bool, int]:
+    """Returns (matches the reference, elapsed us)."""
+    channels = array.array('i', [0] * (n_frames * NUM_CHANNELS))
+    status = array.array('i', [0] * n_frames)
+    start = ticks_us()
+    decode(raw, n_frames, channels, status)
+    elapsed = ticks_diff(ticks_us(), start)
+    return channels == expected[0] and status == expected[1], elapsed
+
+def check_uint_to_int(convert, raw, expected) -> tuple[bool, int]:
+    """Every captured sample as an unsigned 24-bit word, plus values with bits above bit 23 set."""
+    samples = [(raw[pos] << 16) | (raw[pos + 1] << 8) | raw[pos + 2]
+               for frame in range(len(raw) // FRAME_SIZE) for pos in range(frame * FRAME_SIZE + 3,
+                                                                            (frame + 1) * FRAME_SIZE, 3)]
+    ok = True
+    start = ticks_us()
+    for i in range(len(samples)):
+        if convert(samples[i]) != expected[i]:
+            ok = False
+    elapsed = ticks_diff(ticks_us(), start)
+
+    for value in EDGE_SAMPLES:
+        if convert(value | 0x3F000000) != convert(value):
+            ok = False
+    return ok, elapsed
+
+def check_store(store, channels: array.array, status: array.array, n_frames: int) -> tuple[array.array, int]:
+    """Pushes every frame through a wrapping DROP_OLDEST queue, returns (frames read back, elapsed us)."""
+    queue = FrameRingBuffer(QUEUE_FRAMES, policy=DROP_OLDEST)
+    queue._store = store
+    view = memoryview(channels)
+    frames = [view[i * NUM_CHANNELS:(i + 1) * NUM_CHANNELS] for i in range(n_frames)]
+
+    start = ticks_us()
+    for i in range(n_frames):
+        queue.write_frame(frames[i], status[i], i * 1000, i)
+    elapsed = ticks_diff(ticks_us(), start)
+
+    out = array.array('i', [0] * (QUEUE_FRAMES * queue.width))
+    queue.read_frames_into(out, QUEUE_FRAMES)
+    return out, elapsed
+
+def report(name: str, results: list) -> bool:
+    """Prints one line per implementation, returns False on any mismatch."""
+    ok = True
+    for impl, result in results:
+        if result is None:
+            print("{:<12} {:<9} {:>10}".format(name, impl, "n/a"))
+            continue
+        passed, elapsed = result
+        ok = ok and passed
+        print("{:<12} {:<9} {:>8}us  {}".format(name, impl, elapsed, "ok" if passed else "MISMATCH"))
+    return ok
+
+def main() -> None:
+    """Runs the bytecode and viper kernels against the same captured frames.
+    Exits with status 1 on failure.
+    :returns: None
+    """
+    raw = capture()
+    n_frames = len(raw) // FRAME_SIZE
+    expected = reference(raw, n_frames)
+    print("Frames: {} ({} captured), active implementations: ads1299 {}, ring_buffer {}".format(
+        n_frames, CAPTURED_FRAMES, "viper" if ads1299.ACCELERATED else "bytecode",
+        "viper" if ring_buffer.ACCELERATED else "bytecode"))
+
+    ok = report("decode", [
+        ("bytecode", check_decode(ads1299._decode_frames_py, raw, n_frames, expected)),
+        ("viper", check_decode(VIPER_DECODE, raw, n_frames, expected) if VIPER_DECODE else None),
+    ])
+    ok = report("uint_to_int", [
+        ("bytecode", check_uint_to_int(ads1299._uint_to_int_py, raw, expected[0])),
+        ("viper", check_uint_to_int(VIPER_UINT_TO_INT, raw, expected[0]) if VIPER_UINT_TO_INT else None),
+    ]) and ok
+
+    # The bytecode store is the reference of the viper one
+    stored, elapsed = check_store(ring_buffer._store_frame_py, expected[0], expected[1], n_frames)
+    results = [("bytecode", (True, elapsed)), ("viper", None)]
+    if VIPER_STORE:
+        viper_stored, elapsed = check_store(VIPER_STORE, expected[0], expected[1], n_frames)
+        results[1] = ("viper", (viper_stored == stored, elapsed))
+    ok = report("store_frame", results) and ok
+
+    if VIPER_DECODE is None or VIPER_STORE is None:
+        print("viper emitter not available, only the bytecode fallback was checked")
+    print("PASS" if ok else "FAIL")
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Cross-compile the firmware modules to .mpy so the board imports bytecode
+instead of compiling the sources on every boot.
+
+Usage:
+    python tools/build_mpy.py [--arch ARCH] [--out DIR]
+
+mpy-cross never stores docstrings (MICROPY_ENABLE_DOC_STRING is off in the
+compiler), so the artifacts only hold bytecode and the viper machine code.
+The viper modules need -march, xtensawin is the ESP32 one. The mpy-cross
+version must produce the .mpy format of the firmware (v6.3 since MicroPython
+1.23), set MPY_CROSS to use another executable.
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+BUILD = os.path.join(ROOT, "build")
+
+# main.py stays a source file, the board only runs main.py on boot
+FIRMWARE_MODULES = (
+    "ring_buffer.py",
+    "_ring_buffer_viper.py",
+    "telemetry.py",
+    "heap.py",
+    "wlan.py",
+    "module/__init__.py",
+    "module/ads1299.py",
+    "module/_frames_viper.py",
+    "module/profiles.py",
+    "module/profile_images.py",
+)
+
+
+def mpy_cross() -> str:
+    executable = os.environ.get("MPY_CROSS", "mpy-cross")
+    if shutil.which(executable) is None:
+        raise SystemExit(f"{executable} not found, run it through uv (make build) or set MPY_CROSS")
+    return executable
+
+
+def build(arch: str | None = "xtensawin", out: str | None = None, verbose: bool = True) -> dict[str, str]:
+    """
+    Compile every firmware module that changed since its last build.
+
+    :param arch: -march of mpy-cross, None for bytecode only (the viper
+                 modules are skipped then).
+    :param out: Output directory, build/<arch> by default.
+    :param verbose: Print one line per module.
+    :return: Module path relative to src -> .mpy path.
+    """
+    executable = mpy_cross()
+    out = out or os.path.join(BUILD, arch or "bytecode")
+    artifacts = {}
+
+    for module in FIRMWARE_MODULES:
+        if arch is None and "viper" in module:
+            continue
+
+        source = os.path.join(SRC, module)
+        target = os.path.join(out, module[:-3] + ".mpy")
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        artifacts[module] = target
+
+        if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(source):
+            continue
+
+        cmd = [executable, "-s", module, "-o", target]
+        if arch:
+            cmd.insert(1, f"-march={arch}")
+        subprocess.run(cmd + [source], check=True)
+
+        if verbose:
+            print(f"{module:<28} {os.path.getsize(source):>7} B -> {os.path.getsize(target):>6} B")
+
+    return artifacts
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--arch", default="xtensawin", help="mpy-cross -march, 'none' for bytecode only")
+    parser.add_argument("--out", help="output directory (default build/<arch>)")
+    args = parser.parse_args(argv)
+
+    arch = None if args.arch == "none" else args.arch
+    artifacts = build(arch, args.out)
+    print(f"{len(artifacts)} modules in {os.path.dirname(artifacts['ring_buffer.py'])}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
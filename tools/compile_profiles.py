@@ -0,0 +1,60 @@
+"""
+Precompile the register profiles of src/module/profiles.py into
+src/module/profile_images.py, a module of bytes constants that the firmware
+imports without pulling in the profile definitions or the make_* helpers.
+
+Usage (the emulator provides machine/micropython on the host):
+    python src/emulator/run.py tools/compile_profiles.py [OUTPUT]
+"""
+import os
+import sys
+
+from module.profiles import PROFILES, compile_profiles
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OUTPUT = os.path.join(ROOT, "src", "module", "profile_images.py")
+
+HEADER = """# #! /bin/MicroPython
+# Generated by tools/compile_profiles.py from module/profiles.py, do not edit.
+# Register images indexed by register address, apply them with ADS1299.apply_profile().
+"""
+
+
+def identifier(name: str) -> str:
+    """Profile name as a module constant, "EEG-8ch-250-gain24" -> "EEG_8CH_250_GAIN24"."""
+    return "".join(c if c.isalnum() else "_" for c in name).upper()
+
+
+def literal(image: bytes) -> str:
+    """bytes literal with one \\x escape per register, split in two lines."""
+    half = len(image) // 2
+    parts = ("".join(f"\\x{value:02x}" for value in chunk) for chunk in (image[:half], image[half:]))
+    return "(\n    b'{}'\n    b'{}'\n)".format(*parts)
+
+
+def render(images: dict[str, bytes]) -> str:
+    lines = [HEADER]
+    for name, image in images.items():
+        lines.append(f"{identifier(name)} = {literal(image)}")
+    lines.append("")
+    lines.append("IMAGES = {")
+    for name in images:
+        lines.append(f"    {name!r}: {identifier(name)},")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def main(argv: list[str]) -> int:
+    output = argv[1] if len(argv) > 1 else OUTPUT
+    images = compile_profiles(PROFILES)
+    with open(output, "w") as f:
+        f.write(render(images))
+
+    for name, image in images.items():
+        print(f"{name:<20} {image.hex(' ')}")
+    print(f"{len(images)} profiles -> {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,87 @@
+"""
+Import time and heap cost of the firmware modules as .py sources and as .mpy
+artifacts, measured with the MicroPython unix port.
+
+Usage:
+    python tools/import_report.py [--micropython PATH] [--repeat N]
+
+Every import runs in a fresh process. "import" is the time of the import
+statement. "retained" is the heap still used after a gc.collect(), the
+module objects and their bytecode. "peak" is everything allocated during the
+import, including the parser and compiler garbage a .py import leaves behind.
+The unix port has no machine.Pin/SPI, tools/unix_port provides empty ones.
+The .mpy artifacts are built for the host architecture, the numbers show the
+relative cost and are not the ESP32 ones.
+"""
+import argparse
+import os
+import platform
+import shutil
+import subprocess
+import sys
+
+from build_mpy import BUILD, ROOT, SRC, build
+
+MODULES = ("ring_buffer", "telemetry", "heap", "module.ads1299", "module.profile_images", "module.profiles")
+SHIMS = os.path.join(ROOT, "tools", "unix_port")
+
+# mpy-cross -march of the host, the unix port loads native code of its own architecture only
+HOST_ARCH = {"x86_64": "x64", "AMD64": "x64", "i686": "x86", "i386": "x86"}.get(platform.machine())
+
+PROBE = """
+import gc, time
+gc.collect()
+free = gc.mem_free()
+alloc = gc.mem_alloc()
+start = time.ticks_us()
+import {module}
+elapsed = time.ticks_diff(time.ticks_us(), start)
+peak = gc.mem_alloc() - alloc
+gc.collect()
+print(elapsed, free - gc.mem_free(), peak)
+"""
+
+
+def measure(micropython: str, path: str, module: str, repeat: int) -> tuple[int, int, int] | None:
+    """Median (import us, retained bytes, peak bytes) of repeat fresh imports, None if the import fails."""
+    env = dict(os.environ, MICROPYPATH=f"{SHIMS}:{path}")
+    runs = []
+    for _ in range(repeat):
+        result = subprocess.run([micropython, "-c", PROBE.format(module=module)], env=env, capture_output=True,
+                                text=True)
+        if result.returncode:
+            return None
+        runs.append(tuple(int(value) for value in result.stdout.split()))
+
+    runs.sort()
+    return runs[len(runs) // 2]
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--micropython", default=os.environ.get("MICROPYTHON", "micropython"),
+                        help="MicroPython unix port executable")
+    parser.add_argument("--repeat", type=int, default=5, help="imports per module and format, the median is shown")
+    args = parser.parse_args(argv)
+
+    if shutil.which(args.micropython) is None:
+        print(f"{args.micropython} not found, build the unix port (ports/unix) or set MICROPYTHON")
+        return 1
+
+    build(HOST_ARCH, os.path.join(BUILD, "unix"), verbose=False)
+    variants = (("py", SRC), ("mpy", os.path.join(BUILD, "unix")))
+
+    print(f"{'module':<24} {'format':<6} {'import(us)':>10} {'retained(B)':>12} {'peak(B)':>10}")
+    for module in MODULES:
+        for name, path in variants:
+            result = measure(args.micropython, path, module, args.repeat)
+            if result is None:
+                print(f"{module:<24} {name:<6} {'import failed':>34}")
+                continue
+            elapsed, retained, peak = result
+            print(f"{module:<24} {name:<6} {elapsed:>10} {retained:>12} {peak:>10}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,28 @@
+# Hardware classes the MicroPython unix port does not have, just enough to import the firmware modules for
+# tools/import_report.py. Nothing here talks to a device.
+
+
+class Pin:
+    IN = 1
+    OUT = 3
+    PULL_UP = 2
+    IRQ_RISING = 1
+    IRQ_FALLING = 2
+
+    def __init__(self, pin_id, *args, **kwargs):
+        self._id = pin_id
+
+
+class SPI:
+    MSB = 0
+
+    def __init__(self, spi_id, *args, **kwargs):
+        self._id = spi_id
+
+
+def freq(hz=None):
+    return 240000000
+
+
+def idle():
+    pass